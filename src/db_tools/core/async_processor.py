@@ -0,0 +1,414 @@
+import asyncio
+from contextlib import ExitStack, asynccontextmanager
+from typing import (Any, AsyncIterator, Callable, Dict, Iterator, List,
+                    NamedTuple, Optional, TypeVar)
+
+from sqlalchemy import Table, func, select
+from sqlalchemy.engine import make_url
+
+from db_tools.core import (database, fk_sampler, metrics, parallel, processor,
+                           progress, scanner, schema_cache, writers)
+from db_tools.core.checkpoint import AnonymizeCheckpoint
+
+try:
+    from sqlalchemy.ext.asyncio import (AsyncConnection, AsyncEngine,
+                                        create_async_engine)
+except ImportError:  # Cần greenlet (sqlalchemy[asyncio]); không có thì chế độ async không khả dụng
+    AsyncConnection = AsyncEngine = create_async_engine = None
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Driver async mặc định cho từng loại database
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg", "mysql": "aiomysql"}
+_KNOWN_ASYNC_DRIVERS = {"aiosqlite", "asyncpg", "aiomysql", "asyncmy", "psycopg_async"}
+# Số chunk/batch tối đa chờ giữa hai giai đoạn của pipeline (`async_queue_size` trong db_tools.yml)
+DEFAULT_QUEUE_SIZE = 4
+
+_END = object()
+
+
+class _Failed(NamedTuple):
+    error: BaseException
+
+
+def async_url(connection_string: str) -> str:
+    """Đổi chuỗi kết nối sang driver async tương ứng (sqlite -> aiosqlite, postgresql -> asyncpg...)."""
+    url = make_url(connection_string)
+    if url.get_driver_name() in _KNOWN_ASYNC_DRIVERS:
+        return url.render_as_string(hide_password=False)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"Async mode is not supported for '{backend}' databases.")
+    return url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+
+def get_async_engine(connection_string: str, engine_options: Optional[Dict[str, Any]] = None) -> "AsyncEngine":
+    """Tạo AsyncEngine; mục `engine:` trong db_tools.yml được áp dụng như với engine thường."""
+    if create_async_engine is None:
+        raise RuntimeError("Async mode needs the 'async' extra of db-tools (greenlet and an async driver such as aiosqlite).")
+    options = {
+        key: value for key, value in (engine_options or {}).items() if key in database.ENGINE_OPTION_KEYS
+    }
+    url = async_url(connection_string)
+    try:
+        return create_async_engine(url, **options)
+    except ImportError as e:
+        raise RuntimeError(f"Async mode needs the driver for '{make_url(url).drivername}': {e}") from e
+
+
+async def _buffered(source: AsyncIterator[T], queue_size: int) -> AsyncIterator[T]:
+    """
+    Chạy `source` trong một task riêng, nối với bên đọc bằng một hàng đợi giới hạn `queue_size` phần tử.
+    Khi hàng đợi đầy, `source` phải chờ (backpressure) nên bộ nhớ không tăng theo số dòng.
+    Lỗi của `source` được ném lại ở bên đọc; bên đọc dừng giữa chừng thì `source` bị hủy.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    slots = asyncio.Semaphore(queue_size)
+
+    async def produce() -> None:
+        try:
+            async for item in source:
+                await slots.acquire()
+                queue.put_nowait(item)
+        except Exception as e:
+            queue.put_nowait(_Failed(e))
+        finally:
+            queue.put_nowait(_END)
+            await source.aclose()
+
+    task = asyncio.ensure_future(produce())
+    try:
+        while True:
+            item = await queue.get()
+            if item is _END:
+                return
+            if isinstance(item, _Failed):
+                raise item.error
+            slots.release()
+            yield item
+    finally:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+
+async def _iterate_in_thread(iterator: Iterator[T]) -> AsyncIterator[T]:
+    """Duyệt một iterator đồng bộ (ví dụ sinh dữ liệu Faker) trên thread riêng, không chặn event loop."""
+    loop = asyncio.get_running_loop()
+    while True:
+        item = await loop.run_in_executor(None, next, iterator, _END)
+        if item is _END:
+            return
+        yield item
+
+
+async def _map_in_thread(function: Callable[[T], R], source: AsyncIterator[T]) -> AsyncIterator[R]:
+    loop = asyncio.get_running_loop()
+    try:
+        async for item in source:
+            yield await loop.run_in_executor(None, function, item)
+    finally:
+        await source.aclose()
+
+
+@asynccontextmanager
+async def _bulk_load_session(connection: "AsyncConnection") -> AsyncIterator[None]:
+    """writers.bulk_load_session cho kết nối async."""
+    with ExitStack() as stack:
+        await connection.run_sync(lambda sync_connection: stack.enter_context(
+            writers.bulk_load_session(sync_connection)
+        ))
+        try:
+            yield
+        finally:
+            await connection.run_sync(lambda sync_connection: stack.close())
+
+
+async def _seed_table_async(
+    connection: "AsyncConnection",
+    table_name: str,
+    table_config: Dict[str, Any],
+    run: processor.SeedRun,
+    queue_size: int,
+) -> None:
+    """
+    Như processor.seed_table, nhưng sinh dữ liệu và ghi chạy song song:
+    chunk được sinh trên một thread và chờ trong hàng đợi trong lúc chunk trước đang được ghi.
+    """
+    table = run.metadata.tables.get(table_name)
+    if table is None:
+        progress.echo(f"[bold red]❌ Error: Table '{table_name}' does not exist.[/bold red]")
+        return
+    count = table_config.get("count", 10)
+    chunk_size = int(table_config.get("chunk_size", processor.DEFAULT_CHUNK_SIZE))
+    if count <= 0:
+        return
+    return_pks = table_name in run.parent_tables
+
+    progress.echo(f"   - Generating and inserting {count} records for [bold magenta]'{table_name}'[/bold magenta] in chunks of {chunk_size}...")
+    write = writers.get_writer(connection.sync_connection)
+    samplers = await connection.run_sync(
+        processor.build_fk_samplers, table_name, table_config.get("relations", {}), run
+    )
+    chunks = processor.generate_seed_chunks(
+        table_name, count, chunk_size, table_config.get("columns", {}), samplers, run.executor, run.seed,
+    )
+    new_pks = fk_sampler.KeyPool()
+    inserted = 0
+    pipeline = _buffered(_iterate_in_thread(chunks), queue_size)
+    try:
+        with progress.task(table_name, "seed", count, f"Seeding '{table_name}'...", run.show_progress) as advance:
+            async for chunk in pipeline:
+                with metrics.phase("write", table_name):
+                    chunk_pks = await connection.run_sync(write, table, chunk, return_pks)
+                if chunk_pks:
+                    new_pks.extend(chunk_pks)
+                inserted += len(chunk)
+                metrics.count("rows", len(chunk), table_name)
+                metrics.count("chunks", 1, table_name)
+                advance(len(chunk))
+    finally:
+        await pipeline.aclose()
+    if return_pks:
+        run.seeded_pks[table_name] = new_pks
+    progress.echo(f"[bold green]✅ Seeded {inserted} records into '{table_name}' successfully![/bold green]")
+
+
+async def process_seed_async(
+    config: Dict[str, Any], db_engine: "AsyncEngine", workers: Optional[int] = None
+) -> None:
+    """
+    process_seed trên một AsyncEngine. Các bảng được seed lần lượt trong một transaction;
+    trong mỗi bảng, việc sinh dữ liệu (CPU) và insert (I/O) chạy chồng lên nhau.
+    """
+    seed_config = config.get("seed")
+    if not seed_config:
+        progress.echo("[yellow]No 'seed' configuration found. Skipping.[/yellow]")
+        return
+
+    progress.echo("\n[bold cyan]🌱 Starting relational data seeding process (async)...[/bold cyan]")
+    if int(config.get("table_concurrency", 1)) > 1:
+        progress.echo("[yellow]   - 'table_concurrency' is ignored in async mode, tables are seeded one at a time.[/yellow]")
+
+    queue_size = int(config.get("async_queue_size", DEFAULT_QUEUE_SIZE))
+    workers = workers or config.get("workers", 1)
+    with parallel.generation_pool(workers) as executor:
+        async with db_engine.connect() as connection:
+            # Reflect và gộp quan hệ bằng engine đồng bộ bên dưới AsyncEngine, chạy trong ngữ cảnh của run_sync
+            plan = await connection.run_sync(
+                lambda sync_connection: processor.prepare_seed(config, db_engine.sync_engine)
+            )
+            if plan is None:
+                return
+            seed_config = plan.seed_config
+            run = processor.SeedRun(
+                metadata=plan.metadata, parent_tables=plan.parent_tables, deferred=plan.deferred,
+                executor=executor, seed=config.get("faker_seed"),
+            )
+            async with _bulk_load_session(connection):
+                for table_name in plan.seeding_order:
+                    try:
+                        with metrics.table_timer(table_name):
+                            await _seed_table_async(connection, table_name, seed_config[table_name], run, queue_size)
+                    except Exception as e:
+                        progress.echo(f"[bold red]❌ An error occurred with table '{table_name}': {repr(e)}[/bold red]")
+                        await connection.rollback()
+                        return
+                if run.deferred:
+                    try:
+                        await connection.run_sync(processor.fill_deferred_relations, run)
+                    except Exception as e:
+                        progress.echo(f"[bold red]❌ An error occurred while filling deferred relations: {repr(e)}[/bold red]")
+                        await connection.rollback()
+                        return
+                with metrics.phase("commit"):
+                    await connection.commit()
+
+    progress.echo("\n[bold green]🎉 All tables seeded successfully![/bold green]")
+
+
+async def _anonymize_in_batches_async(
+    db_engine: "AsyncEngine",
+    connection: "AsyncConnection",
+    table: Table,
+    columns_to_anonymize: Dict[str, Dict[str, Any]],
+    table_config: Dict[str, Any],
+    run: processor.AnonymizeRun,
+    fingerprint: str,
+    saved: Optional[Dict[str, Any]],
+    queue_size: int,
+) -> int:
+    """
+    Như processor._anonymize_in_batches, với ba giai đoạn nối bằng hàng đợi giới hạn:
+    đọc batch (database) -> sinh dữ liệu giả (thread) -> ghi và commit (database).
+    Đọc và ghi dùng chung một kết nối nên lần lượt giữ khóa; việc sinh dữ liệu chạy chồng lên cả hai.
+    """
+    table_name = table.name
+    primary_key_col = scanner.primary_key_column(table)
+    columns = list(columns_to_anonymize)
+    random_config, deterministic_config = processor.split_anonymize_columns(columns_to_anonymize)
+    start_after = saved["last_pk"] if saved else None
+    start_batch = saved["batch"] if saved else 0
+    processed = saved["processed"] if saved else 0
+
+    count_stmt = select(func.count()).select_from(table)
+    if start_after is not None:
+        count_stmt = count_stmt.where(primary_key_col > start_after)
+        progress.echo(f"   - Resuming '{table_name}' after key {start_after!r} (batch {start_batch})...")
+    total = await connection.scalar(count_stmt)
+    if not total:
+        return processed
+    batch_size = int(table_config.get("batch_size", processor.DEFAULT_BATCH_SIZE))
+    expected_batches = (total + batch_size - 1) // batch_size
+
+    progress.echo(f"   - Anonymizing {total} records in batches of {batch_size} (async)...")
+    fake_chunks = parallel.generate_chunks(
+        random_config, [batch_size] * (expected_batches if random_config else 0),
+        run.executor, seed=run.seed, stream_key=f"anonymize:{table_name}", start_index=start_batch,
+    )
+    source_columns = [primary_key_col] + [table.c[col] for col in deterministic_config]
+    lock = asyncio.Lock()
+
+    async def read_batches() -> AsyncIterator[List[Any]]:
+        last_key = start_after
+        while True:
+            async with lock:
+                with metrics.phase("read", table_name):
+                    rows = await connection.run_sync(scanner.fetch_page, table, last_key, batch_size, source_columns)
+            if not rows:
+                return
+            yield rows
+            if len(rows) < batch_size:
+                return
+            last_key = rows[-1][0]
+
+    def build(batch_rows: List[Any]):
+        with metrics.phase("generate", table_name):
+            return batch_rows, processor.build_anonymize_batch(
+                batch_rows, fake_chunks, random_config, deterministic_config, primary_key_col.name, run
+            )
+
+    staging = None
+    pipeline = _buffered(_map_in_thread(build, _buffered(read_batches(), queue_size)), queue_size)
+    try:
+        if processor.supports_update_from(db_engine.sync_engine):
+            staging = await connection.run_sync(processor.create_staging_table, table, columns)
+        with progress.task(table_name, "anonymize", total, f"Anonymizing '{table_name}'...") as advance:
+            batch_index = start_batch
+            async for batch_rows, batch in pipeline:
+                async with lock:
+                    with metrics.phase("write", table_name):
+                        await connection.run_sync(processor.apply_anonymize_batch, table, staging, batch, columns)
+                    with metrics.phase("commit", table_name):
+                        await connection.commit()
+                batch_index += 1
+                processed += len(batch)
+                metrics.count("rows", len(batch), table_name)
+                metrics.count("batches", 1, table_name)
+                if run.checkpoint:
+                    run.checkpoint.mark_batch(table_name, fingerprint, batch_rows[-1][0], batch_index, processed)
+                advance(len(batch))
+    except Exception:
+        await pipeline.aclose()
+        await connection.rollback()
+        raise
+    finally:
+        await pipeline.aclose()
+        if staging is not None:
+            await connection.run_sync(lambda sync_connection: staging.drop(sync_connection, checkfirst=True))
+            await connection.commit()
+    return processed
+
+
+def incremental_tables(config: Dict[str, Any]) -> List[str]:
+    """Các bảng cấu hình `incremental` trong mục `anonymize`: chế độ async chưa hỗ trợ ẩn danh hóa tăng dần."""
+    return [name for name, table_config in (config.get("anonymize") or {}).items() if table_config.get("incremental")]
+
+
+async def process_anonymize_async(
+    config: Dict[str, Any], db_engine: "AsyncEngine", workers: Optional[int] = None, resume: bool = False
+) -> None:
+    """process_anonymize trên một AsyncEngine (checkpoint, quy tắc SQL và cột tất định đều được hỗ trợ)."""
+    anonymize_config = config.get("anonymize")
+    if not anonymize_config:
+        progress.echo("[yellow]No 'anonymize' configuration found. Skipping.[/yellow]")
+        return
+    progress.echo("\n[bold cyan]🎭 Starting data anonymization process (async)...[/bold cyan]")
+    # Từ chối ngay từ đầu, trước khi bất kỳ bảng nào được xử lý
+    unsupported = incremental_tables(config)
+    if unsupported:
+        progress.echo(
+            f"[bold red]❌ Incremental anonymization is not supported with --async "
+            f"(tables: {', '.join(unsupported)}). Run it without --async.[/bold red]"
+        )
+        return
+    queue_size = int(config.get("async_queue_size", DEFAULT_QUEUE_SIZE))
+    workers = workers or config.get("workers", 1)
+    checkpoint = AnonymizeCheckpoint.for_engine(db_engine.sync_engine, config.get("checkpoint_dir"), resume)
+    failed = False
+    with parallel.generation_pool(workers) as executor:
+        async with db_engine.connect() as connection:
+            metadata = await connection.run_sync(lambda sync_connection: schema_cache.get_metadata(
+                db_engine.sync_engine, list(anonymize_config), schema_cache.cache_dir_from_config(config),
+            ))
+            run = processor.AnonymizeRun(
+                executor=executor,
+                seed=config.get("faker_seed"),
+                checkpoint=checkpoint,
+                hash_key=processor.anonymize_key(config),
+            )
+            for table_name, table_config in anonymize_config.items():
+                try:
+                    table = metadata.tables.get(table_name)
+                    if table is None:
+                        progress.echo(f"[bold red]❌ Error: Table '{table_name}' does not exist in the database.[/bold red]")
+                        continue
+                    with metrics.table_timer(table_name):
+                        plan = processor.plan_anonymize_table(db_engine.sync_engine, table, table_config, run)
+                        if isinstance(plan, processor.TablePlan):
+                            processed = 0
+                            if plan.columns_to_anonymize:
+                                processed = await _anonymize_in_batches_async(
+                                    db_engine, connection, table, plan.columns_to_anonymize, table_config, run,
+                                    plan.fingerprint, plan.saved, queue_size,
+                                )
+                            processed = await connection.run_sync(
+                                processor.finish_anonymize_table, table, plan, processed, run
+                            )
+                        else:
+                            processed = plan
+                    if processed:
+                        progress.echo(f"[bold green]✅ Anonymized {processed} records in '{table_name}' successfully![/bold green]")
+                except Exception as e:
+                    await connection.rollback()
+                    failed = True
+                    progress.echo(f"[bold red]❌ An error occurred with table '{table_name}': {repr(e)}[/bold red]")
+
+    if failed:
+        progress.echo("[yellow]Progress was saved. Run 'anonymize --resume' to continue where it stopped.[/yellow]")
+    else:
+        checkpoint.clear()
+
+
+def _run(operation, config: Dict[str, Any], connection_string: str, *args: Any) -> None:
+    async def main() -> None:
+        db_engine = get_async_engine(connection_string, config.get("engine"))
+        try:
+            await operation(config, db_engine, *args)
+        finally:
+            await db_engine.dispose()
+    asyncio.run(main())
+
+
+def run_seed(config: Dict[str, Any], connection_string: str, workers: Optional[int] = None) -> None:
+    """Chạy process_seed_async trong một event loop mới (dùng từ CLI hoặc từ thread worker của TUI)."""
+    _run(process_seed_async, config, connection_string, workers)
+
+
+def run_anonymize(
+    config: Dict[str, Any], connection_string: str, workers: Optional[int] = None, resume: bool = False
+) -> None:
+    _run(process_anonymize_async, config, connection_string, workers, resume)
@@ -0,0 +1,253 @@
+import contextlib
+import io
+import json
+import multiprocessing
+import platform
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import sqlalchemy
+from rich import print
+from rich.table import Table as RichTable
+from sqlalchemy import (Boolean, Column, DateTime, Float, ForeignKey, Integer,
+                        MetaData, String, Table, create_engine, engine, func,
+                        select)
+
+from db_tools.core import metrics, schema_cache
+from db_tools.core.models import Base
+from db_tools.core.processor import process_anonymize, process_seed
+
+# Các database được đo: SQLite trong bộ nhớ và SQLite trên file
+BENCH_TARGETS = ("sqlite-memory", "sqlite-file")
+# "models": users/orders trong core/models.py; "synthetic": chuỗi bảng sinh tự động
+BENCH_SCHEMAS = ("models", "synthetic")
+# Mức giảm rows/sec (tỉ lệ) được xem là hồi quy khi so sánh với kết quả cũ
+DEFAULT_TOLERANCE = 0.1
+
+
+def synthetic_metadata(tables: int = 5, columns: int = 8) -> MetaData:
+    """
+    Schema tổng hợp: `tables` bảng nối thành chuỗi t0 <- t1 <- ... (mỗi bảng có khóa ngoại tới bảng trước),
+    mỗi bảng có `columns` cột dữ liệu xen kẽ chuỗi, số nguyên và thời gian.
+    """
+    metadata = MetaData()
+    column_types = (String(255), Integer, DateTime)
+    for index in range(tables):
+        table_columns = [Column("id", Integer, primary_key=True)]
+        if index:
+            table_columns.append(Column("parent_id", Integer, ForeignKey(f"bench_t{index - 1}.id")))
+        table_columns += [Column(f"c{col}", column_types[col % 3]) for col in range(columns)]
+        Table(f"bench_t{index}", metadata, *table_columns)
+    return metadata
+
+
+def _column_spec(column: Column) -> Any:
+    if isinstance(column.type, Boolean):
+        return "pybool"
+    if isinstance(column.type, Float):
+        return {"provider": "pyfloat", "min_value": 0, "max_value": 10_000, "right_digits": 2}
+    if isinstance(column.type, Integer):
+        return {"provider": "random_int", "min": 0, "max": 1_000_000}
+    if isinstance(column.type, DateTime):
+        return {"provider": "date_time_between", "start_date": "-5y", "end_date": "now"}
+    return "name"
+
+
+def bench_config(metadata: MetaData, rows: int) -> Dict[str, Any]:
+    """Cấu hình seed và anonymize cho mọi bảng của schema, mỗi bảng `rows` dòng."""
+    seed_config: Dict[str, Any] = {}
+    anonymize_config: Dict[str, Any] = {}
+    for table in metadata.sorted_tables:
+        columns = {}
+        for column in table.columns:
+            if column.primary_key or column.foreign_keys:
+                continue
+            # Cột unique cần giá trị không trùng lặp ở mọi kích thước
+            columns[column.name] = "uuid4" if column.unique else _column_spec(column)
+        relations = {
+            column.name: {"table": next(iter(column.foreign_keys)).column.table.name}
+            for column in table.columns if column.foreign_keys
+        }
+        seed_config[table.name] = {"count": rows, "columns": columns, "relations": relations}
+        anonymize_config[table.name] = {"columns": columns}
+    return {"seed": seed_config, "anonymize": anonymize_config}
+
+
+def peak_rss_mb() -> Optional[float]:
+    """
+    RSS lớn nhất (MB) của tiến trình hiện tại và các tiến trình con đã kết thúc (worker sinh dữ liệu),
+    hoặc None nếu hệ điều hành không hỗ trợ. Đây là mức cao nhất từ khi tiến trình khởi động,
+    nên `run_benchmarks` chạy mỗi trường hợp trong một tiến trình riêng để số đo không lẫn giữa các trường hợp.
+    """
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+    # Linux trả về KB, macOS trả về byte
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _target_engine(target: str, work_dir: Path) -> engine.Engine:
+    if target == "sqlite-memory":
+        return create_engine("sqlite://")
+    if target == "sqlite-file":
+        path = work_dir / "bench.db"
+        if path.exists():
+            path.unlink()
+        return create_engine(f"sqlite:///{path}")
+    raise ValueError(f"Unknown benchmark target '{target}'. Supported targets: {', '.join(BENCH_TARGETS)}.")
+
+
+def _row_count(db_engine: engine.Engine, metadata: MetaData) -> int:
+    with db_engine.connect() as connection:
+        return sum(
+            connection.execute(select(func.count()).select_from(table)).scalar_one()
+            for table in metadata.tables.values()
+        )
+
+
+def _measure(operation: str, run, rows: int) -> Dict[str, Any]:
+    metrics.reset()
+    output = io.StringIO()
+    start = time.perf_counter()
+    # Ẩn output của seed/anonymize để không làm sai lệch phép đo
+    with contextlib.redirect_stdout(output):
+        success = run()
+    seconds = time.perf_counter() - start
+    if not success:
+        # seed/anonymize báo lỗi bằng giá trị trả về (chi tiết nằm trong output): không ghi nhận một phép đo sai
+        raise RuntimeError(f"Benchmark '{operation}' failed:\n{output.getvalue()}")
+    return {
+        "operation": operation,
+        "seconds": round(seconds, 4),
+        "rows_per_sec": round(rows / seconds, 1) if seconds else None,
+        "phases": {name: round(value, 4) for name, value in sorted(metrics.snapshot().items())},
+        "tables": metrics.report()["tables"],
+    }
+
+
+def run_case(
+    target: str, metadata: MetaData, rows: int, work_dir: Path, workers: int = 1
+) -> List[Dict[str, Any]]:
+    """Seed rồi anonymize một schema trên một database; trả về một kết quả cho mỗi thao tác."""
+    db_engine = _target_engine(target, work_dir)
+    config = {**bench_config(metadata, rows), "checkpoint_dir": str(work_dir / "checkpoints")}
+    total_rows = rows * len(metadata.tables)
+    try:
+        metadata.create_all(db_engine)
+        results = [_measure("seed", lambda: process_seed(config, db_engine, workers), total_rows)]
+        if _row_count(db_engine, metadata) != total_rows:
+            raise RuntimeError(f"Benchmark seed on '{target}' did not insert {total_rows} rows.")
+        results.append(_measure("anonymize", lambda: process_anonymize(config, db_engine, workers), total_rows))
+    finally:
+        schema_cache.clear_schema_cache(db_engine)
+        db_engine.dispose()
+    for result in results:
+        result.update(target=target, rows=total_rows)
+    return results
+
+
+def _isolated_case(
+    schema: str, target: str, rows: int, work_dir: Path, workers: int, tables: int, columns: int
+) -> List[Dict[str, Any]]:
+    """Chạy trong tiến trình con của `run_benchmarks`: một trường hợp, kèm RSS lớn nhất của tiến trình đó."""
+    metadata = Base.metadata if schema == "models" else synthetic_metadata(tables, columns)
+    results = run_case(target, metadata, rows, work_dir, workers)
+    # RSS lớn nhất của cả trường hợp (seed + anonymize), gắn vào kết quả của từng thao tác
+    peak = peak_rss_mb()
+    for result in results:
+        result["peak_rss_mb"] = peak
+    return results
+
+
+def run_benchmarks(
+    schema: str = "models",
+    rows: int = 10_000,
+    targets: Sequence[str] = BENCH_TARGETS,
+    workers: int = 1,
+    tables: int = 5,
+    columns: int = 8,
+    work_dir: Optional[Path] = None,
+) -> Dict[str, Any]:
+    """
+    Chạy bộ benchmark và trả về tài liệu kết quả (có thể ghi ra JSON).
+    Mỗi trường hợp (schema + target) chạy trong một tiến trình "spawn" mới để `peak_rss_mb` chỉ đo trường hợp đó.
+    """
+    if schema not in BENCH_SCHEMAS:
+        raise ValueError(f"Unknown benchmark schema '{schema}'. Supported schemas: {', '.join(BENCH_SCHEMAS)}.")
+    results = []
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory(prefix="db-tools-bench-") as tmp_dir:
+        for target in targets:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                case = executor.submit(
+                    _isolated_case, schema, target, rows, Path(work_dir or tmp_dir), workers, tables, columns
+                )
+                for result in case.result():
+                    results.append({"schema": schema, **result})
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlalchemy": sqlalchemy.__version__,
+        "workers": workers,
+        "results": results,
+    }
+
+
+def _case_key(result: Dict[str, Any]) -> Tuple:
+    return result["schema"], result["target"], result["operation"], result["rows"]
+
+
+def compare_results(
+    current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = DEFAULT_TOLERANCE
+) -> List[str]:
+    """Các trường hợp có rows/sec giảm quá `tolerance` so với kết quả cũ (cùng schema/target/thao tác/số dòng)."""
+    previous = {_case_key(result): result for result in baseline.get("results", [])}
+    regressions = []
+    for result in current["results"]:
+        old = previous.get(_case_key(result))
+        if not old or not old.get("rows_per_sec") or not result.get("rows_per_sec"):
+            continue
+        change = result["rows_per_sec"] / old["rows_per_sec"] - 1
+        if change < -tolerance:
+            schema, target, operation, rows = _case_key(result)
+            regressions.append(
+                f"{operation} on {target} ({schema}, {rows} rows): "
+                f"{old['rows_per_sec']:.0f} -> {result['rows_per_sec']:.0f} rows/sec ({change:+.0%})"
+            )
+    return regressions
+
+
+def write_results(document: Dict[str, Any], path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2)
+
+
+def load_results(path: Path) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def print_results(document: Dict[str, Any]) -> None:
+    table = RichTable(title="Benchmark results")
+    for header in ("Case", "Rows", "Seconds", "Rows/sec", "Gen", "Read", "Write", "Commit", "RSS MB"):
+        table.add_column(header, justify="left" if header == "Case" else "right")
+    for result in document["results"]:
+        phases = result["phases"]
+        table.add_row(
+            f"{result['operation']} {result['target']} ({result['schema']})", str(result["rows"]),
+            f"{result['seconds']:.2f}", f"{result['rows_per_sec'] or 0:.0f}",
+            *(f"{phases.get(name, 0.0):.2f}" for name in ("generate", "read", "write", "commit")),
+            str(result["peak_rss_mb"] if result["peak_rss_mb"] is not None else "-"),
+        )
+    print(table)
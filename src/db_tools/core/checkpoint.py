@@ -0,0 +1,84 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from sqlalchemy import engine
+
+# Thư mục mặc định lưu trạng thái của các job ẩn danh hóa
+DEFAULT_CHECKPOINT_DIR = ".db_tools_cache/checkpoints"
+
+
+def config_fingerprint(table_config: Dict[str, Any]) -> str:
+    """Dấu vân tay của cấu hình một bảng, để phát hiện cấu hình đã thay đổi giữa hai lần chạy."""
+    payload = json.dumps(table_config, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class AnonymizeCheckpoint:
+    """
+    Lưu tiến độ ẩn danh hóa vào một file JSON cục bộ, sau mỗi batch đã commit.
+
+    Với mỗi bảng: khóa chính cuối cùng đã xử lý, số thứ tự batch, số dòng đã xử lý
+    và trạng thái ("running" hoặc "done"). Khóa chính không phải kiểu JSON được lưu dưới dạng chuỗi.
+    """
+
+    def __init__(self, path: Path, state: Optional[Dict[str, Any]] = None) -> None:
+        self.path = path
+        self.state: Dict[str, Any] = state or {"tables": {}}
+
+    @classmethod
+    def for_engine(
+        cls, db_engine: engine.Engine, checkpoint_dir: Optional[str] = None, resume: bool = False
+    ) -> "AnonymizeCheckpoint":
+        """Mở checkpoint của database; chỉ đọc lại trạng thái cũ khi `resume` là True."""
+        url = db_engine.url.render_as_string(hide_password=False)
+        url_hash = hashlib.sha256(url.encode("utf-8")).hexdigest()[:16]
+        path = Path(checkpoint_dir or DEFAULT_CHECKPOINT_DIR) / f"anonymize-{url_hash}.json"
+        state = None
+        if resume and path.is_file():
+            with open(path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        return cls(path, state)
+
+    def table_state(self, table_name: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """Trạng thái đã lưu của bảng, hoặc None nếu không có (hay cấu hình đã thay đổi)."""
+        table_state = self.state["tables"].get(table_name)
+        if table_state is None or table_state.get("config") != fingerprint:
+            return None
+        return table_state
+
+    def mark_batch(
+        self, table_name: str, fingerprint: str, last_pk: Any, batch: int, processed: int
+    ) -> None:
+        self.state["tables"][table_name] = {
+            "config": fingerprint,
+            "status": "running",
+            "last_pk": last_pk,
+            "batch": batch,
+            "processed": processed,
+        }
+        self._save()
+
+    def mark_done(self, table_name: str, fingerprint: str, processed: int) -> None:
+        self.state["tables"][table_name] = {
+            "config": fingerprint,
+            "status": "done",
+            "processed": processed,
+        }
+        self._save()
+
+    def clear(self) -> None:
+        """Xóa checkpoint khi toàn bộ job đã hoàn tất."""
+        self.state = {"tables": {}}
+        if self.path.is_file():
+            self.path.unlink()
+
+    def _save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Ghi ra file tạm rồi đổi tên để checkpoint không bao giờ bị ghi dở dang
+        tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, default=str)
+        os.replace(tmp_path, self.path)
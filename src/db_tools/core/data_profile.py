@@ -0,0 +1,332 @@
+import json
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy import Column, Table, distinct, engine, func, select
+
+from db_tools.core import (database, faker_manager, incremental, metrics,
+                           schema_cache)
+
+# Số dòng được lấy mẫu ngẫu nhiên mỗi bảng để tính histogram và độ dài chuỗi
+DEFAULT_SAMPLE_SIZE = 10_000
+# Số giá trị phổ biến nhất được ghi lại cho mỗi cột
+DEFAULT_TOP_K = 20
+# Số khoảng của mỗi histogram
+DEFAULT_BINS = 20
+
+# Loại cột trong profile, suy ra từ kiểu Python của cột
+COLUMN_KINDS = ("boolean", "integer", "float", "datetime", "date", "string", "other")
+_HISTOGRAM_KINDS = ("integer", "float", "datetime", "date")
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def column_kind(column: Column) -> str:
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return "other"
+    # bool là lớp con của int, datetime là lớp con của date: kiểm tra trước
+    for kind, types in (
+        ("boolean", (bool,)), ("integer", (int,)), ("float", (float, Decimal)),
+        ("datetime", (datetime,)), ("date", (date,)), ("string", (str,)),
+    ):
+        if issubclass(python_type, types):
+            return kind
+    return "other"
+
+
+def _to_number(value: Any, kind: str) -> float:
+    """Giá trị số của một giá trị cột; thời gian được đổi ra số giây tính từ epoch."""
+    if kind == "datetime":
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return (value - _EPOCH).total_seconds()
+    if kind == "date":
+        return (datetime.combine(value, datetime.min.time()) - _EPOCH).total_seconds()
+    return float(value)
+
+
+def _to_json(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def histogram(values: Sequence[float], low: float, high: float, bins: int = DEFAULT_BINS) -> Dict[str, List[float]]:
+    """Histogram các khoảng đều nhau trên [low, high]; giá trị ngoài khoảng được đưa về biên."""
+    if high <= low or not values:
+        return {"edges": [low, high], "counts": [max(len(values), 1)]}
+    width = (high - low) / bins
+    counts = [0] * bins
+    for value in values:
+        counts[min(max(int((value - low) / width), 0), bins - 1)] += 1
+    return {"edges": [low + width * i for i in range(bins)] + [high], "counts": counts}
+
+
+def _random_order(dialect_name: str):
+    if dialect_name == "mysql":
+        return func.rand()
+    if dialect_name == "mssql":
+        return func.newid()
+    return func.random()
+
+
+def _sample_rows(connection, table: Table, columns: List[Column], rows: int, sample_size: int) -> List[tuple]:
+    """Mẫu ngẫu nhiên tối đa `sample_size` dòng; bảng nhỏ hơn được đọc toàn bộ."""
+    stmt = select(*columns)
+    if rows > sample_size:
+        stmt = stmt.order_by(_random_order(connection.dialect.name)).limit(sample_size)
+    return connection.execute(stmt).all()
+
+
+def _fanout(connection, table: Table, fk_column: Column, parent_table: Table) -> Dict[str, Any]:
+    """Phân phối số dòng con trên mỗi bảng cha: [[số con, số bảng cha], ...], kể cả bảng cha không có con."""
+    per_parent = (
+        select(func.count().label("children"))
+        .where(fk_column.isnot(None))
+        .group_by(fk_column)
+        .subquery()
+    )
+    pairs = connection.execute(
+        select(per_parent.c.children, func.count()).group_by(per_parent.c.children).order_by(per_parent.c.children)
+    ).all()
+    parents = connection.execute(select(func.count()).select_from(parent_table)).scalar_one()
+    fanout = [[int(children), int(count)] for children, count in pairs]
+    childless = parents - sum(count for _, count in fanout)
+    if childless > 0:
+        fanout.insert(0, [0, childless])
+    return {"parents": parents, "fanout": fanout}
+
+
+def profile_table(
+    connection,
+    table: Table,
+    sample_size: int = DEFAULT_SAMPLE_SIZE,
+    top_k: int = DEFAULT_TOP_K,
+    bins: int = DEFAULT_BINS,
+    redact: Iterable[str] = (),
+) -> Dict[str, Any]:
+    """
+    Profile thống kê của một bảng: số dòng, và cho mỗi cột tỉ lệ NULL, số giá trị khác nhau,
+    các giá trị phổ biến nhất, histogram (số, thời gian) hoặc độ dài (chuỗi), cùng fanout của các khóa ngoại.
+    Số đếm được tính chính xác bằng SQL; histogram và độ dài chuỗi được tính trên một mẫu ngẫu nhiên.
+    Cột trong `redact` (ví dụ các cột sẽ được ẩn danh hóa) không được ghi lại giá trị thật nào:
+    chỉ có loại cột, tỉ lệ NULL và số đếm, không có top, min/max, histogram hay độ dài.
+    """
+    redact = set(redact)
+    primary_keys = {col.name for col in table.primary_key.columns}
+    foreign_keys = {col.name: next(iter(col.foreign_keys)) for col in table.columns if col.foreign_keys}
+    columns = [col for col in table.columns if col.name not in primary_keys and col.name not in foreign_keys]
+    kinds = {col.name: column_kind(col) for col in columns}
+    comparable = [col for col in columns if kinds[col.name] != "other"]
+
+    # Một truy vấn cho mọi số đếm, min và max của bảng
+    aggregates = [func.count()]
+    for col in columns:
+        aggregates.append(func.count(col))
+        if kinds[col.name] != "other":
+            aggregates.append(func.count(distinct(col)))
+        if kinds[col.name] in _HISTOGRAM_KINDS and col.name not in redact:
+            aggregates += [func.min(col), func.max(col)]
+    aggregates += [func.count(table.c[name]) for name in foreign_keys]
+    values = iter(connection.execute(select(*aggregates).select_from(table)).one())
+    rows = next(values)
+
+    profiles: Dict[str, Dict[str, Any]] = {}
+    bounds = {}
+    non_null_counts = {}
+    for col in columns:
+        kind = kinds[col.name]
+        non_null = non_null_counts[col.name] = next(values)
+        profile = {
+            "kind": kind,
+            "nullable": bool(col.nullable),
+            "null_fraction": round(1 - non_null / rows, 6) if rows else 0.0,
+        }
+        if kind != "other":
+            profile["distinct"] = next(values)
+            profile["unique"] = bool(non_null) and profile["distinct"] == non_null
+        if col.name in redact:
+            profile["redacted"] = True
+        elif kind in _HISTOGRAM_KINDS:
+            low, high = next(values), next(values)
+            if low is not None:
+                bounds[col.name] = (_to_number(low, kind), _to_number(high, kind))
+        profiles[col.name] = profile
+    fk_non_null = {name: next(values) for name in foreign_keys}
+
+    for col in comparable:
+        profile = profiles[col.name]
+        if col.name in redact or profile["unique"] or not profile["distinct"]:
+            continue
+        top = connection.execute(
+            select(col, func.count().label("n")).where(col.isnot(None))
+            .group_by(col).order_by(func.count().desc()).limit(top_k)
+        ).all()
+        profile["top"] = [[_to_json(value), round(n / non_null_counts[col.name], 6)] for value, n in top]
+
+    sample_columns = [
+        col for col in comparable
+        if col.name not in redact
+        and (col.name in bounds or (kinds[col.name] == "string" and profiles[col.name]["distinct"]))
+    ]
+    if rows and sample_columns:
+        with metrics.phase("read", table.name):
+            sample = _sample_rows(connection, table, sample_columns, rows, sample_size)
+        for index, col in enumerate(sample_columns):
+            kind = kinds[col.name]
+            column_values = [row[index] for row in sample if row[index] is not None]
+            if kind == "string":
+                lengths = [len(value) for value in column_values]
+                if lengths:
+                    profiles[col.name]["length"] = {"min": min(lengths), "max": max(lengths)}
+                continue
+            low, high = bounds[col.name]
+            profiles[col.name]["histogram"] = histogram(
+                [_to_number(value, kind) for value in column_values], low, high, bins
+            )
+
+    relations = {}
+    for name, foreign_key in foreign_keys.items():
+        relation = {
+            "table": foreign_key.column.table.name,
+            "column": foreign_key.column.name,
+            "null_fraction": round(1 - fk_non_null[name] / rows, 6) if rows else 0.0,
+        }
+        relation.update(_fanout(connection, table, table.c[name], foreign_key.column.table))
+        relations[name] = relation
+    return {"rows": rows, "columns": profiles, "relations": relations}
+
+
+def build_profile(
+    db_engine: engine.Engine,
+    tables: Optional[Sequence[str]] = None,
+    sample_size: int = DEFAULT_SAMPLE_SIZE,
+    top_k: int = DEFAULT_TOP_K,
+    bins: int = DEFAULT_BINS,
+    redact: Optional[Dict[str, Iterable[str]]] = None,
+) -> Dict[str, Any]:
+    """
+    Profile của các bảng trong database (mặc định là tất cả).
+    `redact` là {bảng: các cột} không được ghi lại giá trị thật.
+    """
+    table_names = list(tables) if tables else [
+        name for name in database.list_table_names(db_engine) if name not in incremental.INTERNAL_TABLES
+    ]
+    metadata = schema_cache.get_metadata(db_engine, table_names)
+    missing = [name for name in table_names if name not in metadata.tables]
+    if missing:
+        raise ValueError(f"Table(s) not found: {', '.join(missing)}")
+    profiles = {}
+    with db_engine.connect() as connection:
+        for table_name in table_names:
+            with metrics.table_timer(table_name):
+                profiles[table_name] = profile_table(
+                    connection, metadata.tables[table_name], sample_size, top_k, bins,
+                    (redact or {}).get(table_name, ()),
+                )
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "dialect": db_engine.dialect.name,
+        "sample_size": sample_size,
+        "top_k": top_k,
+        "tables": profiles,
+    }
+
+
+def write_profile(document: Dict[str, Any], path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2)
+
+
+def load_profile(path: Path) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _string_spec(profile: Dict[str, Any]) -> Dict[str, Any]:
+    length = profile.get("length", {"min": 8, "max": 20})
+    if profile.get("unique") and length["max"] >= 36:
+        return {"provider": "uuid4"}
+    # Chuỗi unique cần đủ dài để gần như không trùng
+    min_chars = max(length["min"], 12) if profile.get("unique") else length["min"]
+    return {"provider": "pystr", "min_chars": min_chars, "max_chars": max(length["max"], min_chars)}
+
+
+def column_spec(profile: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Cấu hình cột (theo định dạng của `seed.<bảng>.columns`) sinh dữ liệu khớp với profile của cột.
+    None nếu cột luôn NULL hoặc có kiểu không hỗ trợ.
+    """
+    kind = profile["kind"]
+    if kind == "other" or profile["null_fraction"] >= 1:
+        return None
+    top = profile.get("top") or []
+    if kind == "boolean":
+        truth = next((share for value, share in top if value), 0.0)
+        spec: Dict[str, Any] = {"provider": "pybool", "truth_probability": round(truth * 100)}
+    elif top and kind not in ("datetime", "date") and len(top) == profile.get("distinct"):
+        # Mọi giá trị khác nhau đều nằm trong top: lấy mẫu đúng theo tần suất
+        spec = {"provider": "random_element", "elements": {value: share for value, share in top}}
+    elif kind in _HISTOGRAM_KINDS and "histogram" in profile:
+        spec = {"provider": "histogram", "kind": kind, **profile["histogram"]}
+    elif kind == "string":
+        spec = _string_spec(profile)
+    else:
+        return None
+    if profile["null_fraction"] > 0:
+        spec["null_fraction"] = profile["null_fraction"]
+    return spec
+
+
+def seed_config_from_profile(
+    document: Dict[str, Any], scale: float = 1.0, seed_config: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Cấu hình `seed` sinh dữ liệu khớp với profile, với số dòng bằng số dòng trong profile nhân `scale`.
+    Cột và quan hệ đã có trong `seed_config` được giữ nguyên (ví dụ provider Faker cho dữ liệu cá nhân);
+    khóa ngoại mặc định theo phân phối fanout đã đo (trừ khóa ngoại tự tham chiếu, được để NULL).
+    """
+    if scale <= 0:
+        raise ValueError("'scale' must be greater than 0.")
+    seed_config = seed_config or {}
+    result = {}
+    for table_name, table_profile in document["tables"].items():
+        overrides = seed_config.get(table_name, {})
+        rows = table_profile["rows"]
+        columns = {}
+        for name, profile in table_profile["columns"].items():
+            if name in overrides.get("columns", {}):
+                spec = faker_manager.parse_column_spec(overrides["columns"][name])
+                if profile["null_fraction"] > 0:
+                    spec.setdefault("null_fraction", profile["null_fraction"])
+                columns[name] = spec
+                continue
+            spec = column_spec(profile)
+            if spec is not None:
+                columns[name] = spec
+        relations = {}
+        for name, relation in table_profile["relations"].items():
+            if name in overrides.get("relations", {}):
+                relations[name] = overrides["relations"][name]
+            elif relation["table"] != table_name and any(children for children, _ in relation["fanout"]):
+                relations[name] = {
+                    "table": relation["table"],
+                    "distribution": "fanout",
+                    "fanout": relation["fanout"],
+                    "null_fraction": relation["null_fraction"],
+                }
+        table_config = {key: value for key, value in overrides.items() if key not in ("columns", "relations")}
+        table_config.update(
+            count=max(1, round(rows * scale)) if rows else 0,
+            columns=columns,
+            relations=relations,
+        )
+        result[table_name] = table_config
+    return result
@@ -1,20 +1,57 @@
+import json
+import threading
 from typing import Any, Dict, List, Optional, Tuple
 
 from rich import print
-# --- THAY ĐỔI: Thêm MetaData, Table, func vào đây ---
-from sqlalchemy import (MetaData, Table, create_engine, engine, func, inspect,
-                        select)
+from sqlalchemy import Table, create_engine, engine, func, inspect, select
+from sqlalchemy.exc import NoSuchTableError
 
+from db_tools.core import scanner, schema_cache
 
-def get_engine(connection_string: str) -> Optional[engine.Engine]:
-    """Tạo một SQLAlchemy engine từ chuỗi kết nối."""
-    try:
-        engine = create_engine(connection_string)
-        connection = engine.connect()
-        connection.close()
+
+# Registry engine dùng chung cho cả tiến trình, theo chuỗi kết nối và tùy chọn pool
+_engines: Dict[Tuple[str, str], engine.Engine] = {}
+_engines_lock = threading.Lock()
+
+# Các tùy chọn trong mục `engine:` của db_tools.yml được truyền thẳng cho create_engine
+ENGINE_OPTION_KEYS = ("pool_size", "max_overflow", "pool_timeout", "pool_recycle", "pool_pre_ping")
+
+
+def get_engine(
+    connection_string: str, engine_options: Optional[Dict[str, Any]] = None
+) -> Optional[engine.Engine]:
+    """
+    Lấy SQLAlchemy engine cho chuỗi kết nối từ registry, tạo mới nếu chưa có.
+    Các lần gọi sau dùng lại engine (và connection pool) đã tạo, không kết nối thử lại.
+
+    Args:
+        connection_string: Chuỗi kết nối tới database.
+        engine_options: Mục `engine:` trong db_tools.yml (pool_size, max_overflow,
+                        pool_timeout, pool_recycle, pool_pre_ping).
+    """
+    options = {
+        key: value for key, value in (engine_options or {}).items() if key in ENGINE_OPTION_KEYS
+    }
+    key = (connection_string, json.dumps(options, sort_keys=True))
+    with _engines_lock:
+        if key in _engines:
+            return _engines[key]
+        try:
+            engine = create_engine(connection_string, **options)
+            connection = engine.connect()
+            connection.close()
+        except Exception as e:
+            raise ConnectionError(e)
+        _engines[key] = engine
         return engine
-    except Exception as e:
-        raise ConnectionError(e)
+
+
+def dispose_engines() -> None:
+    """Đóng toàn bộ connection pool và xóa registry."""
+    with _engines_lock:
+        for db_engine in _engines.values():
+            db_engine.dispose()
+        _engines.clear()
 
 
 def ping_database(db_engine: engine.Engine) -> str:
@@ -24,21 +61,37 @@ def ping_database(db_engine: engine.Engine) -> str:
     return db_engine.dialect.name
 
 
+def list_table_names(db_engine: engine.Engine) -> List[str]:
+    """Chỉ lấy tên các bảng (một truy vấn, không reflect cột), để hiển thị nhanh với database lớn."""
+    return inspect(db_engine).get_table_names()
+
+
+def get_table_columns(db_engine: engine.Engine, table_name: str) -> List[str]:
+    """Tên các cột của một bảng; bảng chỉ được reflect lần đầu rồi giữ trong schema cache."""
+    return [col.name for col in _get_table(db_engine, table_name).columns]
+
+
 def inspect_db_schema(db_engine: engine.Engine) -> Dict[str, Any]:
-    """Sử dụng Inspector để lấy cấu trúc của database."""
-    inspector = inspect(db_engine)
+    """Lấy cấu trúc của database (reflect một lần, dùng chung qua schema cache)."""
+    metadata = schema_cache.get_metadata(db_engine)
     schema = {}
-    table_names = inspector.get_table_names()
-    for table_name in table_names:
-        columns = inspector.get_columns(table_name)
-        schema[table_name] = [col['name'] for col in columns]
+    for table_name in inspect(db_engine).get_table_names():
+        table = metadata.tables.get(table_name)
+        if table is not None:
+            schema[table_name] = [col.name for col in table.columns]
     return schema
 
 
+def _get_table(db_engine: engine.Engine, table_name: str) -> Table:
+    table = schema_cache.get_table(db_engine, table_name)
+    if table is None:
+        raise NoSuchTableError(table_name)
+    return table
+
+
 def get_table_row_count(db_engine: engine.Engine, table_name: str) -> int:
     """Đếm số lượng dòng trong một bảng cụ thể."""
-    metadata = MetaData()
-    table = Table(table_name, metadata, autoload_with=db_engine)
+    table = _get_table(db_engine, table_name)
     
     with db_engine.connect() as connection:
         stmt = select(func.count()).select_from(table)
@@ -46,16 +99,33 @@ def get_table_row_count(db_engine: engine.Engine, table_name: str) -> int:
         return row_count
 
 
+def get_table_preview_page(
+    db_engine: engine.Engine, table_name: str, after: Any = None, limit: int = 20
+) -> Tuple[List[str], List[tuple], Any]:
+    """
+    Lấy một trang dữ liệu của bảng theo keyset trên khóa chính.
+
+    Returns:
+        (tên các cột, các dòng, khóa của dòng cuối) — truyền khóa này vào `after`
+        để lấy trang tiếp theo; None nếu không còn trang nào (hoặc bảng không có khóa chính).
+    """
+    table = _get_table(db_engine, table_name)
+    primary_key_col = scanner.primary_key_column(table)
+
+    with db_engine.connect() as connection:
+        if primary_key_col is None:
+            # Không có khóa chính: chỉ xem được trang đầu tiên
+            result = connection.execute(select(table).limit(limit))
+            return list(result.keys()), result.fetchall(), None
+        rows = scanner.fetch_page(connection, table, after, limit)
+        column_names = [col.name for col in table.columns]
+        last_key = rows[-1]._mapping[primary_key_col.name] if len(rows) == limit else None
+        return column_names, rows, last_key
+
+
 def get_table_preview_data(
     db_engine: engine.Engine, table_name: str, limit: int = 20
 ) -> Tuple[List[str], List[tuple]]:
     """Lấy một vài dòng dữ liệu đầu tiên từ bảng để xem trước."""
-    metadata = MetaData()
-    table = Table(table_name, metadata, autoload_with=db_engine)
-    
-    with db_engine.connect() as connection:
-        stmt = select(table).limit(limit)
-        result = connection.execute(stmt)
-        column_names = list(result.keys())
-        rows = result.fetchall()
-        return column_names, rows
\ No newline at end of file
+    column_names, rows, _ = get_table_preview_page(db_engine, table_name, limit=limit)
+    return column_names, rows
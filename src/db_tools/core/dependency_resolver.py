@@ -1,15 +1,73 @@
-from typing import Dict, List
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
 
-def get_seeding_order(seed_config: Dict) -> List[str]:
+# Một cạnh phụ thuộc: (bảng con, cột khóa ngoại, bảng cha)
+Edge = Tuple[str, str, str]
+
+
+class CyclicDependencyError(ValueError):
+    """Các bảng phụ thuộc vòng tròn vào nhau; `edges` là các cạnh tạo thành chu trình."""
+
+    def __init__(self, edges: List[Edge]) -> None:
+        self.edges = edges
+        path = ", ".join(f"{table}.{column} -> {parent}" for table, column, parent in edges)
+        super().__init__(
+            f"A cyclic dependency was detected in the seed configuration: {path}. Please check your 'relations'."
+        )
+
+
+def _edges(seed_config: Dict) -> List[Edge]:
+    return [
+        (table_name, fk_col, rel_info.get("table"))
+        for table_name, table_config in seed_config.items()
+        for fk_col, rel_info in table_config.get("relations", {}).items()
+        if rel_info.get("table") in seed_config
+    ]
+
+
+def _find_cycle(seed_config: Dict, remaining: Set[str]) -> List[Edge]:
+    """Tìm một chu trình trong các bảng còn lại sau khi sắp xếp Topo (mỗi bảng còn lại đều có ít nhất một bảng cha còn lại)."""
+    outgoing: Dict[str, List[Edge]] = {}
+    for edge in _edges(seed_config):
+        if edge[0] in remaining and edge[2] in remaining:
+            outgoing.setdefault(edge[0], []).append(edge)
+    # Đi theo cạnh tới bảng cha cho tới khi gặp lại một bảng đã đi qua
+    path: List[Edge] = []
+    seen: Dict[str, int] = {}
+    table = min(remaining)
+    while table not in seen:
+        seen[table] = len(path)
+        edge = outgoing[table][0]
+        path.append(edge)
+        table = edge[2]
+    return path[seen[table]:]
+
+
+def get_table_dependencies(seed_config: Dict) -> Dict[str, Set[str]]:
     """
-    Sử dụng thuật toán sắp xếp Topo (biến thể của Kahn's algorithm)
-    để xác định thứ tự seed đúng từ file config.
+    Trả về tập các bảng cha (trong cùng cấu hình seed) mà mỗi bảng phụ thuộc vào.
+    Ví dụ: {'users': set(), 'orders': {'users'}}
+    """
+    dependencies: Dict[str, Set[str]] = {table: set() for table in seed_config}
+    for table_name, table_config in seed_config.items():
+        relations = table_config.get("relations", {})
+        for fk_col, rel_info in relations.items():
+            parent_table = rel_info.get("table")
+            if parent_table in dependencies:
+                dependencies[table_name].add(parent_table)
+    return dependencies
+
+
+def get_seeding_levels(seed_config: Dict) -> List[List[str]]:
+    """
+    Sắp xếp Topo theo từng tầng (Kahn's algorithm theo "thế hệ").
+    Các bảng trong cùng một tầng không phụ thuộc lẫn nhau nên có thể seed song song;
+    mọi bảng cha của một bảng đều nằm ở các tầng trước nó.
     """
     # 1. Xây dựng đồ thị phụ thuộc
     # a. Adjacency list: Ai phụ thuộc vào mình
     # Ví dụ: adj['users'] = ['orders'] (orders phụ thuộc vào users)
     adj: Dict[str, List[str]] = {table: [] for table in seed_config}
-    
+
     # b. In-degree: Mình đang phụ thuộc vào bao nhiêu thằng
     # Ví dụ: in_degree['users'] = 0, in_degree['orders'] = 1
     in_degree: Dict[str, int] = {table: 0 for table in seed_config}
@@ -22,25 +80,123 @@ def get_seeding_order(seed_config: Dict) -> List[str]:
                 adj[parent_table].append(table_name)
                 in_degree[table_name] += 1
 
-    # 2. Tìm các node có in-degree = 0 (các bảng không phụ thuộc vào ai)
-    queue = [table for table, degree in in_degree.items() if degree == 0]
-    
-    # 3. Bắt đầu sắp xếp
-    sorted_order = []
-    while queue:
-        current_table = queue.pop(0)
-        sorted_order.append(current_table)
-
-        # Giảm in-degree của các bảng phụ thuộc vào nó
-        for dependent_table in adj.get(current_table, []):
-            in_degree[dependent_table] -= 1
-            # Nếu một bảng hết phụ thuộc, cho nó vào hàng đợi
-            if in_degree[dependent_table] == 0:
-                queue.append(dependent_table)
+    # 2. Tầng đầu tiên: các node có in-degree = 0 (các bảng không phụ thuộc vào ai)
+    current_level = [table for table, degree in in_degree.items() if degree == 0]
+
+    # 3. Bắt đầu sắp xếp, mỗi vòng lặp tạo ra một tầng
+    levels: List[List[str]] = []
+    while current_level:
+        levels.append(current_level)
+        next_level = []
+        for current_table in current_level:
+            # Giảm in-degree của các bảng phụ thuộc vào nó
+            for dependent_table in adj.get(current_table, []):
+                in_degree[dependent_table] -= 1
+                # Nếu một bảng hết phụ thuộc, nó thuộc tầng tiếp theo
+                if in_degree[dependent_table] == 0:
+                    next_level.append(dependent_table)
+        current_level = next_level
 
     # 4. Kiểm tra chu trình (cycle)
     # Nếu đồ thị có chu trình (A -> B -> A), không thể sắp xếp được
-    if len(sorted_order) != len(seed_config):
-        raise ValueError("A cyclic dependency was detected in the seed configuration. Please check your 'relations'.")
+    if sum(len(level) for level in levels) != len(seed_config):
+        sorted_tables = {table for level in levels for table in level}
+        raise CyclicDependencyError(_find_cycle(seed_config, set(seed_config) - sorted_tables))
+
+    return levels
 
-    return sorted_order
\ No newline at end of file
+
+def get_seeding_order(seed_config: Dict) -> List[str]:
+    """
+    Sử dụng thuật toán sắp xếp Topo (biến thể của Kahn's algorithm)
+    để xác định thứ tự seed đúng từ file config.
+    """
+    return [table for level in get_seeding_levels(seed_config) for table in level]
+
+
+def relations_from_metadata(metadata, table_names: Optional[Iterable[str]] = None) -> Dict[str, Dict]:
+    """
+    Dựng cấu hình quan hệ cùng dạng với mục `seed` từ các khóa ngoại đã reflect:
+    {'orders': {'relations': {'user_id': {'table': 'users', 'column': 'id'}}}}.
+    Chỉ khóa ngoại một cột tới các bảng trong `table_names` (mặc định: mọi bảng của metadata) được lấy.
+    """
+    names = set(table_names) if table_names is not None else set(metadata.tables)
+    graph: Dict[str, Dict] = {}
+    for table_name in sorted(names):
+        table = metadata.tables.get(table_name)
+        if table is None:
+            continue
+        relations = {}
+        for constraint in table.foreign_key_constraints:
+            if len(constraint.elements) != 1:
+                continue
+            element = constraint.elements[0]
+            parent = element.column.table.name
+            if parent in names:
+                relations[element.parent.name] = {"table": parent, "column": element.column.name}
+        graph[table_name] = {"relations": relations}
+    return graph
+
+
+def merge_relations(seed_config: Dict, discovered: Dict) -> Dict:
+    """
+    Gộp các quan hệ phát hiện từ khóa ngoại (`discovered`, dạng của relations_from_metadata) vào cấu hình seed.
+    Cấu hình được ưu tiên: quan hệ khai báo trong `relations` giữ nguyên, `relations: {cột: false}` tắt một quan hệ,
+    và cột đã có generator trong `columns` không bị gán quan hệ.
+    """
+    merged = {}
+    for table_name, table_config in seed_config.items():
+        declared = table_config.get("relations") or {}
+        columns = table_config.get("columns") or {}
+        relations = {
+            fk_col: dict(rel_info)
+            for fk_col, rel_info in discovered.get(table_name, {}).get("relations", {}).items()
+            if fk_col not in declared and fk_col not in columns
+        }
+        relations.update({fk_col: rel_info for fk_col, rel_info in declared.items() if rel_info})
+        merged[table_name] = {**table_config, "relations": relations}
+    return merged
+
+
+def without_relations(seed_config: Dict, edges: Iterable[Tuple[str, str]]) -> Dict:
+    """Bản sao của cấu hình seed không có các quan hệ (bảng, cột) cho trước."""
+    excluded = set(edges)
+    return {
+        table_name: {
+            **table_config,
+            "relations": {
+                fk_col: rel_info for fk_col, rel_info in table_config.get("relations", {}).items()
+                if (table_name, fk_col) not in excluded
+            },
+        }
+        for table_name, table_config in seed_config.items()
+    }
+
+
+def get_seeding_plan(
+    seed_config: Dict, is_nullable: Optional[Callable[[str, str], bool]] = None
+) -> Tuple[List[List[str]], List[Tuple[str, str]]]:
+    """
+    Thứ tự seed theo tầng, cùng các quan hệ được hoãn (bảng, cột): cột khóa ngoại được để NULL khi insert
+    và được gán ở lượt thứ hai, sau khi mọi bảng đã seed xong.
+
+    Quan hệ trỏ về chính bảng luôn được hoãn. Với chu trình giữa nhiều bảng, một cạnh có cột khóa ngoại
+    cho phép NULL (`is_nullable`) được hoãn để phá chu trình; nếu không có cạnh nào như vậy thì
+    CyclicDependencyError được ném ra kèm các cạnh của chu trình.
+    """
+    is_nullable = is_nullable or (lambda table, column: False)
+    deferred = [(table, column) for table, column, parent in _edges(seed_config) if table == parent]
+    for table, column in deferred:
+        if not is_nullable(table, column):
+            raise ValueError(
+                f"Self-referencing relation {table}.{column} needs a nullable column "
+                f"so it can be filled in a second pass."
+            )
+    while True:
+        try:
+            return get_seeding_levels(without_relations(seed_config, deferred)), deferred
+        except CyclicDependencyError as e:
+            breakable = [(table, column) for table, column, _ in e.edges if is_nullable(table, column)]
+            if not breakable:
+                raise
+            deferred.append(breakable[0])
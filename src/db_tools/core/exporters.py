@@ -0,0 +1,303 @@
+import csv
+import gzip
+import json
+from datetime import date, datetime, time, timezone
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import (JSON, Column, String, Table, func, insert, literal,
+                        select)
+from sqlalchemy.engine import Dialect
+
+from db_tools.core import scanner
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow là tùy chọn, chỉ cần cho định dạng Parquet
+    pa = pq = None
+
+# Các định dạng file khi seed ra file (`seed --output`)
+EXPORT_FORMATS = ("csv", "parquet", "sql")
+# File mô tả thư mục xuất: định dạng, dialect và danh sách bảng theo thứ tự phụ thuộc
+MANIFEST_NAME = "manifest.json"
+# Giá trị NULL trong file CSV (giống định dạng text của COPY), để phân biệt với chuỗi rỗng
+CSV_NULL = "\\N"
+
+_SUFFIXES = {"csv": ".csv.gz", "parquet": ".parquet", "sql": ".sql"}
+
+
+def _python_type(column: Column) -> Optional[type]:
+    try:
+        return column.type.python_type
+    except NotImplementedError:
+        return None
+
+
+def is_json_column(column: Column) -> bool:
+    """Cột JSON (kể cả JSONB): giá trị dict/list được ghi ra file dưới dạng văn bản JSON."""
+    return isinstance(column.type, JSON)
+
+
+def _json_text(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False)
+
+
+def _csv_text(value: Any) -> str:
+    if value is None:
+        return CSV_NULL
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    if isinstance(value, bytes):
+        # Dạng hex của bytea trong PostgreSQL
+        return "\\x" + value.hex()
+    if isinstance(value, (dict, list)):
+        return _json_text(value)
+    return str(value)
+
+
+def parse_csv_value(value: str, column: Column) -> Any:
+    """Chuyển một ô CSV về kiểu Python của cột (ngược lại với cách ghi của CsvTableFile)."""
+    if value == CSV_NULL:
+        return None
+    if is_json_column(column):
+        return json.loads(value)
+    python_type = _python_type(column)
+    if python_type is bool:
+        return value.lower() in ("true", "t", "1", "yes")
+    if python_type is int:
+        return int(value)
+    if python_type is float:
+        return float(value)
+    if python_type is Decimal:
+        return Decimal(value)
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    if python_type is time:
+        return time.fromisoformat(value)
+    if python_type is bytes and value.startswith("\\x"):
+        return bytes.fromhex(value[2:])
+    return value
+
+
+class CsvTableFile:
+    """CSV nén gzip, có dòng tiêu đề; NULL được ghi là \\N."""
+
+    def __init__(self, path: Path, table: Table, dialect: Dialect) -> None:
+        self._file = gzip.open(path, "wt", encoding="utf-8", newline="")
+        self._writer = csv.writer(self._file)
+        self._columns: Optional[List[str]] = None
+
+    def write(self, rows: List[Dict[str, Any]]) -> None:
+        if self._columns is None:
+            self._columns = list(rows[0])
+            self._writer.writerow(self._columns)
+        self._writer.writerows([_csv_text(row.get(col)) for col in self._columns] for row in rows)
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def _arrow_type(column: Column):
+    python_type = _python_type(column)
+    if python_type is bool:
+        return pa.bool_()
+    if python_type is int:
+        return pa.int64()
+    if python_type in (float, Decimal):
+        return pa.float64()
+    if python_type is datetime:
+        return pa.timestamp("us")
+    if python_type is date:
+        return pa.date32()
+    if python_type is bytes:
+        return pa.binary()
+    return pa.string()
+
+
+class ParquetTableFile:
+    """Parquet (qua pyarrow); mỗi chunk là một row group, schema lấy từ kiểu của các cột."""
+
+    def __init__(self, path: Path, table: Table, dialect: Dialect) -> None:
+        if pq is None:
+            raise RuntimeError("The Parquet format needs the 'pyarrow' package.")
+        self._path = path
+        self._table = table
+        self._writer = None
+
+    def write(self, rows: List[Dict[str, Any]]) -> None:
+        if self._writer is None:
+            schema = pa.schema([(name, _arrow_type(self._table.c[name])) for name in rows[0]])
+            self._writer = pq.ParquetWriter(str(self._path), schema, compression="zstd")
+        columns = {name: [row.get(name) for row in rows] for name in self._writer.schema.names}
+        for name, values in columns.items():
+            if is_json_column(self._table.c[name]):
+                # Parquet không có kiểu JSON: lưu dưới dạng chuỗi JSON, `load` đọc lại thành dict/list
+                columns[name] = [None if value is None else _json_text(value) for value in values]
+        self._writer.write_table(pa.Table.from_pydict(columns, schema=self._writer.schema))
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+
+
+def identity_insert_sql(table: Table, dialect: Dialect, enabled: bool) -> str:
+    table_ref = dialect.identifier_preparer.format_table(table)
+    return f"SET IDENTITY_INSERT {table_ref} {'ON' if enabled else 'OFF'}"
+
+
+def reset_sequence_sql(table: Table, dialect: Dialect) -> Optional[str]:
+    """
+    Câu lệnh đưa sequence của khóa chính về giá trị lớn nhất sau khi nạp dòng có sẵn khóa chính (PostgreSQL),
+    để các lần INSERT sau không bị trùng khóa. None với các dialect khác.
+    """
+    primary_key_col = scanner.primary_key_column(table)
+    if dialect.name != "postgresql" or primary_key_col is None:
+        return None
+    preparer = dialect.identifier_preparer
+    table_ref = preparer.format_table(table)
+    column_ref = preparer.quote(primary_key_col.name)
+    return (
+        f"SELECT setval(pg_get_serial_sequence('{table_ref}', '{primary_key_col.name}'), "
+        f"(SELECT max({column_ref}) FROM {table_ref})) "
+        f"WHERE pg_get_serial_sequence('{table_ref}', '{primary_key_col.name}') IS NOT NULL"
+    )
+
+
+class SqlTableFile:
+    """
+    File SQL cho dialect của database: mỗi chunk là một câu INSERT nhiều dòng với giá trị literal.
+    Mỗi câu lệnh bắt đầu ở đầu dòng và kết thúc bằng ';' ở cuối dòng, để chạy được bằng psql/mysql/sqlite3
+    hoặc `db-tools load`.
+    """
+
+    def __init__(self, path: Path, table: Table, dialect: Dialect) -> None:
+        self._file = open(path, "w", encoding="utf-8")
+        self._table = table
+        # Với paramstyle "named", ký tự % trong chuỗi literal không bị nhân đôi (psycopg2/mysqlclient dùng pyformat)
+        self._dialect = type(dialect)(paramstyle="named")
+        self._identity = False
+
+    def _statement(self, sql: str) -> None:
+        self._file.write(sql)
+        self._file.write(";\n")
+
+    def write(self, rows: List[Dict[str, Any]]) -> None:
+        primary_key_col = scanner.primary_key_column(self._table)
+        if self._dialect.name == "mssql" and not self._identity and primary_key_col is not None \
+                and primary_key_col.name in rows[0]:
+            self._identity = True
+            self._statement(identity_insert_sql(self._table, self._dialect, True))
+        json_columns = [name for name in rows[0] if is_json_column(self._table.c[name])]
+        if json_columns:
+            # Kiểu JSON không có literal: ghi văn bản JSON dưới dạng chuỗi, database tự chuyển khi INSERT
+            rows = [
+                {**row, **{name: literal(_json_text(row[name]), String()) for name in json_columns if row[name] is not None}}
+                for row in rows
+            ]
+        stmt = insert(self._table).values(rows)
+        self._statement(str(stmt.compile(dialect=self._dialect, compile_kwargs={"literal_binds": True})))
+
+    def close(self) -> None:
+        if self._identity:
+            self._statement(identity_insert_sql(self._table, self._dialect, False))
+        reset = reset_sequence_sql(self._table, self._dialect)
+        if reset is not None:
+            self._statement(reset)
+        self._file.close()
+
+
+_TABLE_FILES = {"csv": CsvTableFile, "parquet": ParquetTableFile, "sql": SqlTableFile}
+
+
+class SeedExport:
+    """
+    Đích ghi của `seed --output`: thay cho writer của database, mỗi bảng được stream ra một file.
+
+    `write` có cùng chữ ký với các writer trong core/writers.py nên dùng lại được toàn bộ pipeline seed
+    (resolver, sinh dữ liệu, chọn khóa ngoại). Khóa chính nguyên được cấp tuần tự, tiếp theo giá trị lớn nhất
+    đang có trong database, để bảng con tham chiếu đúng và file nạp được vào chính database đó.
+    """
+
+    def __init__(self, directory: Path, fmt: str, dialect: Dialect) -> None:
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown output format '{fmt}'. Supported formats: {', '.join(EXPORT_FORMATS)}.")
+        if fmt == "parquet" and pq is None:
+            raise RuntimeError("The Parquet format needs the 'pyarrow' package.")
+        self.directory = Path(directory)
+        self.format = fmt
+        self.dialect = dialect
+        self._files: Dict[str, Any] = {}
+        self._entries: List[Dict[str, Any]] = []
+        self._next_pk: Dict[str, int] = {}
+
+    def _assign_pks(self, connection, table: Table, rows: List[Dict[str, Any]]) -> None:
+        primary_key_col = scanner.primary_key_column(table)
+        if primary_key_col is None or primary_key_col.name in rows[0]:
+            return
+        if _python_type(primary_key_col) is not int:
+            raise ValueError(
+                f"Table '{table.name}' needs an integer primary key (or a generated "
+                f"'{primary_key_col.name}' column) to be seeded to files."
+            )
+        next_pk = self._next_pk.get(table.name)
+        if next_pk is None:
+            next_pk = (connection.execute(select(func.max(primary_key_col))).scalar() or 0) + 1
+        for offset, row in enumerate(rows):
+            row[primary_key_col.name] = next_pk + offset
+        self._next_pk[table.name] = next_pk + len(rows)
+
+    def _file_for(self, table: Table):
+        table_file = self._files.get(table.name)
+        if table_file is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            # Tiền tố số thứ tự giữ đúng thứ tự phụ thuộc khi liệt kê thư mục
+            name = f"{len(self._entries) + 1:03d}_{table.name}{_SUFFIXES[self.format]}"
+            table_file = self._files[table.name] = _TABLE_FILES[self.format](self.directory / name, table, self.dialect)
+            self._entries.append({"table": table.name, "file": name, "rows": 0})
+        return table_file
+
+    def write(self, connection, table: Table, rows: List[Dict[str, Any]], return_pks: bool) -> Optional[List[Any]]:
+        if not rows:
+            return [] if return_pks else None
+        self._assign_pks(connection, table, rows)
+        self._file_for(table).write(rows)
+        entry = next(entry for entry in self._entries if entry["table"] == table.name)
+        entry["rows"] += len(rows)
+        entry.setdefault("columns", list(rows[0]))
+        if not return_pks:
+            return None
+        primary_key_col = scanner.primary_key_column(table)
+        return [row[primary_key_col.name] for row in rows]
+
+    def close(self, write_manifest: bool = True) -> None:
+        """Đóng các file; manifest chỉ được ghi khi seed thành công."""
+        for table_file in self._files.values():
+            table_file.close()
+        self._files.clear()
+        if not write_manifest:
+            return
+        manifest = {
+            "format": self.format,
+            "dialect": self.dialect.name,
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "tables": self._entries,
+        }
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.directory / MANIFEST_NAME, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+
+    @property
+    def tables(self) -> List[Dict[str, Any]]:
+        return list(self._entries)
+
+
+def load_manifest(directory: Path) -> Dict[str, Any]:
+    path = Path(directory) / MANIFEST_NAME
+    if not path.is_file():
+        raise FileNotFoundError(f"No {MANIFEST_NAME} found in '{directory}'.")
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
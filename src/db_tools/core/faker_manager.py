@@ -1,40 +1,486 @@
 # src/db_tools/core/faker_manager.py
 
-from typing import Any, Dict, List
+import hashlib
+import hmac
+import json
+import math
+import os
+import pickle
+import re
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Union
 from faker import Faker
-from rich import print
 
-# Khởi tạo một đối tượng Faker duy nhất để toàn bộ module sử dụng
-_faker = Faker()
+from db_tools.core import progress
 
-def generate_fake_row(columns_config: Dict[str, str]) -> Dict[str, Any]:
+try:
+    import numpy as np
+except ImportError:  # NumPy là tùy chọn, không có thì dùng random của Faker
+    np = None
+
+# Đối tượng Faker dùng chung của module, chỉ được tạo ở lần dùng đầu tiên
+# (khởi tạo Faker nạp các provider của locale, khá tốn thời gian)
+_faker: Optional[Faker] = None
+
+# Các key trong cấu hình dạng dict không phải là tham số truyền cho provider
+_RESERVED_SPEC_KEYS = {"provider", "pool", "pool_cache", "deterministic", "null_fraction"}
+
+# Provider riêng của db-tools (không có trong Faker), chỉ có dạng sinh theo lô:
+# "histogram" lấy mẫu theo histogram của một profile dữ liệu (xem core/data_profile.py)
+LOCAL_PROVIDERS = ("histogram",)
+
+# Thư mục mặc định lưu các pool giá trị đã sinh khi cột bật `pool_cache: true`
+DEFAULT_POOL_CACHE_DIR = ".db_tools_cache/pools"
+
+# Các pool đã được xây dựng trong tiến trình hiện tại, theo khóa của pool
+_pools: Dict[str, List[Any]] = {}
+
+# Đối tượng Faker riêng cho chế độ tất định, được seed lại cho từng giá trị
+_deterministic_faker: Optional[Faker] = None
+
+_EPOCH = datetime(1970, 1, 1)
+
+ColumnSpec = Union[str, Dict[str, Any]]
+
+
+class ColumnPlan(NamedTuple):
+    """
+    Một cột đã được biên dịch: tên cột, provider và hàm sinh `count` giá trị một lần.
+    Cột tất định có thêm `derive`, tính giá trị giả từ danh sách giá trị gốc.
+    """
+    name: str
+    provider: str
+    generate: Callable[[int], List[Any]]
+    derive: Optional[Callable[[List[Any]], List[Any]]] = None
+
+
+def parse_column_spec(spec: ColumnSpec) -> Dict[str, Any]:
+    """
+    Chuẩn hóa cấu hình của một cột về dạng dict.
+
+    Hỗ trợ hai dạng trong db_tools.yml:
+        name: name
+        age: {provider: random_int, min: 18, max: 90}
+
+    Với dạng dict, `pool: 50000` sẽ lấy mẫu từ một pool 50000 giá trị sinh sẵn
+    (không phù hợp cho cột UNIQUE), `pool_cache: true` (hoặc một đường dẫn) lưu pool xuống đĩa.
+    `deterministic: true` suy ra giá trị giả từ HMAC của giá trị gốc (xem `compile_plan`).
+    `null_fraction: 0.2` thay khoảng 20% giá trị bằng NULL.
+    """
+    if isinstance(spec, str):
+        return {"provider": spec}
+    if isinstance(spec, dict) and isinstance(spec.get("provider"), str):
+        return dict(spec)
+    raise ValueError(f"Invalid column configuration: {spec!r}")
+
+
+def _provider_kwargs(spec: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in spec.items() if key not in _RESERVED_SPEC_KEYS}
+
+
+def _rng(faker: Faker):
+    """RNG của NumPy được seed từ Faker, để seed_instance() vẫn quyết định kết quả."""
+    return np.random.default_rng(faker.random.getrandbits(64))
+
+
+def _int_generator(faker: Faker, low: int, high: int, step: int) -> Callable[[int], List[int]]:
+    if np is not None:
+        return lambda count: (_rng(faker).integers(0, (high - low) // step + 1, count) * step + low).tolist()
+    randrange = faker.random.randrange
+    return lambda count: [randrange(low, high + 1, step) for _ in range(count)]
+
+
+def _float_generator(faker: Faker, low: float, high: float, digits: Optional[int]) -> Callable[[int], List[float]]:
+    if np is not None:
+        def generate(count: int) -> List[float]:
+            values = _rng(faker).uniform(low, high, count)
+            return (values.round(digits) if digits is not None else values).tolist()
+        return generate
+    uniform = faker.random.uniform
+    if digits is None:
+        return lambda count: [uniform(low, high) for _ in range(count)]
+    return lambda count: [round(uniform(low, high), digits) for _ in range(count)]
+
+
+def _bool_generator(faker: Faker, chance: int) -> Callable[[int], List[bool]]:
+    if np is not None:
+        return lambda count: (_rng(faker).random(count) < chance / 100).tolist()
+    random = faker.random.random
+    return lambda count: [random() < chance / 100 for _ in range(count)]
+
+
+def _choice_generator(faker: Faker, elements: Any) -> Callable[[int], List[Any]]:
+    if isinstance(elements, dict):
+        values, weights = list(elements.keys()), list(elements.values())
+    else:
+        values, weights = list(elements), None
+    if np is not None:
+        def generate(count: int) -> List[Any]:
+            p = None
+            if weights is not None:
+                p = np.asarray(weights, dtype=float) / sum(weights)
+            indexes = _rng(faker).choice(len(values), count, p=p)
+            return [values[i] for i in indexes]
+        return generate
+    choices = faker.random.choices
+    return lambda count: choices(values, weights=weights, k=count)
+
+
+def _histogram_generator(
+    faker: Faker, edges: List[float], counts: List[float], kind: str = "float", right_digits: Optional[int] = None
+) -> Callable[[int], List[Any]]:
+    """
+    Chọn một khoảng [edges[i], edges[i+1]) theo trọng số counts[i], rồi lấy giá trị đều trong khoảng đó.
+    `kind` là "integer", "float", "datetime" hoặc "date" (hai loại sau dùng số giây tính từ epoch).
+    """
+    if len(edges) != len(counts) + 1 or not counts or sum(counts) <= 0:
+        raise ValueError("'histogram' needs N+1 'edges' and N positive 'counts'.")
+    if kind == "integer":
+        to_value = lambda value: min(math.floor(value), math.floor(edges[-1]))
+    elif kind == "datetime":
+        to_value = lambda value: _EPOCH + timedelta(seconds=int(value))
+    elif kind == "date":
+        to_value = lambda value: (_EPOCH + timedelta(seconds=int(value))).date()
+    elif kind == "float":
+        to_value = (lambda value: round(value, right_digits)) if right_digits is not None else float
+    else:
+        raise ValueError(f"Unknown histogram kind '{kind}'.")
+    bins = range(len(counts))
+    if np is not None:
+        low, high = np.asarray(edges[:-1], dtype=float), np.asarray(edges[1:], dtype=float)
+        p = np.asarray(counts, dtype=float) / sum(counts)
+
+        def generate(count: int) -> List[Any]:
+            rng = _rng(faker)
+            chosen = rng.choice(len(counts), count, p=p)
+            values = rng.uniform(low[chosen], high[chosen])
+            return [to_value(value) for value in values.tolist()]
+        return generate
+    choices, uniform = faker.random.choices, faker.random.uniform
+    return lambda count: [
+        to_value(uniform(edges[i], edges[i + 1])) for i in choices(bins, weights=counts, k=count)
+    ]
+
+
+def _with_nulls(faker: Faker, generate: Callable[[int], List[Any]], fraction: float) -> Callable[[int], List[Any]]:
+    """Bọc một hàm sinh: mỗi giá trị có xác suất `fraction` bị thay bằng NULL."""
+    if fraction <= 0:
+        return generate
+    if np is not None:
+        def generate_with_nulls(count: int) -> List[Any]:
+            values = generate(count)
+            for i in np.flatnonzero(_rng(faker).random(count) < fraction).tolist():
+                values[i] = None
+            return values
+        return generate_with_nulls
+    random = faker.random.random
+    return lambda count: [None if random() < fraction else value for value in generate(count)]
+
+
+class _UnsupportedArguments(Exception):
+    """Tham số của provider không theo dạng fast path hiểu được: để Faker tự xử lý."""
+
+
+# Khoảng thời gian tương đối theo cú pháp của Faker, ví dụ "-30y", "+1d", "-1y6M"
+_OFFSET_PATTERN = re.compile(r"^([+-]?)(?:(\d+)y)?(?:(\d+)M)?(?:(\d+)w)?(?:(\d+)d)?(?:(\d+)h)?(?:(\d+)m)?(?:(\d+)s)?$")
+_OFFSET_UNITS = (365.25 * 86400, 30.4375 * 86400, 7 * 86400, 86400, 3600, 60, 1)
+
+
+def _parse_date_bound(value: Any) -> datetime:
+    """Mốc thời gian của date_time_between/date_between: datetime, date, "now"/"today" hoặc khoảng tương đối."""
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime.combine(value, datetime.min.time())
+    if isinstance(value, timedelta):
+        return datetime.now() + value
+    if isinstance(value, str):
+        if value in ("now", "today"):
+            return datetime.now()
+        match = _OFFSET_PATTERN.match(value)
+        if match and any(match.groups()[1:]):
+            seconds = sum(int(amount) * unit for amount, unit in zip(match.groups()[1:], _OFFSET_UNITS) if amount)
+            return datetime.now() + timedelta(seconds=-seconds if match.group(1) == "-" else seconds)
+    raise _UnsupportedArguments(value)
+
+
+def _datetime_generator(faker: Faker, start: Any, end: Any, as_date: bool) -> Callable[[int], List[Any]]:
+    start_at, end_at = _parse_date_bound(start), _parse_date_bound(end)
+    if (start_at.tzinfo is None) != (end_at.tzinfo is None):
+        raise _UnsupportedArguments(start, end)
+    if as_date:
+        first, last = start_at.date(), end_at.date()
+        days = _int_generator(faker, 0, max((last - first).days, 0), 1)
+        return lambda count: [first + timedelta(days=offset) for offset in days(count)]
+    seconds = _int_generator(faker, 0, max(int((end_at - start_at).total_seconds()), 0), 1)
+    return lambda count: [start_at + timedelta(seconds=offset) for offset in seconds(count)]
+
+
+def _fast_path(faker: Faker, provider: str, kwargs: Dict[str, Any]) -> Optional[Callable[[int], List[Any]]]:
+    """
+    Trả về hàm sinh theo lô cho các provider "rẻ" (số, bool, lựa chọn, ngày tháng),
+    bỏ qua chi phí gọi Faker cho từng giá trị. Trả về None nếu không hỗ trợ.
+    """
+    try:
+        if provider == "random_int":
+            return _int_generator(faker, kwargs.get("min", 0), kwargs.get("max", 9999), kwargs.get("step", 1))
+        if provider == "pyint":
+            return _int_generator(
+                faker, kwargs.get("min_value", 0), kwargs.get("max_value", 9999), kwargs.get("step", 1)
+            )
+        if provider == "pyfloat" and "min_value" in kwargs and "max_value" in kwargs \
+                and set(kwargs) <= {"min_value", "max_value", "right_digits"}:
+            return _float_generator(faker, kwargs["min_value"], kwargs["max_value"], kwargs.get("right_digits"))
+        if provider == "boolean":
+            return _bool_generator(faker, kwargs.get("chance_of_getting_true", 50))
+        if provider == "pybool":
+            return _bool_generator(faker, kwargs.get("truth_probability", 50))
+        if provider == "random_element" and "elements" in kwargs:
+            return _choice_generator(faker, kwargs["elements"])
+        if provider == "histogram":
+            return _histogram_generator(
+                faker, kwargs["edges"], kwargs["counts"], kwargs.get("kind", "float"), kwargs.get("right_digits")
+            )
+        if provider in ("date_time_between", "date_between") and "tzinfo" not in kwargs:
+            default_end = "now" if provider == "date_time_between" else "today"
+            return _datetime_generator(
+                faker, kwargs.get("start_date", "-30y"), kwargs.get("end_date", default_end),
+                as_date=provider == "date_between",
+            )
+    except _UnsupportedArguments:
+        # Tham số không theo dạng quen thuộc: để Faker tự xử lý như bình thường
+        return None
+    return None
+
+
+def _pool_key(provider: str, kwargs: Dict[str, Any], size: int) -> str:
+    payload = json.dumps([provider, kwargs, size], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def build_pool(
+    provider: str, kwargs: Dict[str, Any], size: int, cache_dir: Optional[str] = None
+) -> List[Any]:
+    """
+    Xây dựng (một lần cho mỗi tiến trình) một pool gồm `size` giá trị của provider.
+
+    Pool được sinh bởi một Faker riêng, seed theo khóa của pool, nên cùng một cấu hình
+    luôn cho cùng một pool bất kể worker nào xây dựng nó. Nếu có `cache_dir`, pool được
+    lưu xuống đĩa và được đọc lại ở các lần chạy sau.
+    """
+    key = _pool_key(provider, kwargs, size)
+    if key in _pools:
+        return _pools[key]
+
+    cache_path = Path(cache_dir) / f"{provider}-{key[:16]}.pkl" if cache_dir else None
+    if cache_path is not None and cache_path.is_file():
+        with open(cache_path, "rb") as f:
+            pool = pickle.load(f)
+    else:
+        pool_faker = Faker()
+        pool_faker.seed_instance(int(key[:16], 16))
+        method = getattr(pool_faker, provider)
+        generate = _fast_path(pool_faker, provider, kwargs) or _faker_generator(method, kwargs)
+        pool = generate(size)
+        if cache_path is not None:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            # Ghi ra file tạm rồi đổi tên để các worker chạy song song không đọc phải file dở dang
+            tmp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp_path, "wb") as f:
+                pickle.dump(pool, f)
+            os.replace(tmp_path, cache_path)
+
+    _pools[key] = pool
+    return pool
+
+
+def _pool_sampler(faker: Faker, pool: List[Any]) -> Callable[[int], List[Any]]:
+    """Lấy mẫu ngẫu nhiên theo chỉ số từ pool thay vì gọi Faker cho mỗi dòng."""
+    if np is not None:
+        return lambda count: [pool[i] for i in _rng(faker).integers(0, len(pool), count)]
+    choices = faker.random.choices
+    return lambda count: choices(pool, k=count)
+
+
+def is_deterministic(spec: ColumnSpec) -> bool:
+    """Cột có được ẩn danh hóa tất định (từ giá trị gốc) hay không."""
+    return isinstance(spec, dict) and bool(spec.get("deterministic"))
+
+
+def _get_default_faker() -> Faker:
+    global _faker
+    if _faker is None:
+        _faker = Faker()
+    return _faker
+
+
+def _get_deterministic_faker() -> Faker:
+    global _deterministic_faker
+    if _deterministic_faker is None:
+        _deterministic_faker = Faker()
+    return _deterministic_faker
+
+
+def _deterministic_deriver(
+    provider: str, kwargs: Dict[str, Any], hash_key: bytes
+) -> Callable[[List[Any]], List[Any]]:
+    """
+    Với mỗi giá trị gốc, seed Faker bằng HMAC(key, provider + giá trị) rồi gọi provider.
+    Cùng một giá trị gốc luôn cho cùng một giá trị giả, ở mọi bảng và mọi tiến trình,
+    mà không cần bảng tra cứu. NULL được giữ nguyên.
+    """
+    def derive(values: List[Any]) -> List[Any]:
+        faker = _get_deterministic_faker()
+        method = getattr(faker, provider)
+        result = []
+        for value in values:
+            if value is None:
+                result.append(None)
+                continue
+            message = f"{provider}\x00{value}".encode("utf-8")
+            digest = hmac.new(hash_key, message, hashlib.sha256).digest()
+            faker.seed_instance(int.from_bytes(digest[:8], "big"))
+            result.append(method(**kwargs))
+        return result
+    return derive
+
+
+def _missing_originals(count: int) -> List[Any]:
+    raise ValueError("Deterministic columns need the original values, use generate_columns(..., originals=...).")
+
+
+def _faker_generator(method: Callable[..., Any], kwargs: Dict[str, Any]) -> Callable[[int], List[Any]]:
+    if kwargs:
+        return lambda count: [method(**kwargs) for _ in range(count)]
+    return lambda count: [method() for _ in range(count)]
+
+
+def compile_plan(
+    columns_config: Dict[str, ColumnSpec],
+    faker: Optional[Faker] = None,
+    strict: bool = True,
+    hash_key: Optional[bytes] = None,
+) -> List[ColumnPlan]:
+    """
+    Biên dịch cấu hình các cột thành một plan gồm các hàm sinh đã được bind sẵn.
+    Việc tra cứu provider chỉ diễn ra một lần, thay vì cho mỗi dòng.
+
+    Args:
+        columns_config: Dictionary định nghĩa các cột và faker provider tương ứng.
+        faker: Đối tượng Faker dùng để sinh dữ liệu (mặc định là đối tượng dùng chung của module).
+        strict: True thì báo lỗi ValueError nếu có provider không tồn tại;
+                False thì cảnh báo một lần và bỏ qua cột đó.
+        hash_key: Khóa bí mật cho các cột `deterministic: true` (bắt buộc nếu có cột như vậy).
+
+    Returns:
+        Danh sách ColumnPlan theo thứ tự các cột trong cấu hình.
+    """
+    faker = faker or _get_default_faker()
+    plan = []
+    unknown = []
+    for col_name, raw_spec in columns_config.items():
+        spec = parse_column_spec(raw_spec)
+        provider = spec["provider"]
+        method = getattr(faker, provider, None)
+        if provider in LOCAL_PROVIDERS:
+            if spec.get("deterministic") or spec.get("pool"):
+                raise ValueError(f"Column '{col_name}': provider '{provider}' cannot be deterministic or pooled.")
+            generate = _fast_path(faker, provider, _provider_kwargs(spec))
+            if generate is None:
+                raise ValueError(f"Invalid '{provider}' configuration for column '{col_name}'.")
+            plan.append(ColumnPlan(col_name, provider, _with_nulls(faker, generate, spec.get("null_fraction", 0))))
+            continue
+        if provider.startswith("_") or not callable(method):
+            unknown.append((col_name, provider))
+            continue
+        kwargs = _provider_kwargs(spec)
+        if spec.get("deterministic"):
+            if not hash_key:
+                raise ValueError(
+                    f"Column '{col_name}' is deterministic but no anonymization key was provided."
+                )
+            plan.append(ColumnPlan(
+                col_name, provider, _missing_originals, _deterministic_deriver(provider, kwargs, hash_key)
+            ))
+            continue
+        if spec.get("pool"):
+            cache_dir = spec.get("pool_cache")
+            if cache_dir is True:
+                cache_dir = DEFAULT_POOL_CACHE_DIR
+            pool = build_pool(provider, kwargs, int(spec["pool"]), cache_dir or None)
+            generate = _pool_sampler(faker, pool)
+        else:
+            generate = _fast_path(faker, provider, kwargs) or _faker_generator(method, kwargs)
+        plan.append(ColumnPlan(col_name, provider, _with_nulls(faker, generate, spec.get("null_fraction", 0))))
+
+    if unknown and strict:
+        details = ", ".join(f"'{provider}' (column '{col}')" for col, provider in unknown)
+        raise ValueError(f"Unknown Faker provider(s): {details}")
+    for col_name, provider in unknown:
+        progress.echo(f"[yellow]Warning: Faker provider '{provider}' not found for column '{col_name}'. Skipping.[/yellow]")
+    return plan
+
+
+def generate_columns(
+    count: int, plan: List[ColumnPlan], originals: Optional[Dict[str, List[Any]]] = None
+) -> Dict[str, List[Any]]:
+    """
+    Sinh `count` giá trị cho mỗi cột trong plan, trả về dạng cột (columnar).
+
+    Args:
+        count: Số lượng giá trị cần sinh cho mỗi cột.
+        plan: Plan đã được biên dịch bởi `compile_plan`.
+        originals: Giá trị gốc theo cột, bắt buộc cho các cột tất định.
+
+    Returns:
+        Dictionary {tên cột: list giá trị}.
+    """
+    columns = {}
+    for column in plan:
+        if column.derive is not None and originals is not None and column.name in originals:
+            columns[column.name] = column.derive(originals[column.name])
+        else:
+            columns[column.name] = column.generate(count)
+    return columns
+
+
+def columns_to_rows(columns: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    """Chuyển dữ liệu dạng cột thành list các dòng (dictionary) để insert/update."""
+    names = list(columns.keys())
+    return [dict(zip(names, values)) for values in zip(*columns.values())]
+
+
+def generate_fake_row(columns_config: Dict[str, ColumnSpec], faker: Optional[Faker] = None) -> Dict[str, Any]:
     """
     Tạo một dòng (dictionary) dữ liệu giả dựa trên cấu hình các cột.
+    Provider không tồn tại sẽ bị bỏ qua kèm cảnh báo.
 
     Args:
         columns_config: Dictionary định nghĩa các cột và faker provider tương ứng.
+        faker: Đối tượng Faker dùng để sinh dữ liệu (mặc định là đối tượng dùng chung của module).
 
     Returns:
         Một dictionary đại diện cho một dòng dữ liệu.
     """
-    row_data = {}
-    for col_name, faker_provider in columns_config.items():
-        # getattr(_faker, 'name')() sẽ tương đương với _faker.name()
-        if hasattr(_faker, faker_provider):
-            row_data[col_name] = getattr(_faker, faker_provider)()
-        else:
-            print(f"[yellow]Warning: Faker provider '{faker_provider}' not found for column '{col_name}'. Skipping.[/yellow]")
-    return row_data
+    return generate_bulk_data(1, columns_config, faker)[0]
 
-def generate_bulk_data(count: int, columns_config: Dict[str, str]) -> List[Dict[str, Any]]:
+def generate_bulk_data(
+    count: int, columns_config: Dict[str, ColumnSpec], faker: Optional[Faker] = None
+) -> List[Dict[str, Any]]:
     """
     Tạo một danh sách các dòng dữ liệu giả.
+    Cấu hình được biên dịch một lần cho cả lô, provider không tồn tại chỉ bị cảnh báo một lần.
 
     Args:
         count: Số lượng dòng cần tạo.
         columns_config: Cấu hình cho các cột.
+        faker: Đối tượng Faker dùng để sinh dữ liệu (mặc định là đối tượng dùng chung của module).
 
     Returns:
         Một list các dictionary, mỗi dictionary là một dòng dữ liệu.
     """
-    return [generate_fake_row(columns_config) for _ in range(count)]
\ No newline at end of file
+    plan = compile_plan(columns_config, faker, strict=False)
+    if not plan:
+        return [{} for _ in range(count)]
+    return columns_to_rows(generate_columns(count, plan))
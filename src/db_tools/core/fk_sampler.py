@@ -0,0 +1,209 @@
+import random
+from array import array
+from bisect import bisect_right
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy import Table, func, select
+
+from db_tools.core import scanner
+
+try:
+    import numpy as np
+except ImportError:  # NumPy là tùy chọn, không có thì chọn chỉ số bằng random
+    np = None
+
+# Các kiểu phân phối khóa ngoại được hỗ trợ trong `relations`
+DISTRIBUTIONS = ("uniform", "zipf", "fixed", "fanout")
+
+_INT64_MIN, _INT64_MAX = -(2 ** 63), 2 ** 63 - 1
+
+
+def _is_int64(key: Any) -> bool:
+    return isinstance(key, int) and not isinstance(key, bool) and _INT64_MIN <= key <= _INT64_MAX
+
+
+class KeyPool:
+    """
+    Tập khóa chính của một bảng cha, lưu gọn trong bộ nhớ.
+
+    Khóa số nguyên được lưu thành các đoạn liên tiếp (start, độ dài) trong hai `array('q')`:
+    một bảng seed có khóa tự tăng chỉ tốn vài byte dù có hàng triệu dòng, và khóa thưa
+    vẫn chỉ tốn 16 byte mỗi khóa. Khóa kiểu khác (UUID, chuỗi...) được lưu trong một list.
+    """
+
+    def __init__(self) -> None:
+        self._starts = array("q")
+        # Số khóa đứng trước mỗi đoạn, dùng để tìm đoạn chứa chỉ số i bằng tìm kiếm nhị phân
+        self._offsets = array("q")
+        self._objects: Optional[List[Any]] = None
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add_range(self, start: int, stop: int) -> None:
+        """Thêm các khóa nguyên trong [start, stop)."""
+        if stop <= start:
+            return
+        if self._objects is not None:
+            self._objects.extend(range(start, stop))
+        elif self._starts and self._starts[-1] + (self._size - self._offsets[-1]) == start:
+            # Nối tiếp đoạn cuối cùng
+            pass
+        else:
+            self._starts.append(start)
+            self._offsets.append(self._size)
+        self._size += stop - start
+
+    def extend(self, keys: Iterable[Any]) -> None:
+        for key in keys:
+            if self._objects is None and _is_int64(key):
+                self.add_range(key, key + 1)
+                continue
+            self._to_objects()
+            self._objects.append(key)
+            self._size += 1
+
+    def _to_objects(self) -> None:
+        if self._objects is None:
+            self._objects = self.take(range(self._size)) if self._size else []
+            self._starts, self._offsets = array("q"), array("q")
+
+    def take(self, indices: Sequence[int]) -> List[Any]:
+        """Các khóa tại những vị trí cho trước (0 <= i < len(pool))."""
+        if self._objects is not None:
+            return [self._objects[i] for i in indices]
+        if np is not None:
+            positions = np.asarray(indices, dtype=np.int64)
+            offsets = np.frombuffer(self._offsets, dtype=np.int64)
+            runs = np.searchsorted(offsets, positions, side="right") - 1
+            return (np.frombuffer(self._starts, dtype=np.int64)[runs] + positions - offsets[runs]).tolist()
+        keys = []
+        for i in indices:
+            run = bisect_right(self._offsets, i) - 1
+            keys.append(self._starts[run] + i - self._offsets[run])
+        return keys
+
+    @classmethod
+    def from_table(cls, connection, table: Table, batch_size: int = scanner.DEFAULT_PAGE_SIZE) -> "KeyPool":
+        """
+        Đọc khóa chính của một bảng đã có sẵn dữ liệu trong database.
+        Khóa nguyên liền mạch (max - min + 1 == count) chỉ cần một truy vấn MIN/MAX/COUNT;
+        ngược lại khóa được stream theo từng batch, không tải cả bảng vào một list.
+        """
+        primary_key_col = scanner.primary_key_column(table)
+        if primary_key_col is None:
+            raise ValueError(f"Table '{table.name}' has no primary key to reference.")
+        pool = cls()
+        try:
+            is_integer = primary_key_col.type.python_type is int
+        except NotImplementedError:
+            is_integer = False
+        if is_integer:
+            low, high, count = connection.execute(
+                select(func.min(primary_key_col), func.max(primary_key_col), func.count())
+            ).one()
+            if not count:
+                return pool
+            if high - low + 1 == count:
+                pool.add_range(low, high + 1)
+                return pool
+        for batch in scanner.stream_table(connection, table, batch_size, columns=[primary_key_col]):
+            pool.extend(row[0] for row in batch)
+        return pool
+
+
+def validate_relation(rel_info: Dict[str, Any]) -> None:
+    """Kiểm tra cấu hình phân phối của một quan hệ; lỗi được báo bằng ValueError."""
+    distribution = rel_info.get("distribution", "uniform")
+    if distribution not in DISTRIBUTIONS:
+        raise ValueError(
+            f"Unknown distribution '{distribution}'. Supported distributions: {', '.join(DISTRIBUTIONS)}."
+        )
+    if float(rel_info.get("skew", 2.0)) <= 0:
+        raise ValueError("'skew' must be greater than 0.")
+    if int(rel_info.get("per_parent", 1)) < 1:
+        raise ValueError("'per_parent' must be at least 1.")
+    if distribution == "fanout":
+        fanout = rel_info.get("fanout") or []
+        if not any(int(children) > 0 and int(parents) > 0 for children, parents in fanout):
+            raise ValueError("'fanout' must list [children, parents] pairs with at least one parent having children.")
+    if not 0 <= float(rel_info.get("null_fraction", 0)) <= 1:
+        raise ValueError("'null_fraction' must be between 0 and 1.")
+
+
+class ForeignKeySampler:
+    """
+    Chọn khóa cha cho cả một chunk dòng con trong một lần gọi.
+
+    - uniform: mọi bảng cha có xác suất như nhau.
+    - zipf: phân phối lệch theo lũy thừa, các bảng cha đầu tiên được tham chiếu nhiều hơn (`skew`, mặc định 2).
+    - fixed: mỗi bảng cha có đúng `per_parent` dòng con liên tiếp, rồi quay vòng.
+    - fanout: số dòng con của mỗi bảng cha theo phân phối `fanout` ([số con, số bảng cha] đo từ một profile),
+      các dòng con được xáo trộn.
+    `null_fraction` để NULL thay cho khóa cha ở một tỉ lệ dòng con.
+    """
+
+    def __init__(self, pool: KeyPool, rel_info: Dict[str, Any], seed: Optional[int] = None) -> None:
+        validate_relation(rel_info)
+        self.pool = pool
+        self.distribution = rel_info.get("distribution", "uniform")
+        self.skew = float(rel_info.get("skew", 2.0))
+        self.per_parent = int(rel_info.get("per_parent", 1))
+        self.fanout = [(int(children), int(parents)) for children, parents in rel_info.get("fanout") or []]
+        self.null_fraction = float(rel_info.get("null_fraction", 0))
+        # Chỉ số bảng cha chưa dùng của vòng fanout hiện tại
+        self._cycle: List[int] = []
+        self._drawn = 0
+        self._rng = random.Random(seed)
+        self._np_rng = np.random.default_rng(seed) if np is not None else None
+
+    def _fanout_cycle(self, size: int) -> List[int]:
+        """Một vòng: mỗi bảng cha lặp lại số lần bằng số con được rút từ phân phối fanout, rồi xáo trộn."""
+        children = [children for children, _ in self.fanout]
+        weights = [parents for _, parents in self.fanout]
+        if self._np_rng is not None:
+            p = np.asarray(weights, dtype=float) / sum(weights)
+            repeats = self._np_rng.choice(children, size, p=p)
+            return self._np_rng.permutation(np.repeat(np.arange(size), repeats)).tolist()
+        cycle = [
+            parent for parent, repeat in enumerate(self._rng.choices(children, weights=weights, k=size))
+            for _ in range(repeat)
+        ]
+        self._rng.shuffle(cycle)
+        return cycle
+
+    def _indices(self, count: int, size: int) -> Sequence[int]:
+        if self.distribution == "fanout":
+            indices: List[int] = []
+            while len(indices) < count:
+                if not self._cycle:
+                    # Vòng rỗng (mọi bảng cha rút được 0 con) thì rút lại
+                    self._cycle = self._fanout_cycle(size)
+                    self._cycle.reverse()
+                take = min(count - len(indices), len(self._cycle))
+                indices.extend(self._cycle[-take:][::-1])
+                del self._cycle[-take:]
+            return indices
+        if self.distribution == "fixed":
+            start = self._drawn
+            if self._np_rng is not None:
+                return (np.arange(start, start + count) // self.per_parent) % size
+            return [(i // self.per_parent) % size for i in range(start, start + count)]
+        if self.distribution == "zipf":
+            if self._np_rng is not None:
+                return np.minimum((self._np_rng.random(count) ** self.skew * size).astype(np.int64), size - 1)
+            return [min(int(self._rng.random() ** self.skew * size), size - 1) for _ in range(count)]
+        if self._np_rng is not None:
+            return self._np_rng.integers(0, size, count)
+        return [self._rng.randrange(size) for _ in range(count)]
+
+    def sample(self, count: int) -> List[Any]:
+        """`count` khóa cha, theo phân phối đã cấu hình."""
+        indices = self._indices(count, len(self.pool))
+        self._drawn += count
+        keys = self.pool.take(indices)
+        if self.null_fraction > 0:
+            random = self._rng.random
+            keys = [None if random() < self.null_fraction else key for key in keys]
+        return keys
@@ -0,0 +1,172 @@
+import hashlib
+import json
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+from sqlalchemy import (Column, DateTime, MetaData, String, Table, delete,
+                        func, insert, or_, select)
+from sqlalchemy.sql.elements import ColumnElement
+
+from db_tools.core import scanner
+
+# Ẩn danh hóa tăng dần (chỉ các dòng đã thay đổi kể từ lần chạy trước), cấu hình theo từng bảng:
+#   incremental: {watermark: updated_at}   -> chỉ xử lý dòng có updated_at > giá trị lớn nhất của lần trước
+#   incremental: hash                      -> so hash các cột được ẩn danh với hash đã lưu sau lần trước
+INCREMENTAL_MODES = ("watermark", "hash")
+
+# Trạng thái được lưu trong chính database (không phải file cục bộ): khi database được thay bằng
+# một bản snapshot mới hoàn toàn, các bảng phụ này cũng mất và lần chạy sau tự động xử lý toàn bộ.
+STATE_TABLE_NAME = "_db_tools_incremental_state"
+HASHES_TABLE_NAME = "_db_tools_row_hashes"
+# Các bảng phụ này không thuộc dữ liệu của ứng dụng (bị bỏ qua khi profile hoặc subset toàn bộ database)
+INTERNAL_TABLES = (STATE_TABLE_NAME, HASHES_TABLE_NAME)
+
+_state_metadata = MetaData()
+state_table = Table(
+    STATE_TABLE_NAME,
+    _state_metadata,
+    Column("table_name", String(255), primary_key=True),
+    Column("mode", String(16), nullable=False),
+    # Dấu vân tay cấu hình của bảng: cấu hình đổi thì trạng thái cũ không còn giá trị
+    Column("config", String(32), nullable=False),
+    Column("watermark", String(64)),
+    Column("updated_at", DateTime),
+)
+hashes_table = Table(
+    HASHES_TABLE_NAME,
+    _state_metadata,
+    Column("table_name", String(255), primary_key=True),
+    # Khóa chính của dòng, dưới dạng chuỗi để dùng chung cho mọi bảng
+    Column("pk", String(255), primary_key=True),
+    Column("hash", String(32), nullable=False),
+)
+
+
+class IncrementalPlan(NamedTuple):
+    """Phạm vi xử lý của một bảng trong chế độ tăng dần."""
+    mode: str
+    # Cột watermark và điều kiện lọc các dòng mới hơn watermark đã lưu (None: xử lý toàn bộ)
+    column: Optional[str]
+    where: Optional[ColumnElement]
+    # Watermark lớn nhất tại thời điểm bắt đầu, được lưu khi bảng xử lý xong
+    high_watermark: Any
+    # Các cột được hash trong chế độ hash (mọi cột được ẩn danh, kể cả cột quy tắc SQL)
+    hash_columns: List[str]
+
+
+def parse_spec(table: Table, table_config: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Đọc và kiểm tra `incremental` trong cấu hình bảng. Trả về None nếu bảng không dùng chế độ tăng dần."""
+    spec = table_config.get("incremental")
+    if not spec:
+        return None
+    if spec == "hash" or spec == {"mode": "hash"}:
+        if scanner.primary_key_column(table) is None:
+            raise ValueError(f"Incremental mode 'hash' needs a primary key on '{table.name}'.")
+        return {"mode": "hash"}
+    if isinstance(spec, str):
+        spec = {"watermark": spec}
+    column = spec.get("watermark") if isinstance(spec, dict) else None
+    if not column:
+        raise ValueError(
+            f"Invalid 'incremental' setting {spec!r}: use 'hash' or a mapping like {{watermark: updated_at}}."
+        )
+    if column not in table.c:
+        raise ValueError(f"Watermark column '{column}' does not exist in '{table.name}'.")
+    return {"mode": "watermark", "column": column}
+
+
+def _watermark_text(value: Any) -> str:
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    return str(value)
+
+
+def _parse_watermark(value: str, column: Column) -> Any:
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    if python_type in (int, float, Decimal):
+        return python_type(value)
+    return value
+
+
+def ensure_state_tables(connection) -> None:
+    _state_metadata.create_all(connection, checkfirst=True)
+
+
+def _load_state(connection, table_name: str) -> Optional[Dict[str, Any]]:
+    row = connection.execute(select(state_table).where(state_table.c.table_name == table_name)).first()
+    return dict(row._mapping) if row is not None else None
+
+
+def plan_table(
+    connection, table: Table, spec: Dict[str, Any], fingerprint: str, hash_columns: Sequence[str], full: bool = False
+) -> IncrementalPlan:
+    """
+    Xác định các dòng cần xử lý dựa trên trạng thái đã lưu. Trạng thái không khớp chế độ hoặc cấu hình hiện tại
+    (hoặc `full` = True) thì bảng được xử lý toàn bộ, và hash cũ của bảng bị xóa.
+    """
+    ensure_state_tables(connection)
+    state = _load_state(connection, table.name)
+    valid = not full and state is not None and state["mode"] == spec["mode"] and state["config"] == fingerprint
+    if not valid and spec["mode"] == "hash":
+        connection.execute(delete(hashes_table).where(hashes_table.c.table_name == table.name))
+    connection.commit()
+
+    if spec["mode"] == "hash":
+        return IncrementalPlan("hash", None, None, None, list(hash_columns))
+
+    column = table.c[spec["column"]]
+    high_watermark = connection.execute(select(func.max(column))).scalar()
+    where = None
+    if valid and state["watermark"] is not None:
+        where = column > _parse_watermark(state["watermark"], column)
+        if column.nullable:
+            # Dòng có watermark NULL không so sánh được với lần trước: luôn xử lý lại, không để lọt dữ liệu thật
+            where = or_(where, column.is_(None))
+    return IncrementalPlan("watermark", spec["column"], where, high_watermark, [])
+
+
+def save_state(connection, table_name: str, plan: IncrementalPlan, fingerprint: str) -> None:
+    """Lưu trạng thái của bảng sau khi xử lý xong (người gọi commit)."""
+    watermark = None if plan.high_watermark is None else _watermark_text(plan.high_watermark)
+    connection.execute(delete(state_table).where(state_table.c.table_name == table_name))
+    connection.execute(insert(state_table).values(
+        table_name=table_name,
+        mode=plan.mode,
+        config=fingerprint,
+        watermark=watermark,
+        updated_at=datetime.now(timezone.utc).replace(tzinfo=None),
+    ))
+
+
+def row_hash(values: Sequence[Any]) -> str:
+    """Hash nội dung các cột được ẩn danh của một dòng, đúng như giá trị đọc từ database."""
+    payload = json.dumps(list(values), default=str, ensure_ascii=False)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def stored_hashes(connection, table_name: str, keys: Sequence[Any]) -> Dict[str, str]:
+    """Hash đã lưu của các dòng trong một batch, theo khóa chính (dạng chuỗi)."""
+    stmt = select(hashes_table.c.pk, hashes_table.c.hash).where(
+        hashes_table.c.table_name == table_name, hashes_table.c.pk.in_([str(key) for key in keys])
+    )
+    return dict(connection.execute(stmt).all())
+
+
+def save_hashes(connection, table_name: str, hashes: Dict[str, str]) -> None:
+    """Ghi (thay thế) hash của các dòng vừa được ẩn danh hóa (người gọi commit)."""
+    if not hashes:
+        return
+    connection.execute(delete(hashes_table).where(
+        hashes_table.c.table_name == table_name, hashes_table.c.pk.in_(list(hashes))
+    ))
+    connection.execute(insert(hashes_table), [
+        {"table_name": table_name, "pk": pk, "hash": value} for pk, value in hashes.items()
+    ])
@@ -0,0 +1,207 @@
+import csv
+import gzip
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from sqlalchemy import Table, engine, text
+
+from db_tools.core import exporters, metrics, progress, schema_cache, scanner, writers
+
+# Số dòng mặc định được đọc và ghi trong mỗi chunk khi nạp file CSV/Parquet
+DEFAULT_LOAD_CHUNK_SIZE = 5000
+
+
+def _chunked(rows: Iterator[Dict[str, Any]], chunk_size: int) -> Iterator[List[Dict[str, Any]]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _read_csv(path: Path, table: Table, chunk_size: int) -> Iterator[List[Dict[str, Any]]]:
+    with gzip.open(path, "rt", encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        columns = [table.c[name] for name in header]
+        rows = (
+            {column.name: exporters.parse_csv_value(value, column) for column, value in zip(columns, record)}
+            for record in reader
+        )
+        yield from _chunked(rows, chunk_size)
+
+
+def _read_parquet(path: Path, table: Table, chunk_size: int) -> Iterator[List[Dict[str, Any]]]:
+    if exporters.pq is None:
+        raise RuntimeError("Loading Parquet files needs the 'pyarrow' package.")
+    parquet_file = exporters.pq.ParquetFile(str(path))
+    json_columns = [
+        name for name in parquet_file.schema_arrow.names if exporters.is_json_column(table.c[name])
+    ]
+    for batch in parquet_file.iter_batches(batch_size=chunk_size):
+        rows = batch.to_pylist()
+        for row in rows:
+            for name in json_columns:
+                if row[name] is not None:
+                    row[name] = json.loads(row[name])
+        yield rows
+
+
+def _sql_statements(path: Path) -> Iterator[str]:
+    """
+    Tách file SQL do `seed --output --format sql` tạo thành từng câu lệnh.
+    Một câu lệnh kết thúc ở dòng có ';' cuối dòng nằm ngoài chuỗi literal (số dấu nháy đơn là chẵn).
+    """
+    buffer: List[str] = []
+    quotes = 0
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            buffer.append(line)
+            quotes += line.count("'")
+            if quotes % 2 == 0 and line.rstrip("\n").endswith(";"):
+                statement = "".join(buffer).rstrip().rstrip(";")
+                buffer, quotes = [], 0
+                if statement:
+                    yield statement
+    if "".join(buffer).strip():
+        yield "".join(buffer).strip()
+
+
+def _copy_csv_file(connection, table: Table, path: Path) -> bool:
+    """
+    Nạp nguyên file CSV nén bằng `COPY ... FROM STDIN` trên PostgreSQL, không cần parse từng dòng trong Python.
+    Trả về False nếu driver không hỗ trợ COPY.
+    """
+    driver = connection.dialect.driver
+    if driver not in ("psycopg2", "psycopg"):
+        return False
+    with gzip.open(path, "rt", encoding="utf-8", newline="") as f:
+        header = next(csv.reader([f.readline()]), None)
+        if header is None:
+            return True
+        preparer = connection.dialect.identifier_preparer
+        column_list = ", ".join(preparer.quote(col) for col in header)
+        copy_sql = (
+            f"COPY {preparer.format_table(table)} ({column_list}) FROM STDIN "
+            f"WITH (FORMAT csv, NULL '{exporters.CSV_NULL}')"
+        )
+        cursor = connection.connection.cursor()
+        try:
+            if driver == "psycopg2":
+                cursor.copy_expert(copy_sql, f)
+            else:
+                with cursor.copy(copy_sql) as copy:
+                    while True:
+                        data = f.read(1 << 20)
+                        if not data:
+                            break
+                        copy.write(data)
+        finally:
+            cursor.close()
+    return True
+
+
+def _execute_sql_file(connection, path: Path, table_name: str) -> None:
+    cursor = connection.connection.cursor()
+    try:
+        for statement in _sql_statements(path):
+            with metrics.phase("write", table_name):
+                # Gọi thẳng DBAPI: câu lệnh đã chứa giá trị literal, không có tham số
+                cursor.execute(statement)
+    finally:
+        cursor.close()
+
+
+def _load_rows(connection, table: Table, chunks: Iterator[List[Dict[str, Any]]], total: int) -> None:
+    write = writers.get_writer(connection)
+    primary_key_col = scanner.primary_key_column(table)
+    # SQL Server không cho ghi giá trị vào cột IDENTITY nếu không bật IDENTITY_INSERT
+    identity = connection.dialect.name == "mssql" and primary_key_col is not None \
+        and primary_key_col.identity is not None
+    if identity:
+        connection.exec_driver_sql(exporters.identity_insert_sql(table, connection.dialect, True))
+    try:
+        for chunk in progress.track(chunks, table.name, "load", total, f"Loading '{table.name}'..."):
+            with metrics.phase("write", table.name):
+                write(connection, table, chunk, False)
+            metrics.count("rows", len(chunk), table.name)
+            metrics.count("chunks", 1, table.name)
+    finally:
+        if identity:
+            connection.exec_driver_sql(exporters.identity_insert_sql(table, connection.dialect, False))
+
+
+def _load_table(connection, table: Table, path: Path, fmt: str, rows: int, chunk_size: int) -> None:
+    if fmt == "sql":
+        _execute_sql_file(connection, path, table.name)
+        return
+    if fmt == "csv" and connection.dialect.name == "postgresql" and _copy_csv_file(connection, table, path):
+        metrics.count("rows", rows, table.name)
+    else:
+        reader = _read_csv if fmt == "csv" else _read_parquet
+        _load_rows(connection, table, reader(path, table, chunk_size), rows)
+    # Dòng được nạp kèm khóa chính, cần đưa sequence về sau giá trị lớn nhất
+    reset = exporters.reset_sequence_sql(table, connection.dialect)
+    if reset is not None:
+        connection.execute(text(reset))
+
+
+def process_load(
+    config: Dict[str, Any], db_engine: engine.Engine, directory: str, chunk_size: Optional[int] = None
+) -> None:
+    """
+    Nạp thư mục do `seed --output` tạo ra vào database, từng bảng theo thứ tự trong manifest (thứ tự phụ thuộc),
+    trong một transaction duy nhất.
+    """
+    progress.echo(f"\n[bold cyan]📥 Loading seed files from '{directory}'...[/bold cyan]")
+    try:
+        manifest = exporters.load_manifest(Path(directory))
+    except (FileNotFoundError, ValueError) as e:
+        progress.echo(f"[bold red]❌ {e}[/bold red]")
+        return
+    fmt = manifest.get("format")
+    if fmt not in exporters.EXPORT_FORMATS:
+        progress.echo(f"[bold red]❌ Unknown format '{fmt}' in the manifest.[/bold red]")
+        return
+    if fmt == "sql" and manifest.get("dialect") != db_engine.dialect.name:
+        progress.echo(
+            f"[bold red]❌ These SQL files were written for '{manifest.get('dialect')}', "
+            f"not '{db_engine.dialect.name}'.[/bold red]"
+        )
+        return
+    if fmt == "parquet" and exporters.pq is None:
+        progress.echo("[bold red]❌ Loading Parquet files needs the 'pyarrow' package.[/bold red]")
+        return
+
+    entries = manifest.get("tables", [])
+    chunk_size = int(chunk_size or config.get("load_chunk_size", DEFAULT_LOAD_CHUNK_SIZE))
+    metadata = schema_cache.get_metadata(
+        db_engine, [entry["table"] for entry in entries], schema_cache.cache_dir_from_config(config)
+    )
+    with db_engine.connect() as connection, writers.bulk_load_session(connection):
+        for entry in entries:
+            table_name = entry["table"]
+            table = metadata.tables.get(table_name)
+            if table is None:
+                progress.echo(f"[bold red]❌ Error: Table '{table_name}' does not exist.[/bold red]")
+                connection.rollback()
+                return
+            progress.echo(f"   - Loading {entry.get('rows', 0)} records into [bold magenta]'{table_name}'[/bold magenta]...")
+            try:
+                with metrics.table_timer(table_name):
+                    _load_table(
+                        connection, table, Path(directory) / entry["file"], fmt, entry.get("rows", 0), chunk_size
+                    )
+            except Exception as e:
+                progress.echo(f"[bold red]❌ An error occurred with table '{table_name}': {repr(e)}[/bold red]")
+                connection.rollback()
+                return
+        with metrics.phase("commit"):
+            connection.commit()
+    progress.echo(f"\n[bold green]🎉 Loaded {len(entries)} tables successfully![/bold green]")
@@ -0,0 +1,263 @@
+import cProfile
+import io
+import json
+import pstats
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import (Any, Callable, Dict, Iterable, Iterator, List, NamedTuple,
+                    Optional, Tuple, TypeVar)
+
+T = TypeVar("T")
+
+# Các giai đoạn được đo: "reflect" (đọc schema), "fk_load" (đọc khóa bảng cha), "generate" (sinh dữ liệu giả),
+# "fk_sample" (chọn khóa ngoại), "read" (đọc từ database), "write" (ghi), "commit".
+# Giai đoạn đặc biệt "total" là toàn bộ thời gian xử lý một bảng.
+TOTAL_PHASE = "total"
+
+# Đuôi file được ghi theo định dạng OpenMetrics (text); các đuôi khác ghi JSON
+OPENMETRICS_SUFFIXES = (".prom", ".txt", ".openmetrics")
+
+
+class MetricEvent(NamedTuple):
+    """
+    Một sự kiện đo lường, gửi tới các subscriber (ví dụ TUI).
+    kind = "phase": `value` là thời gian (giây) của một lần chạy giai đoạn `name`;
+    kind = "counter": `value` là lượng vừa cộng thêm vào bộ đếm `name`;
+    kind = "table": bảng `table` vừa xử lý xong, `value` là tổng thời gian (giây).
+    """
+    kind: str
+    table: Optional[str]
+    name: str
+    value: float
+
+
+class _PhaseStat:
+    __slots__ = ("count", "total", "min", "max")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "seconds": round(self.total, 6),
+            "mean": round(self.total / self.count, 6) if self.count else 0.0,
+            "min": round(self.min, 6) if self.count else 0.0,
+            "max": round(self.max, 6),
+        }
+
+
+# Thời gian theo (bảng, giai đoạn) và bộ đếm theo (bảng, tên); bảng None là cấp toàn cục
+_phases: Dict[Tuple[Optional[str], str], _PhaseStat] = {}
+_counters: Dict[Tuple[Optional[str], str], float] = {}
+_subscribers: List[Callable[[MetricEvent], None]] = []
+_lock = threading.Lock()
+
+
+def _emit(event: MetricEvent) -> None:
+    for callback in list(_subscribers):
+        callback(event)
+
+
+def subscribe(callback: Callable[[MetricEvent], None]) -> Callable[[], None]:
+    """
+    Đăng ký nhận mọi MetricEvent. Trả về hàm để hủy đăng ký.
+    Callback được gọi trên thread đang đo, nên cần nhanh và thread-safe.
+    """
+    with _lock:
+        _subscribers.append(callback)
+
+    def unsubscribe() -> None:
+        with _lock:
+            if callback in _subscribers:
+                _subscribers.remove(callback)
+    return unsubscribe
+
+
+def record(name: str, seconds: float, table: Optional[str] = None) -> None:
+    with _lock:
+        _phases.setdefault((table, name), _PhaseStat()).add(seconds)
+    _emit(MetricEvent("phase", table, name, seconds))
+
+
+def count(name: str, value: float = 1, table: Optional[str] = None) -> None:
+    """Cộng `value` vào bộ đếm `name` (ví dụ "rows", "batches") của bảng."""
+    with _lock:
+        _counters[(table, name)] = _counters.get((table, name), 0) + value
+    _emit(MetricEvent("counter", table, name, value))
+
+
+@contextmanager
+def phase(name: str, table: Optional[str] = None) -> Iterator[None]:
+    """Cộng thời gian chạy của khối lệnh vào giai đoạn `name` của bảng."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start, table)
+
+
+@contextmanager
+def table_timer(table: str) -> Iterator[None]:
+    """Đo toàn bộ thời gian xử lý một bảng, và báo cho subscriber khi bảng xong."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        with _lock:
+            _phases.setdefault((table, TOTAL_PHASE), _PhaseStat()).add(seconds)
+        _emit(MetricEvent("table", table, TOTAL_PHASE, seconds))
+
+
+def timed(name: str, iterable: Iterable[T], table: Optional[str] = None) -> Iterator[T]:
+    """Bọc một iterator: thời gian chờ mỗi phần tử được tính vào giai đoạn `name`."""
+    iterator = iter(iterable)
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            record(name, time.perf_counter() - start, table)
+        yield item
+
+
+def snapshot() -> Dict[str, float]:
+    """Tổng thời gian của từng giai đoạn, cộng dồn trên mọi bảng."""
+    totals: Dict[str, float] = {}
+    with _lock:
+        for (_, name), stat in _phases.items():
+            if name != TOTAL_PHASE:
+                totals[name] = totals.get(name, 0.0) + stat.total
+    return totals
+
+
+def table_report(table: str) -> Dict[str, Any]:
+    """Số dòng, thời gian, rows/sec và thời gian từng giai đoạn của một bảng."""
+    with _lock:
+        phases = {name: stat.as_dict() for (owner, name), stat in _phases.items() if owner == table}
+        counters = {name: value for (owner, name), value in _counters.items() if owner == table}
+    total = phases.pop(TOTAL_PHASE, {}).get("seconds", 0.0)
+    rows = counters.get("rows", 0)
+    return {
+        "rows": rows,
+        "seconds": total,
+        "rows_per_sec": round(rows / total, 1) if total else None,
+        "counters": counters,
+        "phases": phases,
+    }
+
+
+def report() -> Dict[str, Any]:
+    """Toàn bộ số liệu đã thu thập, theo bảng và theo giai đoạn."""
+    with _lock:
+        tables = sorted({owner for owner, _ in list(_phases) + list(_counters) if owner is not None})
+        global_phases = {name: stat.as_dict() for (owner, name), stat in _phases.items() if owner is None}
+    return {
+        "phases": {name: round(seconds, 6) for name, seconds in sorted(snapshot().items())},
+        "global_phases": global_phases,
+        "tables": {table: table_report(table) for table in tables},
+    }
+
+
+def reset() -> None:
+    with _lock:
+        _phases.clear()
+        _counters.clear()
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def to_openmetrics(document: Dict[str, Any]) -> str:
+    """Chuyển kết quả của report() sang định dạng OpenMetrics text."""
+    lines = [
+        "# TYPE db_tools_phase_seconds counter",
+        "# HELP db_tools_phase_seconds Time spent per table and phase.",
+    ]
+    samples = [("", name, stat) for name, stat in document["global_phases"].items()]
+    for table, table_doc in document["tables"].items():
+        samples += [(table, name, stat) for name, stat in table_doc["phases"].items()]
+    for table, name, stat in samples:
+        labels = f'table="{_label(table)}",phase="{_label(name)}"'
+        lines.append(f"db_tools_phase_seconds_total{{{labels}}} {stat['seconds']}")
+    lines += ["# TYPE db_tools_phase_calls counter"]
+    for table, name, stat in samples:
+        labels = f'table="{_label(table)}",phase="{_label(name)}"'
+        lines.append(f"db_tools_phase_calls_total{{{labels}}} {stat['count']}")
+    lines += ["# TYPE db_tools_phase_max_seconds gauge"]
+    for table, name, stat in samples:
+        labels = f'table="{_label(table)}",phase="{_label(name)}"'
+        lines.append(f"db_tools_phase_max_seconds{{{labels}}} {stat['max']}")
+    lines += ["# TYPE db_tools_rows counter"]
+    for table, table_doc in document["tables"].items():
+        lines.append(f'db_tools_rows_total{{table="{_label(table)}"}} {table_doc["rows"]}')
+    lines += ["# TYPE db_tools_rows_per_second gauge"]
+    for table, table_doc in document["tables"].items():
+        if table_doc["rows_per_sec"] is not None:
+            lines.append(f'db_tools_rows_per_second{{table="{_label(table)}"}} {table_doc["rows_per_sec"]}')
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+
+def write_report(path: Path) -> None:
+    """Ghi report() ra file: OpenMetrics nếu đuôi là .prom/.txt/.openmetrics, ngược lại là JSON."""
+    document = report()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        if path.suffix in OPENMETRICS_SUFFIXES:
+            f.write(to_openmetrics(document))
+        else:
+            json.dump(document, f, indent=2)
+
+
+@contextmanager
+def profiling(output: Optional[Path] = None, top: int = 25) -> Iterator[None]:
+    """
+    Chạy khối lệnh dưới profiler. Dùng pyinstrument nếu đã cài, ngược lại dùng cProfile.
+    Kết quả được in ra và (nếu có `output`) lưu lại: HTML với pyinstrument, file .prof với cProfile.
+    """
+    try:
+        from pyinstrument import Profiler
+    except ImportError:  # pyinstrument là tùy chọn
+        Profiler = None
+
+    if Profiler is not None:
+        profiler = Profiler()
+        profiler.start()
+        try:
+            yield
+        finally:
+            profiler.stop()
+            # Không in qua rich để các ký tự [ ] trong output không bị hiểu là markup
+            sys.stdout.write(profiler.output_text(unicode=True, color=False))
+            if output is not None:
+                output.write_text(profiler.output_html(), encoding="utf-8")
+        return
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        stream = io.StringIO()
+        pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(top)
+        sys.stdout.write(stream.getvalue())
+        if output is not None:
+            profiler.dump_stats(str(output))
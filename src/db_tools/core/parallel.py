@@ -0,0 +1,148 @@
+import hashlib
+import os
+import threading
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from faker import Faker
+
+from db_tools.core import faker_manager
+
+# Mỗi tiến trình worker giữ một đối tượng Faker riêng
+_worker_faker: Optional[Faker] = None
+
+# Đối tượng Faker dùng khi sinh dữ liệu trong tiến trình chính với seed cố định, riêng cho từng thread:
+# các bảng cùng tầng có thể được seed đồng thời, và seed lại một Faker dùng chung sẽ làm kết quả thay đổi
+_local = threading.local()
+
+ChunkTask = Tuple[Dict[str, Any], int, Optional[int]]
+DeriveTask = Tuple[Dict[str, Any], Dict[str, List[Any]], bytes]
+
+
+def derive_seed(seed: Optional[int], *parts: Any) -> Optional[int]:
+    """
+    Tạo một seed con ổn định từ seed gốc và các thành phần (tên bảng, số thứ tự chunk...).
+    Không dùng hash() vì giá trị của nó thay đổi giữa các tiến trình.
+    """
+    if seed is None:
+        return None
+    key = ":".join(str(part) for part in (seed, *parts)).encode("utf-8")
+    return int.from_bytes(hashlib.sha256(key).digest()[:8], "big")
+
+
+def _init_worker() -> None:
+    """Khởi tạo Faker cho worker; seed ngẫu nhiên để các worker (fork) không sinh trùng dữ liệu."""
+    global _worker_faker
+    _worker_faker = Faker()
+    _worker_faker.seed_instance(int.from_bytes(os.urandom(8), "big"))
+
+
+def _generate_chunk_task(task: ChunkTask) -> List[Dict[str, Any]]:
+    """Chạy trong worker: sinh một chunk dữ liệu giả."""
+    columns_config, size, chunk_seed = task
+    if chunk_seed is not None:
+        _worker_faker.seed_instance(chunk_seed)
+    return faker_manager.generate_bulk_data(size, columns_config, _worker_faker)
+
+
+def _generate_chunk_local(task: ChunkTask) -> List[Dict[str, Any]]:
+    """Sinh một chunk ngay trong tiến trình chính."""
+    columns_config, size, chunk_seed = task
+    if chunk_seed is None:
+        return faker_manager.generate_bulk_data(size, columns_config)
+    local_faker = getattr(_local, "faker", None)
+    if local_faker is None:
+        local_faker = _local.faker = Faker()
+    local_faker.seed_instance(chunk_seed)
+    return faker_manager.generate_bulk_data(size, columns_config, local_faker)
+
+
+def _derive_rows(task: DeriveTask) -> List[Dict[str, Any]]:
+    """Tính các cột tất định cho một lát dữ liệu gốc (chạy trong worker hoặc tiến trình chính)."""
+    columns_config, originals, hash_key = task
+    count = len(next(iter(originals.values()), []))
+    plan = faker_manager.compile_plan(columns_config, hash_key=hash_key)
+    return faker_manager.columns_to_rows(faker_manager.generate_columns(count, plan, originals))
+
+
+def derive_chunk(
+    columns_config: Dict[str, Any],
+    originals: Dict[str, List[Any]],
+    hash_key: bytes,
+    executor: Optional[Executor] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Tính giá trị giả tất định cho một batch từ các giá trị gốc (theo cột).
+    Khi có executor, batch được chia thành một lát cho mỗi worker và tính song song;
+    vì giá trị chỉ phụ thuộc vào giá trị gốc nên kết quả không đổi.
+    """
+    count = len(next(iter(originals.values()), []))
+    workers = getattr(executor, "_max_workers", 1)
+    if executor is None or workers <= 1 or count < 2 * workers:
+        return _derive_rows((columns_config, originals, hash_key))
+    step = (count + workers - 1) // workers
+    tasks = [
+        (columns_config, {col: values[start:start + step] for col, values in originals.items()}, hash_key)
+        for start in range(0, count, step)
+    ]
+    rows: List[Dict[str, Any]] = []
+    for part in executor.map(_derive_rows, tasks):
+        rows.extend(part)
+    return rows
+
+
+@contextmanager
+def generation_pool(workers: int) -> Iterator[Optional[Executor]]:
+    """
+    Tạo một process pool cho giai đoạn sinh dữ liệu, dùng chung cho cả một lần chạy.
+    Trả về None khi workers <= 1 (sinh dữ liệu ngay trong tiến trình chính).
+    """
+    if workers <= 1:
+        yield None
+        return
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+        yield executor
+
+
+def generate_chunks(
+    columns_config: Dict[str, Any],
+    sizes: Iterable[int],
+    executor: Optional[Executor] = None,
+    seed: Optional[int] = None,
+    stream_key: str = "",
+    max_pending: Optional[int] = None,
+    start_index: int = 0,
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Sinh các chunk dữ liệu giả theo đúng thứ tự của `sizes`.
+
+    Khi có executor, các chunk được sinh song song nhưng vẫn trả về theo thứ tự,
+    với tối đa `max_pending` chunk chờ sẵn (mặc định 2 chunk/worker) để bộ nhớ
+    không tăng theo số dòng.
+    Khi có seed, mỗi chunk được seed riêng từ (seed, stream_key, số thứ tự chunk)
+    nên kết quả giống nhau bất kể số lượng worker. `start_index` cho phép tiếp tục
+    một luồng đang dở (ví dụ khi resume) mà vẫn giữ đúng seed của từng chunk.
+    """
+    tasks = (
+        (columns_config, size, derive_seed(seed, stream_key, index))
+        for index, size in enumerate(sizes, start=start_index)
+    )
+    if executor is None:
+        for task in tasks:
+            yield _generate_chunk_local(task)
+        return
+
+    max_pending = max_pending or 2 * getattr(executor, "_max_workers", 1)
+    pending: Deque = deque()
+    try:
+        for task in tasks:
+            pending.append(executor.submit(_generate_chunk_task, task))
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
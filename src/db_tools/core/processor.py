@@ -1,114 +1,862 @@
-import random
-from typing import Any, Dict, List
+import itertools
+import os
+from concurrent.futures import (FIRST_COMPLETED, Executor, Future,
+                                ThreadPoolExecutor, wait)
+from dataclasses import dataclass, field
+from typing import (Any, Dict, Iterator, List, NamedTuple, Optional, Set,
+                    Tuple, Union)
 
-from rich import print
-from rich.progress import track
-from sqlalchemy import MetaData, Table, engine, insert, inspect, select, update
+from sqlalchemy import (Column, MetaData, Table, bindparam, delete, engine,
+                        func, insert, select, update)
 
-from db_tools.core import faker_manager
-from db_tools.core.dependency_resolver import get_seeding_order
+from db_tools.core import (faker_manager, fk_sampler, incremental, metrics,
+                           parallel, progress, pushdown, scanner, schema_cache,
+                           writers)
+from db_tools.core.checkpoint import AnonymizeCheckpoint, config_fingerprint
+from db_tools.core.dependency_resolver import (get_seeding_order,
+                                               get_seeding_plan,
+                                               get_table_dependencies,
+                                               merge_relations,
+                                               relations_from_metadata,
+                                               without_relations)
 
+# Số dòng mặc định được xử lý (và commit) trong mỗi batch khi ẩn danh hóa
+DEFAULT_BATCH_SIZE = 1000
+# Số dòng mặc định được sinh và insert trong mỗi chunk khi seed
+DEFAULT_CHUNK_SIZE = 1000
+# Biến môi trường chứa khóa bí mật cho chế độ ẩn danh hóa tất định
+ANONYMIZE_KEY_ENV = "DB_TOOLS_ANONYMIZE_KEY"
 
-def _seed_table(
-    db_engine: engine.Engine,
+# Các hàm/lớp không có dấu gạch dưới (ngoài process_seed/process_anonymize) là API nội bộ dùng chung
+# với async_processor và subset: trạng thái một lần chạy (SeedRun, AnonymizeRun), chuẩn bị (prepare_seed,
+# plan_anonymize_table) và các bước seed/ẩn danh hóa một bảng. Đổi chữ ký của chúng thì cập nhật cả hai module đó.
+
+
+def generate_seed_chunks(
+    table_name: str,
+    count: int,
+    chunk_size: int,
+    columns_to_fake: Dict[str, Any],
+    fk_samplers: Dict[str, fk_sampler.ForeignKeySampler],
+    executor: Optional[Executor] = None,
+    seed: Optional[int] = None,
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Sinh dữ liệu giả theo từng chunk có kích thước cố định.
+    Chỉ một số ít chunk tồn tại trong bộ nhớ tại một thời điểm, bất kể `count` lớn đến đâu.
+    """
+    sizes = (min(chunk_size, count - start) for start in range(0, count, chunk_size))
+    chunks = parallel.generate_chunks(
+        columns_to_fake, sizes, executor, seed=seed, stream_key=f"seed:{table_name}",
+    )
+    for chunk in metrics.timed("generate", chunks, table_name):
+        # Khóa ngoại được chọn trong tiến trình chính, cho cả chunk trong một lần
+        with metrics.phase("fk_sample", table_name):
+            for fk_column, sampler in fk_samplers.items():
+                for row_data, parent_key in zip(chunk, sampler.sample(len(chunk))):
+                    row_data[fk_column] = parent_key
+        yield chunk
+
+
+@dataclass
+class SeedRun:
+    """Trạng thái dùng chung của một lần seed, được truyền cho từng bảng."""
+    metadata: MetaData
+    # Khóa chính của các bảng cha (đã seed trong lần chạy này, hoặc đọc từ database)
+    seeded_pks: Dict[str, fk_sampler.KeyPool] = field(default_factory=dict)
+    # Chỉ cần thu thập khóa chính của các bảng được bảng khác tham chiếu tới
+    parent_tables: Set[str] = field(default_factory=set)
+    executor: Optional[Executor] = None
+    seed: Optional[int] = None
+    # Thanh tiến trình của rich không thể chạy đồng thời trên nhiều thread
+    show_progress: bool = True
+    # Khi seed ra file (`seed --output`), các chunk được ghi vào exporters.SeedExport thay vì database
+    export: Optional[Any] = None
+    # Quan hệ được hoãn sang lượt thứ hai, theo (bảng, cột khóa ngoại)
+    deferred: Dict[Tuple[str, str], Dict[str, Any]] = field(default_factory=dict)
+
+
+def build_fk_samplers(
+    connection, table_name: str, relations_config: Dict[str, Any], run: SeedRun
+) -> Dict[str, fk_sampler.ForeignKeySampler]:
+    """
+    Tạo bộ chọn khóa ngoại cho từng cột trong `relations`.
+    Bảng cha không được seed trong lần chạy này (hoặc có `include_existing: true`)
+    được lấy khóa từ dữ liệu đang có trong database.
+    """
+    samplers = {}
+    for fk_column, rel_info in relations_config.items():
+        parent_name = rel_info.get("table")
+        pool = None if rel_info.get("include_existing") else run.seeded_pks.get(parent_name)
+        if pool is None:
+            parent_table = run.metadata.tables.get(parent_name)
+            if parent_table is None:
+                continue
+            with metrics.phase("fk_load", table_name):
+                pool = fk_sampler.KeyPool.from_table(connection, parent_table)
+        if not pool:
+            continue
+        seed = parallel.derive_seed(run.seed, table_name, "relations", fk_column)
+        samplers[fk_column] = fk_sampler.ForeignKeySampler(pool, rel_info, seed)
+    return samplers
+
+
+def seed_table(
     connection,
     table_name: str,
     table_config: Dict[str, Any],
-    seeded_pks: Dict[str, List[Any]],
+    run: SeedRun,
 ) -> None:
-    metadata = MetaData()
-    inspector = inspect(db_engine)
-    if not inspector.has_table(table_name):
-        print(f"[bold red]❌ Error: Table '{table_name}' does not exist.[/bold red]")
+    """Seed một bảng theo từng chunk (ghi vào database, hoặc vào file khi `run.export` được đặt)."""
+    table = run.metadata.tables.get(table_name)
+    if table is None:
+        progress.echo(f"[bold red]❌ Error: Table '{table_name}' does not exist.[/bold red]")
         return
-    table = Table(table_name, metadata, autoload_with=db_engine)
     count = table_config.get("count", 10)
+    chunk_size = int(table_config.get("chunk_size", DEFAULT_CHUNK_SIZE))
     columns_to_fake = table_config.get("columns", {})
     relations_config = table_config.get("relations", {})
-    print(f"   - Generating {count} records for [bold magenta]'{table_name}'[/bold magenta]...")
-    data_to_insert = []
-    for _ in track(range(count), description=f"Generating for '{table_name}'..."):
-        row_data = faker_manager.generate_fake_row(columns_to_fake)
-        for fk_column, rel_info in relations_config.items():
-            related_table = rel_info.get("table")
-            if related_table in seeded_pks and seeded_pks[related_table]:
-                row_data[fk_column] = random.choice(seeded_pks[related_table])
-        data_to_insert.append(row_data)
-    if data_to_insert:
-        print(f"   - Inserting records into [bold magenta]'{table_name}'[/bold magenta]...")
-        stmt = insert(table).returning(table.primary_key.columns.values()[0])
-        result = connection.execute(stmt, data_to_insert)
-        new_pks = result.scalars().all()
-        seeded_pks[table_name] = new_pks
-        print(f"[bold green]✅ Seeded {len(new_pks)} records into '{table_name}' successfully![/bold green]")
-
-
-def process_seed(config: Dict[str, Any], db_engine: engine.Engine):
-    """Hàm chính điều phối toàn bộ quá trình seeding."""
-    seed_config = config.get("seed")
-    if not seed_config:
-        print("[yellow]No 'seed' configuration found. Skipping.[/yellow]")
+    if count <= 0:
         return
+    return_pks = table_name in run.parent_tables
+
+    progress.echo(f"   - Generating and inserting {count} records for [bold magenta]'{table_name}'[/bold magenta] in chunks of {chunk_size}...")
+    # Writer được chọn theo dialect (COPY, INSERT nhiều dòng, executemany...)
+    write = run.export.write if run.export is not None else writers.get_writer(connection)
+    # Khóa chính được thu thập dần sau mỗi chunk để các bảng con có thể tham chiếu
+    new_pks = fk_sampler.KeyPool()
+    inserted = 0
+    chunks = generate_seed_chunks(
+        table_name, count, chunk_size, columns_to_fake,
+        build_fk_samplers(connection, table_name, relations_config, run), run.executor, run.seed,
+    )
+    chunks = progress.track(chunks, table_name, "seed", count, f"Seeding '{table_name}'...", run.show_progress)
+    for chunk in chunks:
+        with metrics.phase("write", table_name):
+            chunk_pks = write(connection, table, chunk, return_pks)
+        if chunk_pks:
+            new_pks.extend(chunk_pks)
+        inserted += len(chunk)
+        metrics.count("rows", len(chunk), table_name)
+        metrics.count("chunks", 1, table_name)
+    if return_pks:
+        run.seeded_pks[table_name] = new_pks
+    progress.echo(f"[bold green]✅ Seeded {inserted} records into '{table_name}' successfully![/bold green]")
 
-    print("\n[bold cyan]🌱 Starting relational data seeding process...[/bold cyan]")
-    
-    try:
-        # Lấy thứ tự seed chính xác từ resolver
-        print("   - Resolving table seeding order...")
-        seeding_order = get_seeding_order(seed_config)
-        print(f"   - Determined order: [yellow]{' -> '.join(seeding_order)}[/yellow]")
-    except ValueError as e:
-        print(f"[bold red]❌ Error resolving dependencies: {e}[/bold red]")
-        return
 
-    seeded_primary_keys: Dict[str, List[Any]] = {}
+def fill_deferred_relations(connection, run: SeedRun) -> None:
+    """
+    Lượt thứ hai: gán các khóa ngoại đã hoãn (tự tham chiếu, hoặc cạnh phá chu trình) cho các dòng vừa seed,
+    bằng một câu UPDATE executemany mỗi chunk, khi mọi bảng cha đã có khóa chính.
+    """
+    for (table_name, fk_column), rel_info in run.deferred.items():
+        table = run.metadata.tables.get(table_name)
+        new_pks = run.seeded_pks.get(table_name)
+        if table is None or not new_pks:
+            continue
+        sampler = build_fk_samplers(connection, table_name, {fk_column: rel_info}, run).get(fk_column)
+        if sampler is None:
+            continue
+        progress.echo(f"   - Filling deferred relation {table_name}.{fk_column} -> {rel_info['table']}...")
+        primary_key_col = scanner.primary_key_column(table)
+        stmt = update(table).where(primary_key_col == bindparam("_pk")).values({fk_column: bindparam("_fk")})
+        for start in range(0, len(new_pks), DEFAULT_CHUNK_SIZE):
+            keys = new_pks.take(range(start, min(start + DEFAULT_CHUNK_SIZE, len(new_pks))))
+            with metrics.phase("deferred", table_name):
+                connection.execute(stmt, [
+                    {"_pk": key, "_fk": parent_key} for key, parent_key in zip(keys, sampler.sample(len(keys)))
+                ])
 
-    with db_engine.connect() as connection:
+
+def _seed_sequential(
+    db_engine: engine.Engine, seed_config: Dict[str, Any], seeding_order: List[str], run: SeedRun
+) -> bool:
+    """Seed lần lượt từng bảng trên một kết nối, trong một transaction duy nhất."""
+    with db_engine.connect() as connection, writers.bulk_load_session(connection):
         # Lặp qua các bảng theo đúng thứ tự đã được sắp xếp
         for table_name in seeding_order:
-            table_config = seed_config[table_name]
             try:
-                _seed_table(db_engine, connection, table_name, table_config, seeded_primary_keys)
+                with metrics.table_timer(table_name):
+                    seed_table(connection, table_name, seed_config[table_name], run)
+            except Exception as e:
+                progress.echo(f"[bold red]❌ An error occurred with table '{table_name}': {repr(e)}[/bold red]")
+                connection.rollback()
+                return False
+        if run.deferred and run.export is None:
+            try:
+                fill_deferred_relations(connection, run)
+            except Exception as e:
+                progress.echo(f"[bold red]❌ An error occurred while filling deferred relations: {repr(e)}[/bold red]")
+                connection.rollback()
+                return False
+        with metrics.phase("commit"):
+            connection.commit()
+    return True
+
+
+def _seed_table_on_own_connection(
+    db_engine: engine.Engine, table_name: str, table_config: Dict[str, Any], run: SeedRun
+) -> None:
+    """Seed một bảng trên một kết nối riêng lấy từ pool, commit khi xong để bảng con nhìn thấy dữ liệu."""
+    with db_engine.connect() as connection, writers.bulk_load_session(connection):
+        try:
+            with metrics.table_timer(table_name):
+                seed_table(connection, table_name, table_config, run)
+                with metrics.phase("commit", table_name):
+                    connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+
+
+def _seed_concurrent(
+    db_engine: engine.Engine, seed_config: Dict[str, Any], concurrency: int, run: SeedRun
+) -> bool:
+    """
+    Seed song song các bảng độc lập, mỗi bảng trên một kết nối riêng.
+    Một bảng được bắt đầu ngay khi mọi bảng cha của nó đã seed xong (và đã commit).
+    """
+    dependencies = get_table_dependencies(seed_config)
+    finished: Set[str] = set()
+    failed = False
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        running: Dict[Future, str] = {}
+        remaining = list(get_seeding_order(seed_config))
+        while remaining or running:
+            if not failed:
+                for table_name in [t for t in remaining if dependencies[t] <= finished]:
+                    remaining.remove(table_name)
+                    future = pool.submit(
+                        _seed_table_on_own_connection, db_engine, table_name, seed_config[table_name], run
+                    )
+                    running[future] = table_name
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                table_name = running.pop(future)
+                error = future.exception()
+                if error is None:
+                    finished.add(table_name)
+                else:
+                    # Không bắt đầu thêm bảng mới, chờ các bảng đang chạy kết thúc
+                    progress.echo(f"[bold red]❌ An error occurred with table '{table_name}': {repr(error)}[/bold red]")
+                    failed = True
+    if not failed and run.deferred:
+        with db_engine.connect() as connection:
+            try:
+                fill_deferred_relations(connection, run)
+                connection.commit()
             except Exception as e:
-                print(f"[bold red]❌ An error occurred with table '{table_name}': {repr(e)}[/bold red]")
+                progress.echo(f"[bold red]❌ An error occurred while filling deferred relations: {repr(e)}[/bold red]")
                 connection.rollback()
-                return
-        
+                failed = True
+    if failed:
+        progress.echo(f"[yellow]   - Tables already committed: {', '.join(sorted(finished)) or 'none'}[/yellow]")
+    return not failed
+
+
+def _plan_seed(
+    seed_config: Dict[str, Any], metadata: Optional[MetaData] = None
+) -> Optional[Tuple[List[str], List[Tuple[str, str]]]]:
+    """
+    Xác định thứ tự seed (cùng các quan hệ được hoãn sang lượt thứ hai) và kiểm tra cấu hình cột/quan hệ
+    của mọi bảng trước khi ghi bất kỳ dữ liệu nào. Trả về None (sau khi in lỗi) nếu cấu hình không hợp lệ.
+    """
+    def is_nullable(table_name: str, column: str) -> bool:
+        table = metadata.tables.get(table_name) if metadata is not None else None
+        return table is not None and column in table.c and table.c[column].nullable
+
+    try:
+        # Lấy thứ tự seed chính xác từ resolver
+        progress.echo("   - Resolving table seeding order...")
+        seeding_levels, deferred = get_seeding_plan(seed_config, is_nullable)
+        seeding_order = [table for level in seeding_levels for table in level]
+        progress.echo(f"   - Determined order: [yellow]{' -> '.join(' | '.join(level) for level in seeding_levels)}[/yellow]")
+        if deferred:
+            edges = ", ".join(f"{table}.{column}" for table, column in deferred)
+            progress.echo(f"   - Deferred to a second pass: [yellow]{edges}[/yellow]")
+    except ValueError as e:
+        progress.echo(f"[bold red]❌ Error resolving dependencies: {e}[/bold red]")
+        return None
+
+    try:
+        # Biên dịch cấu hình cột của mọi bảng trước khi seed để phát hiện provider sai sớm
+        for table_name, table_config in seed_config.items():
+            faker_manager.compile_plan(table_config.get("columns", {}))
+            for rel_info in table_config.get("relations", {}).values():
+                fk_sampler.validate_relation(rel_info)
+    except ValueError as e:
+        progress.echo(f"[bold red]❌ Invalid column configuration for table '{table_name}': {e}[/bold red]")
+        return None
+    return seeding_order, deferred
+
+
+def _parent_tables(seed_config: Dict[str, Any]) -> Set[str]:
+    return {
+        rel_info.get("table")
+        for table_config in seed_config.values()
+        for rel_info in table_config.get("relations", {}).values()
+    }
+
+
+def _tables_to_reflect(seeding_order: List[str], parent_tables: Set[str]) -> List[str]:
+    """Các bảng cần seed, cùng các bảng cha chỉ được đọc (không seed trong lần chạy này)."""
+    return seeding_order + sorted(name for name in parent_tables - set(seeding_order) if name)
+
+
+class SeedPlan(NamedTuple):
+    """Kết quả chuẩn bị một lần seed: cấu hình của lượt thứ nhất (không có quan hệ hoãn), thứ tự và metadata."""
+    seed_config: Dict[str, Any]
+    seeding_order: List[str]
+    parent_tables: Set[str]
+    metadata: MetaData
+    deferred: Dict[Tuple[str, str], Dict[str, Any]]
+
+
+def _discover_relations(config: Dict[str, Any], metadata: MetaData) -> Dict[str, Any]:
+    """
+    Gộp các quan hệ lấy từ khóa ngoại đã reflect vào mục `seed` (tắt bằng `discover_relations: false`).
+    Cấu hình luôn được ưu tiên, xem dependency_resolver.merge_relations.
+    """
+    seed_config = config["seed"]
+    discovered = relations_from_metadata(metadata) if config.get("discover_relations", True) else {}
+    merged = merge_relations(seed_config, discovered)
+    added = [
+        f"{table_name}.{fk_col} -> {rel_info['table']}"
+        for table_name, table_config in merged.items()
+        for fk_col, rel_info in table_config["relations"].items()
+        if fk_col not in (seed_config[table_name].get("relations") or {})
+    ]
+    if added:
+        progress.echo(f"   - Discovered {len(added)} relation(s) from foreign keys: [yellow]{', '.join(added)}[/yellow]")
+    return merged
+
+
+def prepare_seed(config: Dict[str, Any], db_engine: engine.Engine) -> Optional[SeedPlan]:
+    """
+    Reflect các bảng cần seed một lần (dùng chung qua schema cache), gộp quan hệ từ khóa ngoại,
+    rồi xác định thứ tự seed. Trả về None (sau khi in lỗi) nếu cấu hình không hợp lệ.
+    """
+    cache_dir = schema_cache.cache_dir_from_config(config)
+    # Reflect cũng lấy luôn các bảng được khóa ngoại tham chiếu tới
+    metadata = schema_cache.get_metadata(db_engine, list(config["seed"]), cache_dir)
+    seed_config = _discover_relations(config, metadata)
+    planned = _plan_seed(seed_config, metadata)
+    if planned is None:
+        return None
+    seeding_order, deferred = planned
+
+    # Bảng có quan hệ hoãn cần giữ lại khóa chính của các dòng mới cho lượt thứ hai
+    parent_tables = _parent_tables(seed_config) | {table_name for table_name, _ in deferred}
+    metadata = schema_cache.get_metadata(db_engine, _tables_to_reflect(seeding_order, parent_tables), cache_dir)
+    return SeedPlan(
+        seed_config=without_relations(seed_config, deferred),
+        seeding_order=seeding_order,
+        parent_tables=parent_tables,
+        metadata=metadata,
+        deferred={(table_name, column): seed_config[table_name]["relations"][column] for table_name, column in deferred},
+    )
+
+
+def process_seed(
+    config: Dict[str, Any],
+    db_engine: engine.Engine,
+    workers: Optional[int] = None,
+    output: Optional[str] = None,
+    output_format: str = "csv",
+) -> bool:
+    """
+    Hàm chính điều phối toàn bộ quá trình seeding.
+    `workers` > 1 sẽ sinh dữ liệu giả song song trên nhiều tiến trình.
+    `table_concurrency` > 1 trong config sẽ seed song song các bảng độc lập
+    (mỗi bảng commit riêng thay vì một transaction cho cả lần chạy).
+    `output` là thư mục: dữ liệu được ghi ra file (mỗi bảng một file, theo thứ tự phụ thuộc)
+    thay vì vào database, để nạp lại sau bằng `db-tools load`.
+    Trả về False nếu có lỗi (lỗi đã được in ra), True nếu thành công hoặc không có gì để seed.
+    """
+    seed_config = config.get("seed")
+    if not seed_config:
+        progress.echo("[yellow]No 'seed' configuration found. Skipping.[/yellow]")
+        return True
+
+    progress.echo("\n[bold cyan]🌱 Starting relational data seeding process...[/bold cyan]")
+    plan = prepare_seed(config, db_engine)
+    if plan is None:
+        return False
+    seed_config, seeding_order = plan.seed_config, plan.seeding_order
+
+    export = None
+    if output:
+        from db_tools.core import exporters
+        try:
+            export = exporters.SeedExport(output, output_format, db_engine.dialect)
+        except (ValueError, RuntimeError) as e:
+            progress.echo(f"[bold red]❌ {e}[/bold red]")
+            return False
+        progress.echo(f"   - Writing {output_format} files to [yellow]'{output}'[/yellow] instead of the database.")
+        if plan.deferred:
+            columns = ", ".join(f"{table_name}.{column}" for table_name, column in plan.deferred)
+            progress.echo(f"[yellow]   - Deferred relations are left empty in the output files: {columns}[/yellow]")
+
+    concurrency = int(config.get("table_concurrency", 1))
+    if export is not None:
+        # Các file được ghi theo đúng thứ tự phụ thuộc
+        concurrency = 1
+    elif concurrency > 1 and db_engine.dialect.name == "sqlite":
+        # SQLite chỉ cho phép một writer tại một thời điểm
+        progress.echo("[yellow]   - SQLite does not support concurrent writers, seeding tables one at a time.[/yellow]")
+        concurrency = 1
+
+    workers = workers or config.get("workers", 1)
+
+    with parallel.generation_pool(workers) as executor:
+        run = SeedRun(
+            metadata=plan.metadata,
+            parent_tables=plan.parent_tables,
+            deferred=plan.deferred,
+            executor=executor,
+            seed=config.get("faker_seed"),
+            show_progress=concurrency <= 1,
+            export=export,
+        )
+        success = False
+        try:
+            if concurrency <= 1:
+                success = _seed_sequential(db_engine, seed_config, seeding_order, run)
+            else:
+                success = _seed_concurrent(db_engine, seed_config, concurrency, run)
+        finally:
+            if export is not None:
+                export.close(write_manifest=success)
+
+    if success and export is not None:
+        progress.echo(f"\n[bold green]🎉 All tables written to '{output}'! Load them with `db-tools load {output}`.[/bold green]")
+    elif success:
+        progress.echo("\n[bold green]🎉 All tables seeded successfully![/bold green]")
+    return success
+
+
+def supports_update_from(db_engine: engine.Engine) -> bool:
+    """SQLite chỉ hỗ trợ UPDATE ... FROM từ bản 3.33 trở đi."""
+    if db_engine.dialect.name == "sqlite":
+        import sqlite3
+        return sqlite3.sqlite_version_info >= (3, 33, 0)
+    return True
+
+
+def create_staging_table(connection, table: Table, columns: List[str]) -> Table:
+    """
+    Tạo bảng tạm (staging) chứa khóa chính và các cột cần ẩn danh hóa.
+    Mỗi batch được ghi vào đây bằng executemany rồi áp vào bảng gốc bằng một câu UPDATE ... FROM.
+    """
+    primary_key_col = table.primary_key.columns.values()[0]
+    name = f"_db_tools_stage_{table.name}"
+    prefixes = ["TEMPORARY"]
+    if connection.dialect.name == "mssql":
+        # SQL Server dùng tiền tố '#' thay cho từ khóa TEMPORARY
+        name, prefixes = f"#{name}", []
+    staging = Table(
+        name,
+        MetaData(),
+        Column(primary_key_col.name, primary_key_col.type, primary_key=True),
+        *[Column(col, table.c[col].type) for col in columns],
+        prefixes=prefixes,
+    )
+    staging.drop(connection, checkfirst=True)
+    staging.create(connection)
+    return staging
+
+
+def apply_anonymize_batch(
+    connection,
+    table: Table,
+    staging: Optional[Table],
+    batch: List[Dict[str, Any]],
+    columns: List[str],
+) -> None:
+    """Áp một batch dữ liệu giả vào bảng gốc bằng đúng một câu lệnh."""
+    primary_key_col = table.primary_key.columns.values()[0]
+    if staging is None:
+        # Fallback: executemany một câu UPDATE có tham số
+        stmt = (
+            update(table)
+            .where(primary_key_col == bindparam("_pk"))
+            .values({col: bindparam(f"_v_{col}") for col in columns})
+        )
+        params = [
+            {"_pk": row[primary_key_col.name], **{f"_v_{col}": row[col] for col in columns}}
+            for row in batch
+        ]
+        connection.execute(stmt, params)
+        return
+
+    connection.execute(delete(staging))
+    connection.execute(insert(staging), batch)
+    stmt = (
+        update(table)
+        .values({col: staging.c[col] for col in columns})
+        .where(primary_key_col == staging.c[primary_key_col.name])
+    )
+    connection.execute(stmt)
+
+
+@dataclass
+class AnonymizeRun:
+    """Trạng thái dùng chung của một lần ẩn danh hóa, được truyền cho từng bảng."""
+    executor: Optional[Executor] = None
+    seed: Optional[int] = None
+    checkpoint: Optional[AnonymizeCheckpoint] = None
+    # Khóa bí mật cho các cột ẩn danh hóa tất định
+    hash_key: Optional[bytes] = None
+    # Bỏ qua trạng thái của chế độ tăng dần, xử lý lại toàn bộ các bảng (`anonymize --full`)
+    full_refresh: bool = False
+
+
+def anonymize_key(config: Dict[str, Any]) -> Optional[bytes]:
+    """Khóa cho chế độ tất định: `anonymize_key` trong config hoặc biến môi trường DB_TOOLS_ANONYMIZE_KEY."""
+    key = os.environ.get(ANONYMIZE_KEY_ENV) or config.get("anonymize_key")
+    return str(key).encode("utf-8") if key else None
+
+
+def split_anonymize_columns(columns_to_anonymize: Dict[str, Dict[str, Any]]):
+    """Cột ngẫu nhiên được sinh trước theo chunk; cột tất định được tính từ giá trị gốc của từng batch."""
+    random_config = {
+        col: spec for col, spec in columns_to_anonymize.items() if not faker_manager.is_deterministic(spec)
+    }
+    deterministic_config = {
+        col: spec for col, spec in columns_to_anonymize.items() if faker_manager.is_deterministic(spec)
+    }
+    return random_config, deterministic_config
+
+
+def build_anonymize_batch(
+    batch_rows: List[Any],
+    fake_chunks: Iterator[List[Dict[str, Any]]],
+    random_config: Dict[str, Any],
+    deterministic_config: Dict[str, Any],
+    primary_key_name: str,
+    run: AnonymizeRun,
+) -> List[Dict[str, Any]]:
+    """Ghép khóa chính của batch với dữ liệu giả (ngẫu nhiên và tất định) thành các dòng để UPDATE."""
+    fake_rows = next(fake_chunks, None)
+    if fake_rows is None:
+        # Bảng có thêm dòng mới kể từ lúc đếm (hoặc không có cột ngẫu nhiên nào)
+        fake_rows = faker_manager.generate_bulk_data(len(batch_rows), random_config)
+    if deterministic_config:
+        originals = {
+            col: [row[index] for row in batch_rows]
+            for index, col in enumerate(deterministic_config, start=1)
+        }
+        derived_rows = parallel.derive_chunk(deterministic_config, originals, run.hash_key, run.executor)
+    else:
+        derived_rows = itertools.repeat({})
+    return [
+        {primary_key_name: row[0], **fake_row, **derived_row}
+        for row, fake_row, derived_row in zip(batch_rows, fake_rows, derived_rows)
+    ]
+
+
+def _changed_rows(connection, table: Table, batch_rows: List[Any], hash_columns: List[str]) -> List[Any]:
+    """Chế độ tăng dần `hash`: chỉ giữ các dòng có hash các cột ẩn danh khác với hash đã lưu (dòng mới hoặc đã đổi)."""
+    stored = incremental.stored_hashes(connection, table.name, [row[0] for row in batch_rows])
+    changed = [
+        row for row in batch_rows
+        if stored.get(str(row[0])) != incremental.row_hash([row._mapping[col] for col in hash_columns])
+    ]
+    metrics.count("skipped_rows", len(batch_rows) - len(changed), table.name)
+    return changed
+
+
+def _record_row_hashes(
+    connection, table: Table, keys: List[Any], rule_expressions: Dict[str, Any], hash_columns: List[str]
+) -> None:
+    """
+    Chế độ tăng dần `hash`: áp các quy tắc SQL cho riêng các dòng của batch, rồi đọc lại giá trị đã ẩn danh
+    để lưu hash của chúng (cùng transaction với batch).
+    """
+    primary_key_col = scanner.primary_key_column(table)
+    if rule_expressions:
+        pushdown.apply_rules(connection, table, rule_expressions, where=primary_key_col.in_(keys))
+    rows = connection.execute(
+        select(primary_key_col, *[table.c[col] for col in hash_columns]).where(primary_key_col.in_(keys))
+    ).all()
+    incremental.save_hashes(connection, table.name, {str(row[0]): incremental.row_hash(row[1:]) for row in rows})
+
+
+def _anonymize_in_batches(
+    db_engine: engine.Engine,
+    connection,
+    table: Table,
+    columns_to_anonymize: Dict[str, Dict[str, Any]],
+    table_config: Dict[str, Any],
+    run: AnonymizeRun,
+    fingerprint: str,
+    saved: Optional[Dict[str, Any]],
+    changes: Optional[incremental.IncrementalPlan] = None,
+    rule_expressions: Optional[Dict[str, Any]] = None,
+) -> int:
+    """
+    Ẩn danh hóa các cột Faker theo từng batch, commit sau mỗi batch. Trả về số dòng đã xử lý.
+    Bảng được duyệt theo keyset trên khóa chính nên bộ nhớ không phụ thuộc vào kích thước bảng.
+    Sau mỗi batch đã commit, tiến độ được ghi vào checkpoint để có thể resume.
+    Với chế độ tăng dần (`changes`), chỉ các dòng mới hơn watermark, hoặc có hash khác hash đã lưu, được xử lý.
+    """
+    table_name = table.name
+    primary_key_col = scanner.primary_key_column(table)
+    columns = list(columns_to_anonymize)
+    random_config, deterministic_config = split_anonymize_columns(columns_to_anonymize)
+    start_after = saved["last_pk"] if saved else None
+    start_batch = saved["batch"] if saved else 0
+    processed = saved["processed"] if saved else 0
+    where = changes.where if changes else None
+    hash_columns = changes.hash_columns if changes and changes.mode == "hash" else []
+
+    count_stmt = select(func.count()).select_from(table)
+    if start_after is not None:
+        count_stmt = count_stmt.where(primary_key_col > start_after)
+        progress.echo(f"   - Resuming '{table_name}' after key {start_after!r} (batch {start_batch})...")
+    if where is not None:
+        count_stmt = count_stmt.where(where)
+    total = connection.execute(count_stmt).scalar_one()
+    if not total:
+        return processed
+    batch_size = int(table_config.get("batch_size", DEFAULT_BATCH_SIZE))
+    expected_batches = (total + batch_size - 1) // batch_size
+    staging = None
+
+    if where is not None:
+        progress.echo(f"   - Incremental: {total} records changed since the last run ('{changes.column}').")
+    if hash_columns:
+        progress.echo(f"   - Incremental: comparing {total} records with the hashes of the last run...")
+    progress.echo(f"   - Anonymizing {total} records in batches of {batch_size}...")
+    # Dữ liệu giả cho các batch tiếp theo được sinh song song trong lúc batch hiện tại đang được ghi
+    fake_chunks = parallel.generate_chunks(
+        random_config, itertools.repeat(batch_size, expected_batches if random_config else 0),
+        run.executor, seed=run.seed, stream_key=f"anonymize:{table_name}", start_index=start_batch,
+    )
+    # Giá trị gốc của các cột tất định được đọc cùng khóa chính trong mỗi batch
+    # (và giá trị hiện tại của các cột được hash trong chế độ tăng dần `hash`)
+    source_columns = [primary_key_col] + [table.c[col] for col in deterministic_config]
+    source_columns += [table.c[col] for col in hash_columns if col not in deterministic_config]
+    batches = metrics.timed("read", scanner.scan_keyset(
+        connection, table, batch_size, columns=source_columns, start_after=start_after, where=where
+    ), table_name)
+    try:
+        if columns and supports_update_from(db_engine):
+            staging = create_staging_table(connection, table, columns)
+        batches = progress.track(batches, table_name, "anonymize", total, f"Anonymizing '{table_name}'...")
+        for batch_index, batch_rows in enumerate(batches, start=start_batch):
+            last_pk = batch_rows[-1][0]
+            if hash_columns:
+                with metrics.phase("diff", table_name):
+                    batch_rows = _changed_rows(connection, table, batch_rows, hash_columns)
+            if batch_rows:
+                if columns:
+                    with metrics.phase("generate", table_name):
+                        batch = build_anonymize_batch(
+                            batch_rows, fake_chunks, random_config, deterministic_config, primary_key_col.name, run
+                        )
+                    with metrics.phase("write", table_name):
+                        apply_anonymize_batch(connection, table, staging, batch, columns)
+                if hash_columns:
+                    with metrics.phase("write", table_name):
+                        _record_row_hashes(
+                            connection, table, [row[0] for row in batch_rows], rule_expressions or {}, hash_columns
+                        )
+                with metrics.phase("commit", table_name):
+                    connection.commit()
+            processed += len(batch_rows)
+            metrics.count("rows", len(batch_rows), table_name)
+            metrics.count("batches", 1, table_name)
+            if run.checkpoint:
+                run.checkpoint.mark_batch(table_name, fingerprint, last_pk, batch_index + 1, processed)
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        if staging is not None:
+            staging.drop(connection, checkfirst=True)
+            connection.commit()
+    return processed
+
+
+class TablePlan(NamedTuple):
+    """Việc cần làm cho một bảng: các cột Faker (đi qua batch), các quy tắc SQL, và trạng thái checkpoint."""
+    columns_to_anonymize: Dict[str, Dict[str, Any]]
+    rule_expressions: Dict[str, Any]
+    fingerprint: str
+    saved: Optional[Dict[str, Any]]
+    # Cấu hình `incremental` của bảng (None: xử lý toàn bộ bảng mỗi lần chạy)
+    incremental_spec: Optional[Dict[str, Any]] = None
+
+
+def plan_anonymize_table(
+    db_engine: engine.Engine, table: Table, table_config: Dict[str, Any], run: AnonymizeRun
+) -> Union[TablePlan, int]:
+    """
+    Kiểm tra cấu hình của bảng và chia cột thành cột Faker và quy tắc SQL (pushdown).
+    Trả về số dòng (0, hoặc số dòng đã xử lý theo checkpoint) nếu bảng được bỏ qua.
+    """
+    table_name = table.name
+    configured = {col: spec for col, spec in table_config.get("columns", {}).items() if col in table.c}
+    rules_config = {col: spec for col, spec in configured.items() if pushdown.is_pushdown(spec)}
+    columns_to_anonymize = {
+        col: faker_manager.parse_column_spec(spec)
+        for col, spec in configured.items()
+        if col not in rules_config
+    }
+    if table_config.get("deterministic"):
+        # `deterministic: true` ở cấp bảng áp dụng cho mọi cột Faker của bảng
+        for spec in columns_to_anonymize.values():
+            spec.setdefault("deterministic", True)
+    # Provider hay quy tắc không hợp lệ bị từ chối ngay, trước khi ghi bất kỳ dữ liệu nào
+    faker_manager.compile_plan(columns_to_anonymize, hash_key=run.hash_key)
+    rule_expressions = pushdown.compile_rules(table, rules_config, db_engine.dialect.name)
+    incremental_spec = incremental.parse_spec(table, table_config)
+    if not columns_to_anonymize and not rule_expressions:
+        progress.echo(f"[yellow]   - No columns to anonymize in '{table_name}'. Skipping.[/yellow]")
+        return 0
+    if columns_to_anonymize and scanner.primary_key_column(table) is None:
+        progress.echo(f"[bold red]❌ Error: Table '{table_name}' has no primary key.[/bold red]")
+        return 0
+
+    fingerprint = config_fingerprint(table_config)
+    saved = run.checkpoint.table_state(table_name, fingerprint) if run.checkpoint else None
+    if saved and saved["status"] == "done":
+        progress.echo(f"[yellow]   - '{table_name}' was already anonymized (checkpoint). Skipping.[/yellow]")
+        return saved["processed"]
+    return TablePlan(columns_to_anonymize, rule_expressions, fingerprint, saved, incremental_spec)
+
+
+def finish_anonymize_table(
+    connection,
+    table: Table,
+    plan: TablePlan,
+    processed: int,
+    run: AnonymizeRun,
+    changes: Optional[incremental.IncrementalPlan] = None,
+) -> int:
+    """
+    Áp các quy tắc SQL (sau các batch Faker, để template dùng được giá trị đã ẩn danh) rồi đánh dấu bảng đã xong.
+    Trong chế độ tăng dần, trạng thái (watermark) của bảng được lưu lại cho lần chạy sau.
+    """
+    table_name = table.name
+    # Chế độ `hash` đã áp các quy tắc theo từng batch, chỉ trên các dòng đã thay đổi
+    rule_expressions = plan.rule_expressions if not (changes and changes.mode == "hash") else {}
+    if rule_expressions:
+        progress.echo(f"   - Applying {len(rule_expressions)} SQL rule(s) to '{table_name}' in the database...")
+        try:
+            with metrics.phase("write", table_name):
+                updated = pushdown.apply_rules(
+                    connection, table, rule_expressions, where=changes.where if changes else None
+                )
+            with metrics.phase("commit", table_name):
+                connection.commit()
+            metrics.count("pushdown_rows", updated, table_name)
+            if not plan.columns_to_anonymize:
+                metrics.count("rows", updated, table_name)
+        except Exception:
+            connection.rollback()
+            raise
+        processed = max(processed, updated)
+    if changes:
+        incremental.save_state(connection, table_name, changes, plan.fingerprint)
         connection.commit()
-        print("\n[bold green]🎉 All tables seeded successfully![/bold green]")
+        if not processed:
+            progress.echo(f"[yellow]   - No changed records in '{table_name}' since the last run.[/yellow]")
+    if not processed:
+        if not changes:
+            progress.echo(f"[yellow]   - No records found in '{table_name}'. Skipping.[/yellow]")
+        return 0
+    if run.checkpoint:
+        run.checkpoint.mark_done(table_name, plan.fingerprint, processed)
+    return processed
+
+
+def _anonymize_table(
+    db_engine: engine.Engine,
+    connection,
+    table: Table,
+    table_config: Dict[str, Any],
+    run: AnonymizeRun,
+) -> int:
+    """
+    Ẩn danh hóa một bảng. Trả về số dòng đã xử lý.
+
+    Các cột có `rule` (null, constant, hash, mask, template, random_int) được đẩy xuống database
+    thành một câu `UPDATE table SET ...` duy nhất; chỉ các cột thật sự cần Faker mới đi qua
+    đường batch trong Python. Câu UPDATE chạy sau cùng nên template có thể dùng giá trị đã ẩn danh.
+    """
+    plan = plan_anonymize_table(db_engine, table, table_config, run)
+    if not isinstance(plan, TablePlan):
+        return plan
+    changes = None
+    if plan.incremental_spec:
+        changes = incremental.plan_table(
+            connection, table, plan.incremental_spec, plan.fingerprint,
+            list(plan.columns_to_anonymize) + list(plan.rule_expressions), run.full_refresh,
+        )
+    processed = 0
+    if plan.columns_to_anonymize or (changes and changes.mode == "hash"):
+        processed = _anonymize_in_batches(
+            db_engine, connection, table, plan.columns_to_anonymize, table_config, run, plan.fingerprint, plan.saved,
+            changes, plan.rule_expressions,
+        )
+    return finish_anonymize_table(connection, table, plan, processed, run, changes)
 
 
-def process_anonymize(config: Dict[str, Any], db_engine: engine.Engine):
+def process_anonymize(
+    config: Dict[str, Any],
+    db_engine: engine.Engine,
+    workers: Optional[int] = None,
+    resume: bool = False,
+    full: bool = False,
+) -> bool:
+    """
+    Hàm chính điều phối quá trình ẩn danh hóa.
+    `resume` = True sẽ tiếp tục từ checkpoint của lần chạy bị gián đoạn trước đó.
+    `full` = True bỏ qua trạng thái của các bảng có `incremental` và xử lý lại toàn bộ các dòng.
+    Trả về False nếu có bảng bị lỗi hoặc không tồn tại (lỗi đã được in ra).
+    """
     anonymize_config = config.get("anonymize")
     if not anonymize_config:
-        print("[yellow]No 'anonymize' configuration found. Skipping.[/yellow]")
-        return
-    print("\n[bold cyan]🎭 Starting data anonymization process...[/bold cyan]")
-    metadata = MetaData()
-    inspector = inspect(db_engine)
-    with db_engine.connect() as connection:
+        progress.echo("[yellow]No 'anonymize' configuration found. Skipping.[/yellow]")
+        return True
+    progress.echo("\n[bold cyan]🎭 Starting data anonymization process...[/bold cyan]")
+    metadata = schema_cache.get_metadata(
+        db_engine, list(anonymize_config), schema_cache.cache_dir_from_config(config)
+    )
+    workers = workers or config.get("workers", 1)
+    checkpoint = AnonymizeCheckpoint.for_engine(db_engine, config.get("checkpoint_dir"), resume)
+    failed = False
+    missing = False
+    with parallel.generation_pool(workers) as executor, db_engine.connect() as connection:
+        run = AnonymizeRun(
+            executor=executor,
+            seed=config.get("faker_seed"),
+            checkpoint=checkpoint,
+            hash_key=anonymize_key(config),
+            full_refresh=full,
+        )
         for table_name, table_config in anonymize_config.items():
             try:
-                if not inspector.has_table(table_name):
-                    print(f"[bold red]❌ Error: Table '{table_name}' does not exist in the database.[/bold red]")
+                table = metadata.tables.get(table_name)
+                if table is None:
+                    progress.echo(f"[bold red]❌ Error: Table '{table_name}' does not exist in the database.[/bold red]")
+                    missing = True
                     continue
-                table = Table(table_name, metadata, autoload_with=db_engine)
-                primary_key_col = table.primary_key.columns.values()[0]
-                p_keys = connection.execute(select(primary_key_col)).scalars().all()
-                if not p_keys:
-                    print(f"[yellow]   - No records found in '{table_name}'. Skipping.[/yellow]")
-                    continue
-                columns_to_anonymize = table_config.get("columns", {})
-                print(f"   - Anonymizing {len(p_keys)} records...")
-                for pk_value in track(p_keys, description=f"Anonymizing '{table_name}'..."):
-                    new_fake_data = faker_manager.generate_fake_row(columns_to_anonymize)
-                    stmt = (
-                        update(table)
-                        .where(primary_key_col == pk_value)
-                        .values(**new_fake_data)
-                    )
-                    connection.execute(stmt)
-                connection.commit()
-                print(f"[bold green]✅ Anonymized {len(p_keys)} records in '{table_name}' successfully![/bold green]")
+                with metrics.table_timer(table_name):
+                    processed = _anonymize_table(db_engine, connection, table, table_config, run)
+                if processed:
+                    progress.echo(f"[bold green]✅ Anonymized {processed} records in '{table_name}' successfully![/bold green]")
             except Exception as e:
-                print(f"[bold red]❌ An error occurred with table '{table_name}': {repr(e)}[/bold red]")
\ No newline at end of file
+                connection.rollback()
+                failed = True
+                progress.echo(f"[bold red]❌ An error occurred with table '{table_name}': {repr(e)}[/bold red]")
+
+    if failed:
+        progress.echo("[yellow]Progress was saved. Run 'anonymize --resume' to continue where it stopped.[/yellow]")
+    else:
+        checkpoint.clear()
+    return not failed and not missing
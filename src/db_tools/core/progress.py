@@ -0,0 +1,170 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import (Callable, Deque, Dict, Iterable, Iterator, List, Optional,
+                    Sized, TypeVar, Union)
+
+from rich import print
+from rich.progress import Progress
+
+S = TypeVar("S", bound=Sized)
+
+
+@dataclass(frozen=True)
+class TaskStarted:
+    """Bắt đầu xử lý một bảng (`operation` là "seed" hoặc "anonymize"); `total` là số dòng dự kiến."""
+    table: str
+    operation: str
+    total: int
+
+
+@dataclass(frozen=True)
+class TaskProgress:
+    table: str
+    operation: str
+    done: int
+    total: int
+    rows_per_sec: float
+
+
+@dataclass(frozen=True)
+class TaskFinished:
+    table: str
+    operation: str
+    done: int
+    seconds: float
+
+
+@dataclass(frozen=True)
+class LogLine:
+    """Một thông báo (rich markup) thay cho print."""
+    message: str
+
+
+ProgressEvent = Union[TaskStarted, TaskProgress, TaskFinished, LogLine]
+
+
+class ProgressChannel:
+    """
+    Kênh sự kiện giữa tác vụ (producer, trên thread bất kỳ) và giao diện (consumer).
+
+    `publish` không bao giờ chặn. Các TaskProgress của cùng một bảng được gộp lại: chỉ giữ bản mới nhất,
+    nên consumer gọi `drain()` ở tần số của nó (ví dụ 10 lần/giây) nhận tối đa một cập nhật mỗi bảng.
+    Các sự kiện còn lại nằm trong hàng đợi có giới hạn; khi đầy, thông báo cũ nhất bị bỏ và được đếm lại.
+    """
+
+    def __init__(self, max_events: int = 1000) -> None:
+        self._events: Deque[ProgressEvent] = deque()
+        self._max_events = max_events
+        self._progress: Dict[str, TaskProgress] = {}
+        self._dropped = 0
+        self._lock = threading.Lock()
+
+    def publish(self, event: ProgressEvent) -> None:
+        with self._lock:
+            if isinstance(event, TaskProgress):
+                self._progress[event.table] = event
+                return
+            if isinstance(event, TaskFinished):
+                # Sự kiện kết thúc thay thế mọi cập nhật tiến độ còn chờ của bảng
+                self._progress.pop(event.table, None)
+            if len(self._events) >= self._max_events:
+                self._drop_oldest_log()
+            self._events.append(event)
+
+    def _drop_oldest_log(self) -> None:
+        for index, queued in enumerate(self._events):
+            if isinstance(queued, LogLine):
+                del self._events[index]
+                self._dropped += 1
+                return
+        # Hàng đợi toàn sự kiện bắt đầu/kết thúc: bỏ sự kiện cũ nhất
+        self._events.popleft()
+        self._dropped += 1
+
+    def drain(self) -> List[ProgressEvent]:
+        """Lấy toàn bộ sự kiện đang chờ, theo thứ tự; tiến độ mới nhất của mỗi bảng nằm cuối cùng."""
+        with self._lock:
+            events: List[ProgressEvent] = list(self._events)
+            self._events.clear()
+            events.extend(self._progress.values())
+            self._progress.clear()
+            dropped, self._dropped = self._dropped, 0
+        if dropped:
+            events.insert(0, LogLine(f"[yellow]... {dropped} message(s) dropped[/yellow]"))
+        return events
+
+
+# Kênh đang được gắn (ví dụ bởi TUI); None nghĩa là in thẳng ra terminal
+_channel: Optional[ProgressChannel] = None
+
+
+@contextmanager
+def attach(channel: ProgressChannel) -> Iterator[ProgressChannel]:
+    """Gửi mọi thông báo và tiến độ vào `channel` thay vì terminal trong khối lệnh."""
+    global _channel
+    previous, _channel = _channel, channel
+    try:
+        yield channel
+    finally:
+        _channel = previous
+
+
+def echo(message: str) -> None:
+    """In một thông báo (rich markup), hoặc gửi nó vào kênh đang được gắn."""
+    channel = _channel
+    if channel is None:
+        print(message)
+    else:
+        channel.publish(LogLine(message))
+
+
+@contextmanager
+def task(
+    table: str, operation: str, total: int, description: str, show_bar: bool = True
+) -> Iterator[Callable[[int], None]]:
+    """
+    Báo tiến độ của một tác vụ theo số dòng; khối lệnh nhận hàm `advance(rows)`.
+    Khi có kênh: phát TaskStarted/TaskProgress/TaskFinished. Khi không: hiện thanh tiến trình của rich.
+    """
+    channel = _channel
+    if channel is None:
+        if not show_bar:
+            yield lambda rows: None
+            return
+        with Progress() as bar:
+            bar_task = bar.add_task(description, total=total)
+            yield lambda rows: bar.advance(bar_task, rows)
+        return
+
+    start = time.perf_counter()
+    done = 0
+
+    def advance(rows: int) -> None:
+        nonlocal done
+        done += rows
+        elapsed = time.perf_counter() - start
+        channel.publish(TaskProgress(table, operation, done, total, done / elapsed if elapsed else 0.0))
+
+    channel.publish(TaskStarted(table, operation, total))
+    try:
+        yield advance
+    finally:
+        channel.publish(TaskFinished(table, operation, done, time.perf_counter() - start))
+
+
+def track(
+    chunks: Iterable[S],
+    table: str,
+    operation: str,
+    total: int,
+    description: str,
+    show_bar: bool = True,
+) -> Iterator[S]:
+    """Duyệt các chunk/batch và báo tiến độ theo số dòng (len của mỗi phần tử), sau khi phần tử đã được xử lý."""
+    with task(table, operation, total, description, show_bar) as advance:
+        for chunk in chunks:
+            yield chunk
+            advance(len(chunk))
@@ -0,0 +1,169 @@
+import hashlib
+import string
+import sys
+from typing import Any, Dict, Optional
+
+from sqlalchemy import (Integer, String, Table, case, cast, func, literal,
+                        literal_column, null, update)
+from sqlalchemy.sql.elements import ColumnElement
+
+# Các quy tắc có thể chạy hoàn toàn trong database, không cần kéo dữ liệu về Python:
+#   phone:    {rule: null}
+#   status:   {rule: constant, value: "n/a"}
+#   password: {rule: hash, salt: "..."}            -> md5(salt || cột)
+#   ssn:      {rule: mask, keep_last: 4, char: "*"}
+#   email:    {rule: template, template: "user_{id}@example.com"}
+#   age:      {rule: random_int, min: 18, max: 90}
+PUSHDOWN_RULES = ("null", "constant", "hash", "mask", "template", "random_int")
+
+# Hàm SQL được đăng ký trên kết nối SQLite (vốn không có md5 hay repeat)
+_SQLITE_MASK_FUNCTION = "db_tools_mask"
+
+
+def is_pushdown(spec: Any) -> bool:
+    """Cấu hình cột là một quy tắc SQL (có key `rule`) thay vì một Faker provider."""
+    return isinstance(spec, dict) and "rule" in spec
+
+
+def _as_text(expr) -> ColumnElement:
+    return cast(expr, String)
+
+
+def _length(expr, dialect_name: str) -> ColumnElement:
+    if dialect_name == "mysql":
+        return func.char_length(expr)
+    if dialect_name == "mssql":
+        return func.len(expr)
+    return func.length(expr)
+
+
+def _hash_expr(column, spec: Dict[str, Any], dialect_name: str) -> ColumnElement:
+    value = _as_text(column)
+    if spec.get("salt"):
+        value = literal(str(spec["salt"]), String) + value
+    if dialect_name in ("postgresql", "mysql", "sqlite"):
+        return func.md5(value, type_=String)
+    if dialect_name == "mssql":
+        return func.lower(
+            func.convert(literal_column("VARCHAR(32)"), func.hashbytes("MD5", value), 2), type_=String
+        )
+    raise ValueError(f"Rule 'hash' is not supported on dialect '{dialect_name}'.")
+
+
+def _mask_expr(column, spec: Dict[str, Any], dialect_name: str) -> ColumnElement:
+    keep_last = int(spec.get("keep_last", 4))
+    char = str(spec.get("char", "*"))
+    if dialect_name == "sqlite":
+        return func.db_tools_mask(column, keep_last, char, type_=String)
+    text_value = _as_text(column)
+    masked_length = case(
+        (_length(text_value, dialect_name) > keep_last, _length(text_value, dialect_name) - keep_last),
+        else_=0,
+    )
+    if dialect_name in ("postgresql", "mysql"):
+        return func.repeat(char, masked_length, type_=String) + func.right(text_value, keep_last, type_=String)
+    if dialect_name == "mssql":
+        return func.replicate(char, masked_length, type_=String) + func.right(text_value, keep_last, type_=String)
+    raise ValueError(f"Rule 'mask' is not supported on dialect '{dialect_name}'.")
+
+
+def _template_expr(table: Table, spec: Dict[str, Any]) -> ColumnElement:
+    template = spec.get("template")
+    if not isinstance(template, str):
+        raise ValueError("Rule 'template' requires a 'template' string, e.g. 'user_{id}@example.com'.")
+    expr = None
+    for literal_text, field_name, _, _ in string.Formatter().parse(template):
+        parts = []
+        if literal_text:
+            parts.append(literal(literal_text, String))
+        if field_name:
+            if field_name not in table.c:
+                raise ValueError(f"Template refers to unknown column '{field_name}'.")
+            parts.append(_as_text(table.c[field_name]))
+        for part in parts:
+            expr = part if expr is None else expr + part
+    return expr if expr is not None else literal("", String)
+
+
+def _random_int_expr(spec: Dict[str, Any], dialect_name: str) -> ColumnElement:
+    low, high = int(spec.get("min", 0)), int(spec.get("max", 9999))
+    span = high - low + 1
+    if dialect_name == "postgresql":
+        return cast(func.floor(func.random() * span), Integer) + low
+    if dialect_name == "sqlite":
+        return func.abs(func.random(type_=Integer), type_=Integer) % span + low
+    if dialect_name == "mysql":
+        return cast(func.floor(func.rand() * span), Integer) + low
+    if dialect_name == "mssql":
+        # RAND() chỉ được tính một lần cho cả câu lệnh trên SQL Server, nên dùng NEWID()
+        return func.abs(func.checksum(func.newid()), type_=Integer) % span + low
+    raise ValueError(f"Rule 'random_int' is not supported on dialect '{dialect_name}'.")
+
+
+def compile_rule(table: Table, col_name: str, spec: Dict[str, Any], dialect_name: str) -> ColumnElement:
+    """Biên dịch quy tắc của một cột thành biểu thức SQL cho dialect tương ứng."""
+    rule = spec["rule"]
+    column = table.c[col_name]
+    if rule == "null":
+        return null()
+    if rule == "constant":
+        return literal(spec.get("value"), column.type)
+    if rule == "hash":
+        return _hash_expr(column, spec, dialect_name)
+    if rule == "mask":
+        return _mask_expr(column, spec, dialect_name)
+    if rule == "template":
+        return _template_expr(table, spec)
+    if rule == "random_int":
+        return _random_int_expr(spec, dialect_name)
+    raise ValueError(f"Unknown rule '{rule}' for column '{col_name}'. Supported rules: {', '.join(PUSHDOWN_RULES)}.")
+
+
+def compile_rules(table: Table, rules_config: Dict[str, Dict[str, Any]], dialect_name: str) -> Dict[str, ColumnElement]:
+    """Biên dịch mọi quy tắc của một bảng; lỗi cấu hình được báo ngay (ValueError)."""
+    return {
+        col_name: compile_rule(table, col_name, spec, dialect_name)
+        for col_name, spec in rules_config.items()
+    }
+
+
+def _sqlite_md5(value: Any) -> Any:
+    if value is None:
+        return None
+    return hashlib.md5(str(value).encode("utf-8")).hexdigest()
+
+
+def _sqlite_mask(value: Any, keep_last: int, char: str) -> Any:
+    if value is None:
+        return None
+    value = str(value)
+    masked_length = max(len(value) - keep_last, 0)
+    return char * masked_length + value[masked_length:]
+
+
+def _prepare_connection(connection) -> None:
+    """SQLite không có sẵn md5/repeat: đăng ký chúng như hàm SQL trên kết nối hiện tại."""
+    if connection.dialect.name != "sqlite":
+        return
+    # Kết nối DBAPI (với aiosqlite là lớp adapter của SQLAlchemy), không phải driver gốc,
+    # để việc đăng ký hàm cũng chạy được trên kết nối async
+    dbapi_connection = connection.connection.dbapi_connection
+    # Tham số `deterministic` chỉ có từ Python 3.8
+    options = {"deterministic": True} if sys.version_info >= (3, 8) else {}
+    dbapi_connection.create_function("md5", 1, _sqlite_md5, **options)
+    dbapi_connection.create_function(_SQLITE_MASK_FUNCTION, 3, _sqlite_mask, **options)
+
+
+def apply_rules(
+    connection, table: Table, expressions: Dict[str, ColumnElement], where: Optional[ColumnElement] = None
+) -> int:
+    """
+    Áp mọi quy tắc của bảng bằng một câu `UPDATE table SET ...` duy nhất. Trả về số dòng bị ảnh hưởng.
+    `where` giới hạn câu UPDATE vào một phần của bảng (chế độ tăng dần).
+    """
+    _prepare_connection(connection)
+    stmt = update(table).values(expressions)
+    if where is not None:
+        stmt = stmt.where(where)
+    result = connection.execute(stmt)
+    return result.rowcount
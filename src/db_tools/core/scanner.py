@@ -0,0 +1,93 @@
+from typing import Any, Iterator, List, Optional, Sequence
+
+from sqlalchemy import Column, Table, select
+from sqlalchemy.engine import Row
+from sqlalchemy.sql.elements import ColumnElement
+
+# Số dòng mặc định trong mỗi trang khi quét bảng
+DEFAULT_PAGE_SIZE = 1000
+
+
+def primary_key_column(table: Table) -> Optional[Column]:
+    """Cột khóa chính đầu tiên của bảng, hoặc None nếu bảng không có khóa chính."""
+    columns = table.primary_key.columns.values()
+    return columns[0] if columns else None
+
+
+def fetch_page(
+    connection,
+    table: Table,
+    after: Any = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    columns: Optional[Sequence[Column]] = None,
+    where: Optional[ColumnElement] = None,
+) -> List[Row]:
+    """
+    Lấy một trang theo keyset: `WHERE pk > :after ORDER BY pk LIMIT :limit`.
+    Chi phí mỗi trang không phụ thuộc vào vị trí trang trong bảng (khác với OFFSET).
+    `where` là điều kiện lọc thêm (ví dụ chỉ các dòng mới hơn watermark).
+    """
+    primary_key_col = primary_key_column(table)
+    if primary_key_col is None:
+        raise ValueError(f"Table '{table.name}' has no primary key, keyset pagination is not possible.")
+    stmt = select(*(columns if columns is not None else table.columns))
+    if after is not None:
+        stmt = stmt.where(primary_key_col > after)
+    if where is not None:
+        stmt = stmt.where(where)
+    stmt = stmt.order_by(primary_key_col).limit(limit)
+    return connection.execute(stmt).all()
+
+
+def scan_keyset(
+    connection,
+    table: Table,
+    batch_size: int = DEFAULT_PAGE_SIZE,
+    columns: Optional[Sequence[Column]] = None,
+    start_after: Any = None,
+    where: Optional[ColumnElement] = None,
+) -> Iterator[List[Row]]:
+    """
+    Duyệt toàn bộ bảng theo thứ tự khóa chính, từng batch, với bộ nhớ giới hạn.
+
+    Mỗi batch là một truy vấn độc lập nên vẫn an toàn khi người gọi commit giữa các batch
+    (ví dụ khi ẩn danh hóa). Khóa chính luôn được lấy kèm, là cột đầu tiên của mỗi dòng.
+    """
+    primary_key_col = primary_key_column(table)
+    if columns is not None:
+        columns = [primary_key_col] + [col for col in columns if col is not primary_key_col]
+    last_key = start_after
+    while True:
+        rows = fetch_page(connection, table, last_key, batch_size, columns, where)
+        if not rows:
+            return
+        yield rows
+        if len(rows) < batch_size:
+            return
+        last_key = rows[-1]._mapping[primary_key_col.name]
+
+
+def stream_table(
+    connection,
+    table: Table,
+    batch_size: int = DEFAULT_PAGE_SIZE,
+    columns: Optional[Sequence[Column]] = None,
+) -> Iterator[List[Row]]:
+    """
+    Đọc toàn bộ bảng (chỉ đọc) theo từng batch.
+
+    Dùng server-side cursor khi dialect hỗ trợ (một truy vấn duy nhất, dữ liệu được stream);
+    nếu không thì quay về quét keyset. Bảng không có khóa chính được đọc từ một truy vấn thường.
+    Không commit trên kết nối trong lúc đang stream.
+    """
+    primary_key_col = primary_key_column(table)
+    if primary_key_col is not None and not connection.dialect.supports_server_side_cursors:
+        yield from scan_keyset(connection, table, batch_size, columns)
+        return
+
+    stmt = select(*(columns if columns is not None else table.columns))
+    if primary_key_col is not None:
+        stmt = stmt.order_by(primary_key_col)
+    result = connection.execution_options(stream_results=True, yield_per=batch_size).execute(stmt)
+    for partition in result.partitions(batch_size):
+        yield list(partition)
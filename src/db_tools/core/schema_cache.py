@@ -0,0 +1,162 @@
+import hashlib
+import os
+import pickle
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import MetaData, Table, engine, inspect, text
+
+from db_tools.core import metrics
+
+# Thư mục mặc định lưu metadata đã reflect khi bật `schema_cache: true`
+DEFAULT_SCHEMA_CACHE_DIR = ".db_tools_cache/schema"
+
+# Metadata đã reflect trong tiến trình hiện tại, theo chuỗi kết nối
+_metadata_cache: Dict[str, MetaData] = {}
+_lock = threading.Lock()
+
+# Truy vấn rẻ để lấy "dấu vân tay" của schema, không cần reflect
+_FINGERPRINT_QUERIES = {
+    "sqlite": "SELECT type, name, tbl_name, sql FROM sqlite_master ORDER BY type, name",
+    "postgresql": (
+        "SELECT table_name, column_name, data_type, is_nullable, ordinal_position "
+        "FROM information_schema.columns WHERE table_schema = current_schema() "
+        "UNION ALL SELECT table_name, constraint_name, constraint_type, '', 0 "
+        "FROM information_schema.table_constraints WHERE table_schema = current_schema() "
+        "ORDER BY 1, 2"
+    ),
+    "mysql": (
+        "SELECT table_name, column_name, data_type, is_nullable, ordinal_position "
+        "FROM information_schema.columns WHERE table_schema = DATABASE() "
+        "UNION ALL SELECT table_name, constraint_name, constraint_type, '', 0 "
+        "FROM information_schema.table_constraints WHERE table_schema = DATABASE() "
+        "ORDER BY 1, 2"
+    ),
+    "mssql": (
+        "SELECT table_name, column_name, data_type, is_nullable, ordinal_position "
+        "FROM information_schema.columns WHERE table_schema = SCHEMA_NAME() "
+        "UNION ALL SELECT table_name, constraint_name, constraint_type, '', 0 "
+        "FROM information_schema.table_constraints WHERE table_schema = SCHEMA_NAME() "
+        "ORDER BY 1, 2"
+    ),
+}
+
+
+def cache_dir_from_config(config: Dict) -> Optional[str]:
+    """Đọc tùy chọn `schema_cache` (true hoặc một đường dẫn) từ db_tools.yml."""
+    value = config.get("schema_cache")
+    if value is True:
+        return DEFAULT_SCHEMA_CACHE_DIR
+    return value or None
+
+
+def _engine_key(db_engine: engine.Engine) -> str:
+    key = db_engine.url.render_as_string(hide_password=False)
+    if db_engine.dialect.name == "sqlite" and db_engine.url.database in (None, "", ":memory:"):
+        # Mỗi engine SQLite in-memory là một database riêng dù có cùng URL
+        key = f"{key}#{id(db_engine)}"
+    return key
+
+
+def schema_fingerprint(db_engine: engine.Engine) -> Optional[str]:
+    """
+    Tính dấu vân tay của schema bằng một truy vấn duy nhất.
+    Trả về None nếu dialect chưa được hỗ trợ (khi đó không dùng cache trên đĩa).
+    """
+    query = _FINGERPRINT_QUERIES.get(db_engine.dialect.name)
+    if query is None:
+        return None
+    with db_engine.connect() as connection:
+        rows = connection.execute(text(query)).all()
+    return hashlib.sha256(repr([tuple(row) for row in rows]).encode("utf-8")).hexdigest()
+
+
+def _cache_path(db_engine: engine.Engine, cache_dir: str, fingerprint: str) -> Path:
+    url_hash = hashlib.sha256(_engine_key(db_engine).encode("utf-8")).hexdigest()[:16]
+    return Path(cache_dir) / f"{url_hash}-{fingerprint[:16]}.pkl"
+
+
+def _load_from_disk(path: Path) -> Optional[MetaData]:
+    if not path.is_file():
+        return None
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except Exception:
+        # File hỏng hoặc không tương thích: reflect lại từ đầu
+        return None
+
+
+def _save_to_disk(path: Path, metadata: MetaData) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as f:
+        pickle.dump(metadata, f)
+    os.replace(tmp_path, path)
+
+
+def get_metadata(
+    db_engine: engine.Engine,
+    table_names: Optional[Iterable[str]] = None,
+    cache_dir: Optional[str] = None,
+) -> MetaData:
+    """
+    Trả về MetaData chứa (ít nhất) các bảng được yêu cầu, dùng chung cho cả lần chạy.
+
+    Các bảng chưa có trong cache được reflect bằng đúng một lời gọi `MetaData.reflect(only=...)`.
+    Bảng không tồn tại trong database đơn giản là không có mặt trong kết quả.
+    Nếu có `cache_dir`, metadata được lưu xuống đĩa theo dấu vân tay của schema
+    để các lần chạy sau bỏ qua bước reflect.
+
+    Args:
+        db_engine: Engine của database.
+        table_names: Các bảng cần có; None nghĩa là toàn bộ database.
+        cache_dir: Thư mục cache trên đĩa (tùy chọn).
+    """
+    key = _engine_key(db_engine)
+    table_names = None if table_names is None else list(table_names)
+    with _lock:
+        metadata = _metadata_cache.get(key)
+        if metadata is not None and table_names is not None \
+                and all(name in metadata.tables for name in table_names):
+            # Trường hợp phổ biến nhất: mọi bảng đã có trong cache, không cần truy vấn database
+            return metadata
+
+        disk_path = None
+        if cache_dir:
+            fingerprint = schema_fingerprint(db_engine)
+            if fingerprint is not None:
+                disk_path = _cache_path(db_engine, cache_dir, fingerprint)
+                if metadata is None:
+                    metadata = _load_from_disk(disk_path)
+        if metadata is None:
+            metadata = MetaData()
+
+        existing = set(inspect(db_engine).get_table_names())
+        wanted = existing if table_names is None else existing.intersection(table_names)
+        missing = sorted(wanted - set(metadata.tables))
+        if missing:
+            with metrics.phase("reflect"):
+                metadata.reflect(bind=db_engine, only=missing)
+            if disk_path is not None:
+                _save_to_disk(disk_path, metadata)
+
+        _metadata_cache[key] = metadata
+        return metadata
+
+
+def get_table(
+    db_engine: engine.Engine, table_name: str, cache_dir: Optional[str] = None
+) -> Optional[Table]:
+    """Lấy một bảng từ cache (reflect nếu cần). Trả về None nếu bảng không tồn tại."""
+    return get_metadata(db_engine, [table_name], cache_dir).tables.get(table_name)
+
+
+def clear_schema_cache(db_engine: Optional[engine.Engine] = None) -> None:
+    """Xóa cache trong bộ nhớ (của một engine, hoặc tất cả), ví dụ sau khi schema thay đổi."""
+    with _lock:
+        if db_engine is None:
+            _metadata_cache.clear()
+        else:
+            _metadata_cache.pop(_engine_key(db_engine), None)
@@ -0,0 +1,347 @@
+import itertools
+import random
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+from sqlalchemy import MetaData, Table, engine, select, text
+
+from db_tools.core import (database, exporters, faker_manager, incremental,
+                           metrics, parallel, processor, progress, pushdown,
+                           scanner, schema_cache, writers)
+from db_tools.core.dependency_resolver import (get_seeding_order,
+                                               relations_from_metadata)
+
+# Số khóa trong mỗi truy vấn `IN (...)` và mỗi lần ghi (SQL Server giới hạn 2100 tham số mỗi câu lệnh)
+DEFAULT_SUBSET_BATCH_SIZE = 1000
+
+# Mỗi khối của KeySet phủ 2^16 khóa nguyên liên tiếp bằng một bitmap 8 KB
+_BLOCK_BITS = 16
+_BLOCK_SIZE = 1 << _BLOCK_BITS
+
+
+class KeySet:
+    """
+    Tập khóa chính đã chọn của một bảng, lưu gọn trong bộ nhớ.
+
+    Khóa nguyên không âm được lưu trong các bitmap (1 bit mỗi khóa), chỉ cấp phát cho những khối
+    2^16 khóa thật sự có khóa được chọn; khóa kiểu khác (UUID, chuỗi...) được lưu trong một set.
+    Duyệt tập luôn theo thứ tự tăng dần của khóa.
+    """
+
+    def __init__(self) -> None:
+        self._blocks: Dict[int, bytearray] = {}
+        self._objects: Set[Any] = set()
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, key: Any) -> bool:
+        if isinstance(key, int) and not isinstance(key, bool) and key >= 0:
+            block = self._blocks.get(key >> _BLOCK_BITS)
+            offset = key & (_BLOCK_SIZE - 1)
+            return block is not None and bool(block[offset >> 3] & (1 << (offset & 7)))
+        return key in self._objects
+
+    def add(self, key: Any) -> bool:
+        """Thêm một khóa; trả về True nếu khóa chưa có trong tập."""
+        if isinstance(key, int) and not isinstance(key, bool) and key >= 0:
+            block = self._blocks.get(key >> _BLOCK_BITS)
+            if block is None:
+                block = self._blocks[key >> _BLOCK_BITS] = bytearray(_BLOCK_SIZE >> 3)
+            offset = key & (_BLOCK_SIZE - 1)
+            mask = 1 << (offset & 7)
+            if block[offset >> 3] & mask:
+                return False
+            block[offset >> 3] |= mask
+        else:
+            if key in self._objects:
+                return False
+            self._objects.add(key)
+        self._size += 1
+        return True
+
+    def __iter__(self) -> Iterator[Any]:
+        for index in sorted(self._blocks):
+            block, base = self._blocks[index], index << _BLOCK_BITS
+            for byte_index, byte in enumerate(block):
+                if byte:
+                    for bit in range(8):
+                        if byte & (1 << bit):
+                            yield base + (byte_index << 3) + bit
+        yield from sorted(self._objects, key=lambda key: (type(key).__name__, key))
+
+    def batches(self, size: int) -> Iterator[List[Any]]:
+        batch = []
+        for key in self:
+            batch.append(key)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+def _sample_roots(
+    connection, table: Table, root_config: Dict[str, Any], keys: KeySet, batch_size: int, seed: Optional[int]
+) -> None:
+    """Chọn các dòng gốc: lọc bằng `where` (SQL) và/hoặc lấy mẫu `percent` phần trăm, duyệt theo keyset."""
+    where = text(root_config["where"]) if root_config.get("where") else None
+    percent = float(root_config.get("percent", 100))
+    if not 0 < percent <= 100:
+        raise ValueError(f"Root '{table.name}': percent must be in (0, 100], got {percent}.")
+    rng = random.Random(parallel.derive_seed(seed, "subset", table.name))
+    primary_key_col = scanner.primary_key_column(table)
+    for rows in scanner.scan_keyset(connection, table, batch_size, columns=[primary_key_col], where=where):
+        for row in rows:
+            if percent >= 100 or rng.random() * 100 < percent:
+                keys.add(row[0])
+
+
+def _add_children(
+    connection, table: Table, fk_column: str, parent_keys: KeySet, keys: KeySet, batch_size: int
+) -> None:
+    """Thêm các dòng của `table` tham chiếu tới những khóa đã chọn của bảng cha (đi xuống theo khóa ngoại)."""
+    primary_key_col = scanner.primary_key_column(table)
+    column = table.c[fk_column]
+    for parent_batch in parent_keys.batches(batch_size):
+        stmt = select(primary_key_col).where(column.in_(parent_batch))
+        for key in connection.execute(stmt).scalars():
+            keys.add(key)
+
+
+def _add_parents(
+    connection,
+    table: Table,
+    relations: Dict[str, Dict[str, Any]],
+    selected: Dict[str, KeySet],
+    batch_size: int,
+) -> None:
+    """
+    Thêm vào bảng cha các khóa được những dòng đã chọn của `table` tham chiếu tới (đi lên theo khóa ngoại),
+    để bản sao toàn vẹn tham chiếu. Khóa ngoại trỏ về chính bảng được lặp cho tới khi không còn khóa mới.
+    """
+    primary_key_col = scanner.primary_key_column(table)
+    fk_columns = [col for col in relations if selected.get(relations[col]["table"]) is not None]
+    if not fk_columns:
+        return
+    keys = selected[table.name]
+    pending: Optional[List[Any]] = None
+    while True:
+        new_self_keys: List[Any] = []
+        source = keys.batches(batch_size) if pending is None else (
+            pending[i:i + batch_size] for i in range(0, len(pending), batch_size)
+        )
+        for key_batch in source:
+            stmt = select(*[table.c[col] for col in fk_columns]).where(primary_key_col.in_(key_batch))
+            for row in connection.execute(stmt):
+                for col, value in zip(fk_columns, row):
+                    if value is None:
+                        continue
+                    parent = relations[col]["table"]
+                    if selected[parent].add(value) and parent == table.name:
+                        new_self_keys.append(value)
+        if not new_self_keys:
+            return
+        pending = new_self_keys
+
+
+def _anonymizer(config: Dict[str, Any], table_name: str, executor, seed: Optional[int]):
+    """
+    Tạo hàm ẩn danh hóa các dòng của một bảng trước khi ghi vào database đích, theo mục `anonymize` của config.
+    Quy tắc SQL (pushdown) được trả về riêng để áp trên database đích ngay sau mỗi batch.
+    """
+    table_config = (config.get("anonymize") or {}).get(table_name)
+    if not table_config:
+        return None, {}
+    configured = table_config.get("columns", {})
+    rules_config = {col: spec for col, spec in configured.items() if pushdown.is_pushdown(spec)}
+    columns_to_anonymize = {
+        col: faker_manager.parse_column_spec(spec) for col, spec in configured.items() if col not in rules_config
+    }
+    if table_config.get("deterministic"):
+        for spec in columns_to_anonymize.values():
+            spec.setdefault("deterministic", True)
+    run = processor.AnonymizeRun(executor=executor, seed=seed, hash_key=processor.anonymize_key(config))
+    faker_manager.compile_plan(columns_to_anonymize, hash_key=run.hash_key)
+    random_config, deterministic_config = processor.split_anonymize_columns(columns_to_anonymize)
+    batch_index = itertools.count()
+
+    def anonymize(rows: List[Dict[str, Any]], primary_key_name: str) -> List[Dict[str, Any]]:
+        if not columns_to_anonymize:
+            return rows
+        batch_rows = [(row[primary_key_name], *[row[col] for col in deterministic_config]) for row in rows]
+        fake_chunks = parallel.generate_chunks(
+            random_config, [len(rows)] if random_config else [], executor, seed=seed,
+            stream_key=f"subset:{table_name}", start_index=next(batch_index),
+        )
+        batch = processor.build_anonymize_batch(
+            batch_rows, fake_chunks, random_config, deterministic_config, primary_key_name, run
+        )
+        return [{**row, **fake_row} for row, fake_row in zip(rows, batch)]
+
+    return anonymize, rules_config
+
+
+def _copy_table(
+    source_connection,
+    target_connection,
+    table: Table,
+    target_table: Table,
+    keys: KeySet,
+    batch_size: int,
+    anonymize,
+    rule_expressions: Dict[str, Any],
+) -> int:
+    """Đọc các dòng đã chọn theo batch khóa chính và ghi hàng loạt vào database đích (giữ nguyên khóa chính)."""
+    primary_key_col = scanner.primary_key_column(table)
+    target_pk = scanner.primary_key_column(target_table)
+    dialect = target_connection.dialect
+    write = writers.get_writer(target_connection)
+    # SQL Server không cho ghi giá trị vào cột IDENTITY nếu không bật IDENTITY_INSERT
+    identity = dialect.name == "mssql" and target_pk.identity is not None
+    if identity:
+        target_connection.exec_driver_sql(exporters.identity_insert_sql(target_table, dialect, True))
+    copied = 0
+    batches = progress.track(
+        keys.batches(batch_size), table.name, "subset", len(keys), f"Copying '{table.name}'..."
+    )
+    try:
+        for key_batch in batches:
+            with metrics.phase("read", table.name):
+                rows = [
+                    dict(row._mapping)
+                    for row in source_connection.execute(select(table).where(primary_key_col.in_(key_batch)))
+                ]
+            if anonymize is not None:
+                with metrics.phase("generate", table.name):
+                    rows = anonymize(rows, primary_key_col.name)
+            rows = [{col: value for col, value in row.items() if col in target_table.c} for row in rows]
+            with metrics.phase("write", table.name):
+                write(target_connection, target_table, rows, False)
+                if rule_expressions:
+                    pushdown.apply_rules(target_connection, target_table, rule_expressions, where=target_pk.in_(key_batch))
+            copied += len(rows)
+            metrics.count("rows", len(rows), table.name)
+            metrics.count("batches", 1, table.name)
+    finally:
+        if identity:
+            target_connection.exec_driver_sql(exporters.identity_insert_sql(target_table, dialect, False))
+    # Dòng được ghi kèm khóa chính, cần đưa sequence của database đích về sau giá trị lớn nhất
+    reset = exporters.reset_sequence_sql(target_table, dialect)
+    if reset is not None:
+        target_connection.execute(text(reset))
+    return copied
+
+
+def process_subset(
+    config: Dict[str, Any],
+    db_engine: engine.Engine,
+    target_engine: engine.Engine,
+    workers: Optional[int] = None,
+    anonymize: Optional[bool] = None,
+) -> None:
+    """
+    Sao chép một phần nhỏ, toàn vẹn tham chiếu, của database nguồn sang database đích (schema đã có sẵn).
+
+    1. Chọn các dòng gốc theo mục `subset.roots` (`where` và/hoặc `percent`).
+    2. Đi xuống: thêm các dòng con tham chiếu tới những dòng đã chọn (theo thứ tự phụ thuộc; tắt bằng `children: false`).
+    3. Đi lên: thêm mọi dòng cha được tham chiếu tới (theo thứ tự ngược lại), để không có khóa ngoại nào bị treo.
+    4. Ghi các dòng theo thứ tự phụ thuộc, từng batch khóa chính, có thể ẩn danh hóa ngay trước khi ghi.
+
+    Quan hệ được lấy từ các khóa ngoại đã reflect; tập khóa đã chọn của mỗi bảng được lưu gọn trong một KeySet.
+    """
+    subset_config = config.get("subset") or {}
+    roots = subset_config.get("roots") or {}
+    if not roots:
+        progress.echo("[yellow]No 'subset.roots' configured (or --root given). Skipping.[/yellow]")
+        return
+    progress.echo("\n[bold cyan]✂️  Extracting a referentially intact subset...[/bold cyan]")
+    batch_size = int(subset_config.get("batch_size", DEFAULT_SUBSET_BATCH_SIZE))
+    seed = config.get("faker_seed")
+    if anonymize is None:
+        anonymize = bool(subset_config.get("anonymize", False))
+
+    table_names = subset_config.get("tables") or [
+        name for name in database.list_table_names(db_engine) if name not in incremental.INTERNAL_TABLES
+    ]
+    missing = [name for name in roots if name not in table_names]
+    if missing:
+        progress.echo(f"[bold red]❌ Error: Root table(s) {', '.join(missing)} do not exist.[/bold red]")
+        return
+    metadata: MetaData = schema_cache.get_metadata(db_engine, table_names, schema_cache.cache_dir_from_config(config))
+    table_names = [name for name in table_names if name in metadata.tables]
+    no_pk = [name for name in table_names if scanner.primary_key_column(metadata.tables[name]) is None]
+    if no_pk:
+        progress.echo(f"[yellow]   - Skipping tables without a primary key: {', '.join(no_pk)}[/yellow]")
+        table_names = [name for name in table_names if name not in no_pk]
+
+    graph = relations_from_metadata(metadata, table_names)
+    # Khóa ngoại trỏ về chính bảng không ảnh hưởng tới thứ tự giữa các bảng
+    order_graph = {
+        name: {"relations": {col: rel for col, rel in info["relations"].items() if rel["table"] != name}}
+        for name, info in graph.items()
+    }
+    try:
+        order = get_seeding_order(order_graph)
+    except ValueError as e:
+        progress.echo(f"[bold red]❌ Error resolving dependencies: {e}[/bold red]")
+        return
+    progress.echo(f"   - Table order: [yellow]{' -> '.join(order)}[/yellow]")
+
+    selected: Dict[str, KeySet] = {name: KeySet() for name in order}
+    with db_engine.connect() as connection:
+        with metrics.phase("select"):
+            for table_name, root_config in roots.items():
+                _sample_roots(connection, metadata.tables[table_name], root_config or {}, selected[table_name], batch_size, seed)
+                progress.echo(f"   - Root '{table_name}': {len(selected[table_name])} rows selected.")
+            if subset_config.get("children", True):
+                for table_name in order:
+                    if table_name in roots:
+                        continue
+                    for fk_column, rel_info in order_graph[table_name]["relations"].items():
+                        parent_keys = selected[rel_info["table"]]
+                        if parent_keys:
+                            _add_children(
+                                connection, metadata.tables[table_name], fk_column, parent_keys,
+                                selected[table_name], batch_size,
+                            )
+            for table_name in reversed(order):
+                if selected[table_name]:
+                    _add_parents(
+                        connection, metadata.tables[table_name], graph[table_name]["relations"], selected, batch_size
+                    )
+        total = sum(len(keys) for keys in selected.values())
+        progress.echo(f"   - Selected {total} rows in {sum(1 for keys in selected.values() if keys)} tables.")
+
+        target_metadata = schema_cache.get_metadata(target_engine, [name for name in order if selected[name]])
+        missing = [name for name in order if selected[name] and name not in target_metadata.tables]
+        if missing:
+            progress.echo(f"[bold red]❌ Error: Table(s) {', '.join(missing)} do not exist in the target database.[/bold red]")
+            return
+
+        workers = workers or config.get("workers", 1)
+        with parallel.generation_pool(workers) as executor, target_engine.connect() as target_connection, \
+                writers.bulk_load_session(target_connection):
+            for table_name in order:
+                keys = selected[table_name]
+                if not keys:
+                    continue
+                try:
+                    anonymizer, rules_config = (
+                        _anonymizer(config, table_name, executor, seed) if anonymize else (None, {})
+                    )
+                    target_table = target_metadata.tables[table_name]
+                    rule_expressions = pushdown.compile_rules(target_table, rules_config, target_engine.dialect.name)
+                    with metrics.table_timer(table_name):
+                        copied = _copy_table(
+                            connection, target_connection, metadata.tables[table_name], target_table,
+                            keys, batch_size, anonymizer, rule_expressions,
+                        )
+                except Exception as e:
+                    progress.echo(f"[bold red]❌ An error occurred with table '{table_name}': {repr(e)}[/bold red]")
+                    target_connection.rollback()
+                    return
+                progress.echo(f"[bold green]✅ Copied {copied} records into '{table_name}'.[/bold green]")
+            with metrics.phase("commit"):
+                target_connection.commit()
+    progress.echo(f"\n[bold green]🎉 Subset of {total} rows copied successfully![/bold green]")
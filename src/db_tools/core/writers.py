@@ -0,0 +1,170 @@
+import io
+import json
+import sqlite3
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from sqlalchemy import Table, event, func, insert, select, text
+
+# Một writer ghi một chunk dòng vào bảng; trả về list khóa chính nếu return_pks=True
+Writer = Callable[[Any, Table, List[Dict[str, Any]], bool], Optional[List[Any]]]
+
+# Giới hạn số tham số trong một câu lệnh SQLite (SQLITE_MAX_VARIABLE_NUMBER)
+SQLITE_MAX_PARAMS = 32766 if sqlite3.sqlite_version_info >= (3, 32, 0) else 999
+
+# Các PRAGMA dùng trong phiên seed SQLite: bỏ fsync và giữ dữ liệu tạm trong RAM
+_SQLITE_BULK_PRAGMAS = {"synchronous": "OFF", "temp_store": "MEMORY", "cache_size": "-65536"}
+
+
+def _primary_key(table: Table):
+    return table.primary_key.columns.values()[0]
+
+
+def generic_writer(connection, table: Table, rows: List[Dict[str, Any]], return_pks: bool) -> Optional[List[Any]]:
+    """Writer mặc định: executemany một câu INSERT của SQLAlchemy."""
+    if not return_pks:
+        connection.execute(insert(table), rows)
+        return None
+    result = connection.execute(insert(table).returning(_primary_key(table)), rows)
+    return result.scalars().all()
+
+
+def sqlite_writer(connection, table: Table, rows: List[Dict[str, Any]], return_pks: bool) -> Optional[List[Any]]:
+    """
+    Writer cho SQLite: INSERT nhiều dòng trong một câu VALUES (...), (...),
+    chia nhỏ theo giới hạn số tham số của SQLite.
+    """
+    columns = list(rows[0].keys()) if rows else []
+    if not columns:
+        # Không có cột nào để sinh dữ liệu: mỗi dòng chỉ dùng giá trị mặc định
+        return generic_writer(connection, table, rows, return_pks)
+    rows_per_statement = max(1, SQLITE_MAX_PARAMS // len(columns))
+    new_pks: List[Any] = []
+    for start in range(0, len(rows), rows_per_statement):
+        part = rows[start:start + rows_per_statement]
+        stmt = insert(table).values(part)
+        if return_pks:
+            new_pks.extend(connection.execute(stmt.returning(_primary_key(table))).scalars().all())
+        else:
+            connection.execute(stmt)
+    return new_pks if return_pks else None
+
+
+def _csv_field(value: Any) -> str:
+    # Trường rỗng không có dấu nháy là NULL trong định dạng CSV của COPY
+    if value is None:
+        return ""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        # Định dạng hex của bytea
+        text_value = "\\x" + bytes(value).hex()
+    elif isinstance(value, (dict, list)):
+        # Cột JSON/JSONB
+        text_value = json.dumps(value, ensure_ascii=False)
+    else:
+        text_value = str(value)
+    return '"' + text_value.replace('"', '""') + '"'
+
+
+def _copy_buffer(columns: List[str], rows: List[Dict[str, Any]]) -> io.StringIO:
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write(",".join(_csv_field(row.get(col)) for col in columns))
+        buffer.write("\n")
+    buffer.seek(0)
+    return buffer
+
+
+def _allocate_pks(connection, table: Table, count: int) -> Optional[List[Any]]:
+    """Cấp trước `count` giá trị khóa chính từ sequence của cột (serial/identity) trên PostgreSQL."""
+    primary_key_col = _primary_key(table)
+    table_ref = connection.dialect.identifier_preparer.format_table(table)
+    sequence = connection.execute(
+        select(func.pg_get_serial_sequence(table_ref, primary_key_col.name))
+    ).scalar()
+    if sequence is None:
+        return None
+    stmt = text("SELECT nextval(:sequence) FROM generate_series(1, :count)")
+    return connection.execute(stmt, {"sequence": sequence, "count": count}).scalars().all()
+
+
+def postgres_copy_writer(connection, table: Table, rows: List[Dict[str, Any]], return_pks: bool) -> Optional[List[Any]]:
+    """
+    Writer cho PostgreSQL: stream chunk dưới dạng CSV qua `COPY ... FROM STDIN`.
+    Khi cần khóa chính, chúng được cấp trước từ sequence rồi ghi kèm trong COPY;
+    nếu bảng không có sequence thì quay về writer mặc định.
+    """
+    if not rows:
+        return [] if return_pks else None
+    driver = connection.dialect.driver
+    if driver not in ("psycopg2", "psycopg"):
+        return generic_writer(connection, table, rows, return_pks)
+
+    new_pks = None
+    if return_pks:
+        new_pks = _allocate_pks(connection, table, len(rows))
+        if new_pks is None:
+            return generic_writer(connection, table, rows, return_pks)
+        pk_name = _primary_key(table).name
+        rows = [{**row, pk_name: pk} for row, pk in zip(rows, new_pks)]
+
+    columns = list(rows[0].keys())
+    preparer = connection.dialect.identifier_preparer
+    column_list = ", ".join(preparer.quote(col) for col in columns)
+    copy_sql = f"COPY {preparer.format_table(table)} ({column_list}) FROM STDIN WITH (FORMAT csv)"
+    buffer = _copy_buffer(columns, rows)
+
+    cursor = connection.connection.cursor()
+    try:
+        if driver == "psycopg2":
+            cursor.copy_expert(copy_sql, buffer)
+        else:
+            with cursor.copy(copy_sql) as copy:
+                copy.write(buffer.getvalue())
+    finally:
+        cursor.close()
+    return new_pks
+
+
+def get_writer(connection) -> Writer:
+    """Chọn writer phù hợp nhất với dialect của kết nối."""
+    dialect_name = connection.dialect.name
+    if dialect_name == "postgresql":
+        return postgres_copy_writer
+    if dialect_name == "sqlite":
+        return sqlite_writer
+    return generic_writer
+
+
+def _enable_fast_executemany(conn, cursor, statement, parameters, context, executemany) -> None:
+    if executemany:
+        cursor.fast_executemany = True
+
+
+@contextmanager
+def bulk_load_session(connection) -> Iterator[None]:
+    """
+    Tinh chỉnh kết nối cho việc nạp dữ liệu lớn, và hoàn tác khi kết thúc:
+    - SQLite: PRAGMA synchronous=OFF, temp_store=MEMORY, cache lớn hơn.
+    - SQL Server (pyodbc): bật `fast_executemany` cho các câu executemany.
+    """
+    dialect = connection.dialect
+    if dialect.name == "sqlite":
+        previous = {
+            name: connection.exec_driver_sql(f"PRAGMA {name}").scalar()
+            for name in _SQLITE_BULK_PRAGMAS
+        }
+        for name, value in _SQLITE_BULK_PRAGMAS.items():
+            connection.exec_driver_sql(f"PRAGMA {name} = {value}")
+        try:
+            yield
+        finally:
+            for name, value in previous.items():
+                connection.exec_driver_sql(f"PRAGMA {name} = {value}")
+    elif dialect.name == "mssql" and dialect.driver == "pyodbc":
+        event.listen(connection, "before_cursor_execute", _enable_fast_executemany)
+        try:
+            yield
+        finally:
+            event.remove(connection, "before_cursor_execute", _enable_fast_executemany)
+    else:
+        yield
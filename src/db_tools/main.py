@@ -1,14 +1,16 @@
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Iterator, List, Optional
+
 import typer
 from rich import print
 from typing_extensions import Annotated
 
 from db_tools.core.config_loader import load_config
-from db_tools.core.database import get_engine
-# --- THAY ĐỔI 1: Import Base từ models ---
-from db_tools.core.models import Base
-from db_tools.core.processor import process_anonymize, process_seed
 from db_tools.core.translator import t
-from db_tools.tui import DbToolsApp
+
+# SQLAlchemy, Faker và Textual được import bên trong từng lệnh, chỉ khi lệnh đó cần,
+# để `db-tools --help` và các lệnh nhẹ khởi động nhanh.
 
 app = typer.Typer(
     help="A CLI tool to seed and anonymize development databases.",
@@ -28,12 +30,66 @@ ConnectionOption = Annotated[
     ),
 ]
 
+WorkersOption = Annotated[
+    int,
+    typer.Option(
+        "--workers", "-w",
+        help="Number of processes used to generate fake data (overrides 'workers' in the config file).",
+        min=1,
+    ),
+]
+
+ProfileOption = Annotated[
+    bool,
+    typer.Option("--profile", help="Profile the run (pyinstrument if installed, otherwise cProfile)."),
+]
+
+ProfileOutputOption = Annotated[
+    Path,
+    typer.Option("--profile-output", help="Save the profile (HTML for pyinstrument, .prof for cProfile)."),
+]
+
+AsyncOption = Annotated[
+    bool,
+    typer.Option(
+        "--async",
+        help="Overlap data generation with database I/O using SQLAlchemy's asyncio engine "
+        "(needs an async driver: aiosqlite, asyncpg or aiomysql).",
+    ),
+]
+
+MetricsOption = Annotated[
+    Path,
+    typer.Option(
+        "--metrics",
+        help="Write per-table and per-phase metrics to this file (JSON, or OpenMetrics text for .prom/.txt).",
+    ),
+]
+
+
+@contextmanager
+def instrumented(profile: bool, profile_output: Optional[Path], metrics_path: Optional[Path]) -> Iterator[None]:
+    """Thu thập metrics (và profile nếu được yêu cầu) cho một lệnh, rồi ghi kết quả ra file."""
+    from db_tools.core import metrics
+
+    metrics.reset()
+    with metrics.profiling(profile_output) if profile or profile_output else nullcontext():
+        yield
+    if metrics_path:
+        metrics.write_report(metrics_path)
+        print(f"[bold green]✅ Metrics written to {metrics_path}[/bold green]")
+
+
 # --- Tạo lệnh `schema create` ---
 @schema_app.command("create")
 def schema_create(connection: ConnectionOption = None):
     """
     Create all tables in the database based on the defined models.
     """
+    from db_tools.core.database import get_engine
+    from db_tools.core.models import Base
+    from db_tools.core.schema_cache import clear_schema_cache
+
     try:
         config = load_config()
         connection_string = connection or config.get("connection")
@@ -43,12 +99,13 @@ def schema_create(connection: ConnectionOption = None):
             raise typer.Exit(code=1)
 
         print(f"[cyan]Connecting to database...[/cyan]")
-        db_engine = get_engine(connection_string)
+        db_engine = get_engine(connection_string, config.get("engine"))
 
         print("[cyan]Creating tables...[/cyan]")
         # Dòng lệnh quyền năng của SQLAlchemy:
         # Nó sẽ kiểm tra và tạo các bảng chưa tồn tại.
         Base.metadata.create_all(db_engine)
+        clear_schema_cache(db_engine)
 
         print("[bold green]✅ Tables created successfully (if they didn't exist).[/bold green]")
 
@@ -57,7 +114,35 @@ def schema_create(connection: ConnectionOption = None):
         raise typer.Exit(code=1)
 
 @app.command()
-def seed(connection: ConnectionOption = None):
+def seed(
+    connection: ConnectionOption = None,
+    workers: WorkersOption = None,
+    profile: ProfileOption = False,
+    profile_output: ProfileOutputOption = None,
+    metrics_path: MetricsOption = None,
+    use_async: AsyncOption = False,
+    from_profile: Annotated[
+        Path,
+        typer.Option("--from-profile", help="Seed data matching a profile written by `db-tools profile`."),
+    ] = None,
+    scale: Annotated[
+        float, typer.Option("--scale", help="Row count multiplier applied to the profile (e.g. 0.1 or 10).")
+    ] = 1.0,
+    output: Annotated[
+        Path,
+        typer.Option("--output", "-o", help="Write the rows to files in this directory (one per table) instead of the database."),
+    ] = None,
+    output_format: Annotated[
+        str, typer.Option("--format", help="File format for --output: csv (gzip), parquet or sql.")
+    ] = "csv",
+):
+    from db_tools.core.database import get_engine
+    from db_tools.core.processor import process_seed
+
+    if use_async and output:
+        print("[bold red]Error: --async cannot be combined with --output.[/bold red]")
+        raise typer.Exit(code=1)
+
     try:
         config = load_config()
         connection_string = connection or config.get("connection")
@@ -67,10 +152,25 @@ def seed(connection: ConnectionOption = None):
             print("Please provide one via the --connection option or in a `db_tools.yml` file.")
             raise typer.Exit(code=1)
 
+        if from_profile:
+            from db_tools.core.data_profile import (load_profile,
+                                                    seed_config_from_profile)
+
+            # Các cột được cấu hình trong `seed` (ví dụ provider Faker) vẫn được ưu tiên
+            config["seed"] = seed_config_from_profile(load_profile(from_profile), scale, config.get("seed"))
+            print(f"[cyan]Seeding from profile {from_profile} (scale {scale}).[/cyan]")
+
         print(f"[cyan]Connecting to database...[/cyan]")
-        db_engine = get_engine(connection_string)
+        if use_async:
+            from db_tools.core.async_processor import run_seed
+
+            with instrumented(profile, profile_output, metrics_path):
+                run_seed(config, connection_string, workers)
+            return
+        db_engine = get_engine(connection_string, config.get("engine"))
         
-        process_seed(config, db_engine)
+        with instrumented(profile, profile_output, metrics_path):
+            process_seed(config, db_engine, workers, output=str(output) if output else None, output_format=output_format)
         
     except ConnectionError as e:
         print(f"[bold red]{t.get('error_db_connection', error=e)}[/bold red]")
@@ -80,7 +180,27 @@ def seed(connection: ConnectionOption = None):
         raise typer.Exit(code=1)
 
 @app.command()
-def anonymize(connection: ConnectionOption = None):
+def anonymize(
+    connection: ConnectionOption = None,
+    workers: WorkersOption = None,
+    resume: Annotated[
+        bool, typer.Option("--resume", help="Continue an interrupted run from its last checkpoint.")
+    ] = False,
+    full: Annotated[
+        bool, typer.Option("--full", help="Ignore incremental state and re-anonymize every row.")
+    ] = False,
+    profile: ProfileOption = False,
+    profile_output: ProfileOutputOption = None,
+    metrics_path: MetricsOption = None,
+    use_async: AsyncOption = False,
+):
+    from db_tools.core.database import get_engine
+    from db_tools.core.processor import process_anonymize
+
+    if use_async and full:
+        print("[bold red]Error: --async cannot be combined with --full (incremental anonymization needs the sync engine).[/bold red]")
+        raise typer.Exit(code=1)
+
     try:
         config = load_config()
         connection_string = connection or config.get("connection")
@@ -91,10 +211,25 @@ def anonymize(connection: ConnectionOption = None):
             raise typer.Exit(code=1)
 
         print(f"[cyan]Connecting to database...[/cyan]")
-        db_engine = get_engine(connection_string)
+        if use_async:
+            from db_tools.core.async_processor import (incremental_tables,
+                                                       run_anonymize)
 
-        process_anonymize(config, db_engine)
+            unsupported = incremental_tables(config)
+            if unsupported:
+                print(f"[bold red]Error: Incremental anonymization is not supported with --async (tables: {', '.join(unsupported)}).[/bold red]")
+                print("Run it without --async.")
+                raise typer.Exit(code=1)
+            with instrumented(profile, profile_output, metrics_path):
+                run_anonymize(config, connection_string, workers, resume)
+            return
+        db_engine = get_engine(connection_string, config.get("engine"))
 
+        with instrumented(profile, profile_output, metrics_path):
+            process_anonymize(config, db_engine, workers, resume, full)
+
+    except typer.Exit:
+        raise
     except ConnectionError as e:
         print(f"[bold red]{t.get('error_db_connection', error=e)}[/bold red]")
         raise typer.Exit(code=1)
@@ -102,8 +237,217 @@ def anonymize(connection: ConnectionOption = None):
         print(f"[bold red]An unexpected error occurred: {repr(e)}[/bold red]")
         raise typer.Exit(code=1)
 
+@app.command()
+def load(
+    directory: Annotated[Path, typer.Argument(help="Directory written by `db-tools seed --output`.")],
+    connection: ConnectionOption = None,
+    chunk_size: Annotated[
+        Optional[int], typer.Option("--chunk-size", help="Rows per write for CSV/Parquet files.", min=1)
+    ] = None,
+    profile: ProfileOption = False,
+    profile_output: ProfileOutputOption = None,
+    metrics_path: MetricsOption = None,
+):
+    """
+    Bulk-load the files written by `seed --output` into the database.
+    """
+    from db_tools.core.database import get_engine
+    from db_tools.core.loader import process_load
+
+    try:
+        config = load_config()
+        connection_string = connection or config.get("connection")
+
+        if not connection_string:
+            print("[bold red]Error: No connection string provided.[/bold red]")
+            print("Please provide one via the --connection option or in a `db_tools.yml` file.")
+            raise typer.Exit(code=1)
+
+        print(f"[cyan]Connecting to database...[/cyan]")
+        db_engine = get_engine(connection_string, config.get("engine"))
+
+        with instrumented(profile, profile_output, metrics_path):
+            process_load(config, db_engine, str(directory), chunk_size)
+
+    except typer.Exit:
+        raise
+    except ConnectionError as e:
+        print(f"[bold red]{t.get('error_db_connection', error=e)}[/bold red]")
+        raise typer.Exit(code=1)
+    except Exception as e:
+        print(f"[bold red]An unexpected error occurred: {repr(e)}[/bold red]")
+        raise typer.Exit(code=1)
+
+@app.command()
+def subset(
+    target: Annotated[
+        str, typer.Option("--target", help="Connection string of the database that receives the subset (schema must exist).")
+    ] = None,
+    connection: ConnectionOption = None,
+    root: Annotated[
+        Optional[List[str]],
+        typer.Option("--root", "-r", help="Root table to sample (repeatable, overrides 'subset.roots' in the config)."),
+    ] = None,
+    percent: Annotated[
+        float, typer.Option("--percent", "-p", help="Percentage of each --root table to sample.", min=0.0001, max=100)
+    ] = 1.0,
+    where: Annotated[
+        str, typer.Option("--where", help="SQL filter applied to each --root table.")
+    ] = None,
+    anonymize: Annotated[
+        Optional[bool],
+        typer.Option("--anonymize/--no-anonymize", help="Apply the 'anonymize' section to rows before writing them."),
+    ] = None,
+    workers: WorkersOption = None,
+    profile: ProfileOption = False,
+    profile_output: ProfileOutputOption = None,
+    metrics_path: MetricsOption = None,
+):
+    """
+    Copy a referentially intact sample of the database (roots, their children and every referenced parent) into another database.
+    """
+    from db_tools.core.database import get_engine
+    from db_tools.core.subset import process_subset
+
+    try:
+        config = load_config()
+        connection_string = connection or config.get("connection")
+        subset_config = config.get("subset") or {}
+        config["subset"] = subset_config
+        target_string = target or subset_config.get("target")
+
+        if not connection_string or not target_string:
+            print("[bold red]Error: Both a source connection and a --target connection are required.[/bold red]")
+            print("Provide them via --connection/--target or 'connection'/'subset.target' in `db_tools.yml`.")
+            raise typer.Exit(code=1)
+        if root:
+            subset_config["roots"] = {
+                name: {"percent": percent, **({"where": where} if where else {})} for name in root
+            }
+
+        print(f"[cyan]Connecting to databases...[/cyan]")
+        db_engine = get_engine(connection_string, config.get("engine"))
+        target_engine = get_engine(target_string, config.get("engine"))
+
+        with instrumented(profile, profile_output, metrics_path):
+            process_subset(config, db_engine, target_engine, workers, anonymize)
+
+    except typer.Exit:
+        raise
+    except ConnectionError as e:
+        print(f"[bold red]{t.get('error_db_connection', error=e)}[/bold red]")
+        raise typer.Exit(code=1)
+    except Exception as e:
+        print(f"[bold red]An unexpected error occurred: {repr(e)}[/bold red]")
+        raise typer.Exit(code=1)
+
+@app.command()
+def bench(
+    rows: Annotated[int, typer.Option("--rows", "-n", help="Rows per table.", min=1)] = 10_000,
+    schema: Annotated[
+        str, typer.Option("--schema", help="'models' (users/orders) or 'synthetic' (generated chain of tables).")
+    ] = "models",
+    tables: Annotated[int, typer.Option("--tables", help="Number of tables in the synthetic schema.", min=1)] = 5,
+    target: Annotated[
+        List[str], typer.Option("--target", "-t", help="Database to benchmark: sqlite-memory, sqlite-file.")
+    ] = None,
+    workers: WorkersOption = 1,
+    output: Annotated[Path, typer.Option("--output", "-o", help="Where to write the JSON results.")] = Path("bench-results.json"),
+    compare: Annotated[
+        Path, typer.Option("--compare", help="Previous JSON results; exit with code 1 if throughput regressed.")
+    ] = None,
+    tolerance: Annotated[
+        Optional[float],
+        typer.Option("--tolerance", help="Allowed drop in rows/sec before a case counts as a regression (default 0.1)."),
+    ] = None,
+):
+    """
+    Benchmark seed and anonymize throughput (rows/sec, phase timings, peak RSS).
+    """
+    from db_tools.core.bench import (BENCH_TARGETS, DEFAULT_TOLERANCE,
+                                     compare_results, load_results,
+                                     print_results, run_benchmarks,
+                                     write_results)
+
+    try:
+        document = run_benchmarks(schema, rows, target or BENCH_TARGETS, workers, tables)
+    except Exception as e:
+        print(f"[bold red]❌ Benchmark failed: {e}[/bold red]")
+        raise typer.Exit(code=1)
+    print_results(document)
+    write_results(document, output)
+    print(f"[bold green]✅ Results written to {output}[/bold green]")
+
+    if compare:
+        if tolerance is None:
+            tolerance = DEFAULT_TOLERANCE
+        regressions = compare_results(document, load_results(compare), tolerance)
+        if regressions:
+            print("[bold red]❌ Throughput regressions detected:[/bold red]")
+            for line in regressions:
+                print(f"[red]   - {line}[/red]")
+            raise typer.Exit(code=1)
+        print(f"[bold green]✅ No regressions compared to {compare}.[/bold green]")
+
+@app.command("profile")
+def profile_command(
+    connection: ConnectionOption = None,
+    output: Annotated[
+        Path, typer.Option("--output", "-o", help="Where to write the profile (JSON).")
+    ] = Path("db-profile.json"),
+    table: Annotated[
+        Optional[List[str]], typer.Option("--table", "-t", help="Table to profile (repeatable, default: all tables).")
+    ] = None,
+    sample_size: Annotated[
+        int, typer.Option("--sample-size", help="Random rows sampled per table for histograms.", min=1)
+    ] = 10_000,
+    top_k: Annotated[
+        int, typer.Option("--top-k", help="Most frequent values recorded per column.", min=0)
+    ] = 20,
+    bins: Annotated[int, typer.Option("--bins", help="Histogram bins per column.", min=1)] = 20,
+):
+    """
+    Write a statistical profile of the database (null ratios, cardinalities, top values,
+    histograms, foreign key fan-out) for `seed --from-profile`.
+    """
+    from db_tools.core.data_profile import build_profile, write_profile
+    from db_tools.core.database import get_engine
+
+    try:
+        config = load_config()
+        connection_string = connection or config.get("connection")
+
+        if not connection_string:
+            print("[bold red]Error: No connection string provided.[/bold red]")
+            print("Please provide one via the --connection option or in a `db_tools.yml` file.")
+            raise typer.Exit(code=1)
+
+        print(f"[cyan]Connecting to database...[/cyan]")
+        db_engine = get_engine(connection_string, config.get("engine"))
+
+        # Không ghi lại giá trị thật của các cột sẽ bị ẩn danh hóa
+        redact = {
+            table_name: list(table_config.get("columns", {}))
+            for table_name, table_config in (config.get("anonymize") or {}).items()
+        }
+        document = build_profile(db_engine, table, sample_size, top_k, bins, redact)
+        write_profile(document, output)
+        print(f"[bold green]✅ Profiled {len(document['tables'])} table(s), written to {output}[/bold green]")
+
+    except typer.Exit:
+        raise
+    except ConnectionError as e:
+        print(f"[bold red]{t.get('error_db_connection', error=e)}[/bold red]")
+        raise typer.Exit(code=1)
+    except Exception as e:
+        print(f"[bold red]An unexpected error occurred: {repr(e)}[/bold red]")
+        raise typer.Exit(code=1)
+
+
 @app.command()
 def ui():
+    from db_tools.tui import DbToolsApp
+
     app = DbToolsApp()
     app.run()
 
@@ -1,40 +1,92 @@
-import io
-from contextlib import redirect_stdout
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Set
 
 from rich.text import Text
 from textual import events, work
+from textual.worker import get_current_worker
 from textual.app import App, ComposeResult
 from textual.containers import Horizontal, Vertical
 from textual.message import Message
-from textual.widgets import DataTable, Footer, Header, RichLog, Tree
+from textual.widgets import (DataTable, Footer, Header, Label, ProgressBar,
+                             RichLog, Tree)
 
+from db_tools.core import metrics, progress
 from db_tools.core.config_loader import load_config
-from db_tools.core.database import (get_engine, get_table_preview_data,
-                                      inspect_db_schema, ping_database)
+from db_tools.core.database import (dispose_engines, get_engine,
+                                    get_table_columns, get_table_preview_page,
+                                    list_table_names, ping_database)
 from db_tools.core.processor import process_anonymize, process_seed
 from db_tools.core.translator import Translator
 
 
-class LogMessage(Message):
-    def __init__(self, content: Any) -> None:
-        self.content = content
-        super().__init__()
-
 class TablePreview(Message):
-    def __init__(self, table_name: str, columns: List[str], rows: List[tuple]) -> None:
+    def __init__(
+        self,
+        table_name: str,
+        columns: List[str],
+        rows: List[tuple],
+        next_key: Any = None,
+        request_id: int = 0,
+        append: bool = False,
+    ) -> None:
         self.table_name = table_name
         self.columns = columns
         self.rows = rows
+        # Khóa để lấy trang tiếp theo (keyset), None nếu đã hết dữ liệu
+        self.next_key = next_key
+        # Lần chọn bảng đã yêu cầu trang này; trang của một lần chọn cũ bị bỏ qua
+        self.request_id = request_id
+        # True: nối thêm vào bảng đang xem; False: trang đầu tiên của bảng mới
+        self.append = append
         super().__init__()
 
-class LogRedirect(io.StringIO):
-    def __init__(self, app_ref: App):
-        self.app_ref = app_ref
+
+class TablePreviewFailed(Message):
+    """Không lấy được một trang xem trước: cho phép yêu cầu lại trang đó."""
+
+    def __init__(self, request_id: int = 0) -> None:
+        self.request_id = request_id
         super().__init__()
-    def write(self, s: str) -> int:
-        self.app_ref.post_message(LogMessage(s))
-        return len(s)
+
+
+class PreviewTable(DataTable):
+    """
+    DataTable xem trước dữ liệu. DataTable chỉ vẽ các dòng đang hiển thị;
+    khi người dùng cuộn gần tới cuối, widget xin nạp thêm trang tiếp theo.
+    """
+    # Số dòng còn lại (chưa hiển thị) khi bắt đầu nạp trang tiếp theo
+    LOAD_MARGIN = 10
+
+    class NearEnd(Message):
+        pass
+
+    def watch_scroll_y(self, old_value: float, new_value: float) -> None:
+        super().watch_scroll_y(old_value, new_value)
+        if self.row_count and new_value + self.size.height >= self.row_count - self.LOAD_MARGIN:
+            self.post_message(self.NearEnd())
+
+
+class TaskProgressRow(Horizontal):
+    """Thanh tiến trình và tốc độ xử lý của một bảng trong tác vụ đang chạy."""
+
+    def __init__(self, table_name: str, total: int) -> None:
+        super().__init__(classes="task_progress")
+        self.table_name = table_name
+        self._bar = ProgressBar(total=total or None, show_eta=True)
+        self._rate = Label("", classes="task_rate")
+
+    def compose(self) -> ComposeResult:
+        yield Label(self.table_name, classes="task_label")
+        yield self._bar
+        yield self._rate
+
+    def update_progress(self, done: int, rows_per_sec: float) -> None:
+        self._bar.update(progress=done)
+        self._rate.update(f"{rows_per_sec:,.0f} rows/s")
+
+    def finish(self, done: int, seconds: float) -> None:
+        self._bar.update(total=max(done, 1), progress=done)
+        rate = done / seconds if seconds else 0.0
+        self._rate.update(f"{done:,} rows, {rate:,.0f} rows/s")
 
 
 class DbToolsApp(App):
@@ -42,22 +94,36 @@ class DbToolsApp(App):
     BINDINGS = [
         ("s", "seed", "Seed Data"),
         ("a", "anonymize", "Anonymize Data"),
+        ("n", "next_page", "Next Rows"),
         ("d", "toggle_dark", "Toggle Dark Mode"),
         ("q", "quit", "Quit"),
     ]
     CSS_PATH = "tui.css"
+    PREVIEW_PAGE_SIZE = 100
+    # Số lần mỗi giây giao diện lấy sự kiện tiến độ từ tác vụ đang chạy
+    PROGRESS_REFRESH_HZ = 10
 
     def __init__(self) -> None:
         super().__init__()
         self.t = Translator() 
+        self._preview_table: Optional[str] = None
+        self._preview_next_key: Any = None
+        self._preview_request = 0
+        self._preview_loading = False
+        # Các bảng đã nạp danh sách cột vào cây schema
+        self._columns_loaded: Set[str] = set()
+        # Kênh sự kiện của tác vụ seed/anonymize gần nhất
+        self._channel: Optional[progress.ProgressChannel] = None
+        self._progress_rows: Dict[str, TaskProgressRow] = {}
 
     def compose(self) -> ComposeResult:
         yield Header()
         with Horizontal(id="main_container"):
             yield Tree(self.t.get("tree_root_label"), id="schema_tree")
             with Vertical(id="content_container"):
+                yield Vertical(id="progress_panel")
                 yield RichLog(id="log_viewer", auto_scroll=True, wrap=True, highlight=True)
-                yield DataTable(id="details_table", show_header=True)
+                yield PreviewTable(id="details_table", show_header=True)
         yield Footer()
 
     def on_mount(self) -> None:
@@ -66,6 +132,7 @@ class DbToolsApp(App):
         footer.bindings = [
             ("s", "seed", self.t.get("binding_seed")),
             ("a", "anonymize", self.t.get("binding_anonymize")),
+            ("n", "next_page", self.t.get("binding_next_page")),
             ("d", "toggle_dark", self.t.get("binding_toggle_dark")),
             ("q", "quit", self.t.get("binding_quit")),
         ]
@@ -74,6 +141,7 @@ class DbToolsApp(App):
         self.log_viewer = self.query_one(RichLog)
         self.write_log(f"[bold]{self.t.get('welcome_message')}[/bold]")
         self.write_log(self.t.get('key_prompt'))
+        self.set_interval(1 / self.PROGRESS_REFRESH_HZ, self._drain_progress)
         self.load_schema()
 
     def write_log(self, message: Any) -> None:
@@ -82,9 +150,6 @@ class DbToolsApp(App):
         else:
             self.log_viewer.write(message)
 
-    def on_log_message(self, message: LogMessage) -> None:
-        self.write_log(message.content)
-
     # --- SỬA LẠI TRIỆT ĐỂ Ở ĐÂY ---
     def _reset_details_table(self) -> DataTable:
         """Helper để xóa sạch cả cột và dòng của DataTable."""
@@ -98,36 +163,96 @@ class DbToolsApp(App):
         return details_table
 
     async def on_tree_node_selected(self, event: Tree.NodeSelected) -> None:
-        table_name_node = event.node
-        if table_name_node.parent == self.query_one(Tree).root:
-            table_name = str(table_name_node.label).replace("[bold]", "").replace("[/bold]", "")
-            
-            details_table = self._reset_details_table()
-            
-            details_table.display = True
-            details_table.add_column("Status")
-            details_table.add_row("Fetching data preview...")
-            
-            self.fetch_table_preview(table_name)
+        table_name = event.node.data
+        if table_name is None:
+            # Nút gốc hoặc một cột
+            return
+        details_table = self._reset_details_table()
+        details_table.display = True
+        details_table.add_column("Status")
+        details_table.add_row("Fetching data preview...")
 
-    @work(exclusive=True, group="db_work", thread=True)
-    def fetch_table_preview(self, table_name: str) -> None:
+        self._preview_request += 1
+        self._preview_table = table_name
+        self._preview_next_key = None
+        self._preview_loading = True
+        self.fetch_table_preview(table_name, None, self._preview_request)
+
+    def on_tree_node_expanded(self, event: Tree.NodeExpanded) -> None:
+        table_name = event.node.data
+        if table_name is not None and table_name not in self._columns_loaded:
+            self._columns_loaded.add(table_name)
+            self.load_columns(event.node)
+
+    @work(group="columns", thread=True)
+    def load_columns(self, node) -> None:
+        """Chỉ reflect bảng khi người dùng mở nút của nó; kết quả được giữ trong schema cache."""
+        table_name = node.data
+        try:
+            config = load_config()
+            db_engine = get_engine(config.get("connection"), config.get("engine"))
+            columns = get_table_columns(db_engine, table_name)
+        except Exception as e:
+            self._columns_loaded.discard(table_name)
+            self.call_from_thread(self.write_log, f"[red]Could not load columns for '{table_name}': {repr(e)}[/red]")
+            return
+        self.call_from_thread(self._add_column_leaves, node, columns)
+
+    def _add_column_leaves(self, node, columns: List[str]) -> None:
+        for col_name in columns:
+            node.add_leaf(col_name)
+
+    # Nhóm riêng và exclusive: chọn bảng khác sẽ hủy worker xem trước đang chạy
+    @work(exclusive=True, group="preview", thread=True)
+    def fetch_table_preview(self, table_name: str, after: Any = None, request_id: int = 0) -> None:
         try:
             config = load_config()
             connection_string = config.get("connection")
-            db_engine = get_engine(connection_string)
-            columns, rows = get_table_preview_data(db_engine, table_name)
-            self.post_message(TablePreview(table_name, columns, rows))
+            db_engine = get_engine(connection_string, config.get("engine"))
+            columns, rows, next_key = get_table_preview_page(
+                db_engine, table_name, after, self.PREVIEW_PAGE_SIZE
+            )
         except Exception as e:
-            self.write_log(f"[red]Could not fetch preview for '{table_name}': {repr(e)}[/red]")
+            self.call_from_thread(self.write_log, f"[red]Could not fetch preview for '{table_name}': {repr(e)}[/red]")
+            self.post_message(TablePreviewFailed(request_id))
+            return
+        if get_current_worker().is_cancelled:
+            return
+        self.post_message(TablePreview(table_name, columns, rows, next_key, request_id, append=after is not None))
 
     async def on_table_preview(self, message: TablePreview) -> None:
-        table = self._reset_details_table()
-        
-        table.add_columns(*message.columns)
-        for row in message.rows:
-            string_row = [str(cell) for cell in row]
-            table.add_row(*string_row)
+        if message.request_id != self._preview_request:
+            # Kết quả của một bảng đã được bỏ chọn
+            return
+        self._preview_next_key = message.next_key
+        self._preview_loading = False
+        if message.append:
+            table = self.query_one(PreviewTable)
+        else:
+            table = self._reset_details_table()
+            table.add_columns(*message.columns)
+        # Thêm cả trang trong một lần; ô được định dạng khi vẽ, không chuyển sang str trước
+        table.add_rows(message.rows)
+
+    def on_table_preview_failed(self, message: TablePreviewFailed) -> None:
+        if message.request_id == self._preview_request:
+            self._preview_loading = False
+
+    def _load_next_page(self) -> bool:
+        """Yêu cầu trang tiếp theo của bảng đang xem; False nếu không còn trang nào."""
+        if self._preview_table is None or self._preview_next_key is None:
+            return False
+        if not self._preview_loading:
+            self._preview_loading = True
+            self.fetch_table_preview(self._preview_table, self._preview_next_key, self._preview_request)
+        return True
+
+    def on_preview_table_near_end(self, message: PreviewTable.NearEnd) -> None:
+        self._load_next_page()
+
+    def on_data_table_row_highlighted(self, event: DataTable.RowHighlighted) -> None:
+        if event.cursor_row >= event.data_table.row_count - PreviewTable.LOAD_MARGIN:
+            self._load_next_page()
 
     @work(exclusive=True, group="db_work", thread=True)
     def load_schema(self) -> None:
@@ -139,49 +264,101 @@ class DbToolsApp(App):
                 self.write_log(f"[bold red]{self.t.get('config_not_found')}[/bold red]")
                 return
 
-            db_engine = get_engine(connection_string)
+            db_engine = get_engine(connection_string, config.get("engine"))
             dialect_name = ping_database(db_engine)
             self.call_from_thread(self.write_log, f"[green]Connection successful to [bold]{dialect_name.upper()}[/bold] database.[/green]")
-            schema = inspect_db_schema(db_engine)
-            self.call_from_thread(self.update_schema_tree, schema)
+            # Chỉ lấy tên bảng; cột được nạp khi mở từng nút
+            table_names = list_table_names(db_engine)
+            self.call_from_thread(self.update_schema_tree, table_names)
         except Exception as e:
             self.write_log(f"[bold red]{self.t.get('schema_load_error')}[/bold red]")
             self.write_log(f"[red]{repr(e)}[/red]")
 
-    def update_schema_tree(self, schema: dict) -> None:
+    def update_schema_tree(self, table_names: List[str]) -> None:
         tree = self.query_one(Tree)
         tree.clear()
+        self._columns_loaded.clear()
         root = tree.root
         root.expand()
-        for table_name, columns in schema.items():
-            table_node = root.add(f"[bold]{table_name}[/bold]")
-            for col_name in columns:
-                table_node.add_leaf(col_name)
+        for table_name in table_names:
+            root.add(Text(table_name, style="bold"), data=table_name, allow_expand=True)
         self.write_log(f"[bold green]{self.t.get('schema_loaded_success')}[/bold green]")
 
     @work(exclusive=True, group="db_work", thread=True)
     def run_task(self, task_function, task_name: str) -> None:
-        self.write_log("-" * 50)
-        self.write_log(f"-> {self.t.get('task_starting', task_name=task_name)}")
-        try:
-            config = load_config()
-            connection_string = config.get("connection")
-            db_engine = get_engine(connection_string)
+        channel = progress.ProgressChannel()
+        self._channel = channel
+        # Mọi thông báo và tiến độ đi qua kênh, giao diện tự lấy ra theo nhịp của nó
+        with progress.attach(channel):
+            progress.echo("-" * 50)
+            progress.echo(f"-> {self.t.get('task_starting', task_name=task_name)}")
+            try:
+                config = load_config()
+                connection_string = config.get("connection")
+                db_engine = get_engine(connection_string, config.get("engine"))
+
+                metrics.reset()
+                unsubscribe = metrics.subscribe(self._on_metric_event)
+                try:
+                    task_function(config, db_engine)
+                finally:
+                    unsubscribe()
+
+                progress.echo(f"[bold green]{self.t.get('task_finished', task_name=task_name)}[/bold green]")
+            except Exception as e:
+                progress.echo(f"[bold red]{self.t.get('task_error', task_name=task_name)}[/bold red]")
+                progress.echo(f"[red]{repr(e)}[/red]")
+
+    def _on_metric_event(self, event: metrics.MetricEvent) -> None:
+        """Chạy trên thread của tác vụ: chỉ báo tóm tắt khi một bảng đã xử lý xong."""
+        if event.kind != "table":
+            return
+        summary = metrics.table_report(event.table)
+        rate = f"{summary['rows_per_sec']:.0f}" if summary["rows_per_sec"] else "-"
+        progress.echo(self.t.get(
+            "table_metrics", table=event.table, rows=summary["rows"], seconds=summary["seconds"], rate=rate,
+        ))
+
+    def _drain_progress(self) -> None:
+        """Chạy trên thread giao diện, tối đa PROGRESS_REFRESH_HZ lần mỗi giây."""
+        if self._channel is None:
+            return
+        panel = self.query_one("#progress_panel", Vertical)
+        for event in self._channel.drain():
+            if isinstance(event, progress.LogLine):
+                self.write_log(event.message)
+            elif isinstance(event, progress.TaskStarted):
+                row = TaskProgressRow(event.table, event.total)
+                self._progress_rows[event.table] = row
+                panel.mount(row)
+            elif event.table in self._progress_rows:
+                row = self._progress_rows[event.table]
+                if isinstance(event, progress.TaskProgress):
+                    row.update_progress(event.done, event.rows_per_sec)
+                else:
+                    row.finish(event.done, event.seconds)
+
+    def _clear_progress(self) -> None:
+        self._progress_rows.clear()
+        self.query_one("#progress_panel", Vertical).remove_children()
+
+    def action_next_page(self) -> None:
+        """Nạp thêm trang dữ liệu tiếp theo của bảng đang xem trước."""
+        if self._preview_table is None:
+            return
+        if not self._load_next_page():
+            self.write_log(f"[yellow]{self.t.get('preview_no_more_rows')}[/yellow]")
 
-            log_redirector = LogRedirect(self)
-            with redirect_stdout(log_redirector):
-                task_function(config, db_engine)
-            
-            self.write_log(f"[bold green]{self.t.get('task_finished', task_name=task_name)}[/bold green]")
-        except Exception as e:
-            self.write_log(f"[bold red]{self.t.get('task_error', task_name=task_name)}[/bold red]")
-            self.write_log(f"[red]{repr(e)}[/red]")
-            
     def action_seed(self) -> None:
+        self._clear_progress()
         self.run_task(process_seed, self.t.get("binding_seed"))
 
     def action_anonymize(self) -> None:
+        self._clear_progress()
         self.run_task(process_anonymize, self.t.get("binding_anonymize"))
         
     def action_quit(self) -> None:
-        self.exit()
\ No newline at end of file
+        self.exit()
+
+    def on_unmount(self) -> None:
+        dispose_engines()
\ No newline at end of file
@@ -0,0 +1,152 @@
+# tests/test_async_processor.py
+
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine, insert, select
+
+from db_tools.core import async_processor, processor
+from db_tools.core.models import Base, Order, User
+
+try:
+    import aiosqlite
+    import greenlet
+except ImportError:  # Chế độ async cần sqlalchemy[asyncio] và aiosqlite
+    aiosqlite = None
+
+requires_async_driver = pytest.mark.skipif(aiosqlite is None, reason="greenlet/aiosqlite is not installed")
+
+SEED_CONFIG = {
+    "seed": {
+        "users": {"count": 45, "chunk_size": 10, "columns": {"name": "name", "email": "uuid4"}},
+        "orders": {
+            "count": 60, "chunk_size": 7,
+            "columns": {"customer_name": "name", "amount": {"provider": "random_int", "min": 1, "max": 99}},
+            "relations": {"user_id": {"table": "users"}},
+        },
+    },
+    "faker_seed": 11,
+}
+
+
+def _rows(db_path):
+    engine = create_engine(f"sqlite:///{db_path}")
+    with engine.connect() as connection:
+        users = connection.execute(select(User.__table__).order_by(User.id)).all()
+        orders = connection.execute(select(Order.__table__).order_by(Order.id)).all()
+    engine.dispose()
+    return users, orders
+
+
+def test_async_url_switches_to_async_driver():
+    """Kiểm tra chuỗi kết nối được đổi sang driver async, và driver async có sẵn được giữ nguyên."""
+    assert async_processor.async_url("sqlite:///data.db") == "sqlite+aiosqlite:///data.db"
+    assert async_processor.async_url("postgresql+psycopg2://u:p@h/db") == "postgresql+asyncpg://u:p@h/db"
+    assert async_processor.async_url("postgresql+asyncpg://u:p@h/db") == "postgresql+asyncpg://u:p@h/db"
+    with pytest.raises(ValueError):
+        async_processor.async_url("oracle://u:p@h/db")
+
+
+def test_buffered_applies_backpressure_and_propagates_errors():
+    """
+    Kiểm tra bên sinh không bao giờ đi trước bên đọc quá `queue_size` phần tử,
+    và lỗi của bên sinh được ném lại ở bên đọc.
+    """
+    produced = []
+
+    async def source(fail_at=None):
+        for i in range(20):
+            if i == fail_at:
+                raise RuntimeError("boom")
+            produced.append(i)
+            yield i
+
+    async def consume():
+        lead = []
+        async for item in async_processor._buffered(source(), 3):
+            await asyncio.sleep(0)
+            lead.append(len(produced) - item)
+        return lead
+
+    # 3 phần tử trong hàng đợi, 1 phần tử đang được đọc và 1 phần tử bên sinh đang chờ chỗ trống
+    assert max(asyncio.run(consume())) <= 3 + 2
+
+    async def consume_failing():
+        return [item async for item in async_processor._buffered(source(fail_at=5), 2)]
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(consume_failing())
+
+
+@requires_async_driver
+def test_async_seed_matches_sync_seed(tmp_path):
+    """
+    Kiểm tra seed qua pipeline async cho đúng dữ liệu như seed đồng bộ với cùng faker_seed
+    (cùng luồng chunk, cùng khóa ngoại).
+    """
+    for name in ("sync.db", "async.db"):
+        engine = create_engine(f"sqlite:///{tmp_path / name}")
+        Base.metadata.create_all(engine)
+        engine.dispose()
+
+    sync_engine = create_engine(f"sqlite:///{tmp_path / 'sync.db'}")
+    processor.process_seed(SEED_CONFIG, sync_engine)
+    sync_engine.dispose()
+    async_processor.run_seed(SEED_CONFIG, f"sqlite:///{tmp_path / 'async.db'}")
+
+    sync_users, sync_orders = _rows(tmp_path / "sync.db")
+    async_users, async_orders = _rows(tmp_path / "async.db")
+    assert len(async_users) == 45 and len(async_orders) == 60
+    assert async_users == sync_users
+    assert async_orders == sync_orders
+
+
+@requires_async_driver
+def test_async_anonymize_with_rules_and_checkpoint(tmp_path):
+    """
+    Kiểm tra ẩn danh hóa async theo nhiều batch: cột Faker và cột quy tắc SQL đều được áp dụng,
+    và checkpoint được xóa khi chạy xong.
+    """
+    db_path = tmp_path / "anon.db"
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(User.__table__), [
+            {"name": f"user {i}", "email": f"user{i}@example.com"} for i in range(1, 26)
+        ])
+    engine.dispose()
+    config = {
+        "anonymize": {
+            "users": {
+                "batch_size": 4,
+                "columns": {"name": "name", "email": {"rule": "template", "template": "user{id}@test.local"}},
+            }
+        },
+        "checkpoint_dir": str(tmp_path / "checkpoints"),
+    }
+    async_processor.run_anonymize(config, f"sqlite:///{db_path}")
+
+    users, _ = _rows(db_path)
+    assert len(users) == 25
+    assert all(not user.name.startswith("user ") for user in users)
+    assert [user.email for user in users] == [f"user{user.id}@test.local" for user in users]
+    assert not list((tmp_path / "checkpoints").glob("*.json"))
+
+
+def test_async_anonymize_rejects_incremental_tables_up_front():
+    """
+    Kiểm tra cấu hình `incremental` bị từ chối trước khi kết nối hay xử lý bất kỳ bảng nào
+    (engine không bao giờ được dùng tới).
+    """
+    config = {
+        "anonymize": {
+            "orders": {"columns": {"customer_name": "name"}},
+            "users": {"incremental": "hash", "columns": {"name": "name"}},
+        },
+    }
+    assert async_processor.incremental_tables(config) == ["users"]
+    asyncio.run(async_processor.process_anonymize_async(config, db_engine=None))
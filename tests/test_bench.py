@@ -0,0 +1,64 @@
+# tests/test_bench.py
+
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+
+import pytest
+
+from db_tools.core import bench
+from db_tools.core.models import Base
+
+try:
+    import pytest_benchmark
+except ImportError:  # pytest-benchmark là tùy chọn (extra `dev`)
+    pytest_benchmark = None
+
+
+def test_run_benchmarks_reports_throughput_and_phases(tmp_path):
+    """
+    Kiểm tra bộ benchmark chạy seed + anonymize trên schema tổng hợp và ghi/đọc lại được JSON.
+    """
+    document = bench.run_benchmarks("synthetic", rows=50, targets=["sqlite-memory"], tables=3, columns=3)
+    operations = [result["operation"] for result in document["results"]]
+    assert operations == ["seed", "anonymize"]
+    for result in document["results"]:
+        assert result["rows"] == 150
+        assert result["rows_per_sec"] > 0
+        assert "generate" in result["phases"] and "write" in result["phases"]
+        assert result["peak_rss_mb"] is None or result["peak_rss_mb"] > 0
+
+    path = tmp_path / "results.json"
+    bench.write_results(document, path)
+    assert bench.load_results(path) == document
+
+
+def test_measure_raises_when_the_operation_fails():
+    """Kiểm tra một thao tác trả về False (đã báo lỗi) làm benchmark dừng thay vì ghi nhận kết quả."""
+    with pytest.raises(RuntimeError, match="Benchmark 'seed' failed"):
+        bench._measure("seed", lambda: False, 10)
+
+
+def test_compare_results_flags_regressions():
+    """
+    Kiểm tra chỉ các trường hợp chậm đi quá ngưỡng cho phép mới bị báo là hồi quy.
+    """
+    case = {"schema": "models", "target": "sqlite-file", "rows": 100}
+    baseline = {"results": [
+        {**case, "operation": "seed", "rows_per_sec": 1000.0},
+        {**case, "operation": "anonymize", "rows_per_sec": 1000.0},
+    ]}
+    current = {"results": [
+        {**case, "operation": "seed", "rows_per_sec": 950.0},
+        {**case, "operation": "anonymize", "rows_per_sec": 500.0},
+    ]}
+    regressions = bench.compare_results(current, baseline, tolerance=0.1)
+    assert len(regressions) == 1
+    assert regressions[0].startswith("anonymize on sqlite-file")
+
+
+@pytest.mark.skipif(pytest_benchmark is None, reason="pytest-benchmark is not installed")
+@pytest.mark.parametrize("target", bench.BENCH_TARGETS)
+def test_benchmark_seed_and_anonymize_models(benchmark, tmp_path, target):
+    """Benchmark với pytest-benchmark (chạy bằng `pytest --benchmark-only`)."""
+    benchmark.pedantic(bench.run_case, args=(target, Base.metadata, 1000, tmp_path), rounds=3)
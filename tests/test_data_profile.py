@@ -0,0 +1,104 @@
+# tests/test_data_profile.py
+
+import json
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+
+import pytest
+from sqlalchemy import create_engine, insert
+
+from db_tools.core import data_profile, processor
+from db_tools.core.models import Base, Order, User
+
+
+@pytest.fixture
+def db_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(User.__table__), [
+            {"id": i, "name": f"user {i}", "email": f"u{i}@example.com", "is_active": i % 4 != 0}
+            for i in range(1, 41)
+        ])
+        # Mỗi user chẵn có 2 đơn hàng, user lẻ không có; 1/4 số đơn không có địa chỉ
+        connection.execute(insert(Order.__table__), [
+            {
+                "customer_name": "x", "user_id": user_id, "amount": float(n * 10),
+                "shipping_address": None if n % 4 == 0 else "street",
+            }
+            for n, user_id in enumerate([u for u in range(2, 41, 2) for _ in range(2)])
+        ])
+    yield engine
+    engine.dispose()
+
+
+def test_profile_records_nulls_cardinality_and_fanout(db_engine):
+    """
+    Kiểm tra profile ghi lại số dòng, tỉ lệ NULL, số giá trị khác nhau, top-k,
+    histogram và fanout của khóa ngoại; cột bị redact không có giá trị thật.
+    """
+    document = data_profile.build_profile(db_engine, redact={"users": ["name"]})
+    users, orders = document["tables"]["users"], document["tables"]["orders"]
+
+    assert users["rows"] == 40 and orders["rows"] == 40
+    assert users["columns"]["email"]["unique"] is True
+    assert "top" not in users["columns"]["name"]
+    assert users["columns"]["is_active"]["top"] == [[True, 0.75], [False, 0.25]]
+    assert orders["columns"]["shipping_address"]["null_fraction"] == 0.25
+    assert orders["columns"]["customer_name"]["top"] == [["x", 1.0]]
+    assert sum(orders["columns"]["amount"]["histogram"]["counts"]) == 40
+    assert orders["relations"]["user_id"]["fanout"] == [[0, 20], [2, 20]]
+    assert orders["relations"]["user_id"]["parents"] == 40
+
+
+def test_redacted_columns_record_no_source_values(db_engine):
+    """
+    Kiểm tra cột bị redact không ghi lại giá trị thật nào: không có top, min/max (biên histogram) hay độ dài chuỗi,
+    chỉ còn loại cột, tỉ lệ NULL và số đếm.
+    """
+    document = data_profile.build_profile(db_engine, redact={"users": ["name"], "orders": ["amount"]})
+    name = document["tables"]["users"]["columns"]["name"]
+    amount = document["tables"]["orders"]["columns"]["amount"]
+
+    for profile in (name, amount):
+        assert set(profile) <= {"kind", "nullable", "null_fraction", "distinct", "unique", "redacted"}
+        assert profile["redacted"] is True
+    assert "user" not in json.dumps(name)
+    # Giá trị lớn nhất thật (390.0) không xuất hiện, kể cả dưới dạng biên histogram
+    assert "390" not in json.dumps(amount)
+    assert data_profile.column_spec(amount) is None
+
+
+def test_seed_from_profile_matches_distributions_at_scale(db_engine, tmp_path):
+    """
+    Kiểm tra seed từ profile với scale = 5: số dòng được nhân lên, giá trị chỉ lấy trong top khi top đầy đủ,
+    tỉ lệ NULL và fanout được giữ, cột được cấu hình trong `seed` vẫn dùng provider đã cấu hình.
+    """
+    document = data_profile.build_profile(db_engine)
+    seed_config = data_profile.seed_config_from_profile(
+        document, scale=5, seed_config={"users": {"columns": {"name": "name"}}}
+    )
+    assert seed_config["users"]["columns"]["name"] == {"provider": "name"}
+    assert seed_config["orders"]["relations"]["user_id"]["distribution"] == "fanout"
+
+    target = create_engine(f"sqlite:///{tmp_path / 'target.db'}")
+    Base.metadata.create_all(target)
+    processor.process_seed({"seed": seed_config, "faker_seed": 7}, target)
+
+    with target.connect() as connection:
+        orders = connection.execute(Order.__table__.select()).all()
+        users = connection.execute(User.__table__.select()).all()
+    target.dispose()
+
+    assert len(users) == 200 and len(orders) == 200
+    assert {order.customer_name for order in orders} == {"x"}
+    assert all(0 <= order.amount <= 390 for order in orders)
+    assert 0.1 < sum(order.shipping_address is None for order in orders) / 200 < 0.4
+    children = {}
+    for order in orders:
+        children[order.user_id] = children.get(order.user_id, 0) + 1
+    # Trong profile một nửa số user có 2 đơn hàng, nửa còn lại không có
+    # (vòng fanout cuối có thể bị cắt giữa chừng nên cho phép sai lệch)
+    assert 70 <= len(children) <= 130
+    assert sum(count == 2 for count in children.values()) >= 0.8 * len(children)
@@ -0,0 +1,39 @@
+# tests/test_database.py
+
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+
+import pytest
+
+from db_tools.core import database
+
+
+@pytest.fixture
+def connection_string(tmp_path):
+    yield f"sqlite:///{tmp_path / 'test.db'}"
+    database.dispose_engines()
+
+
+def test_engine_registry_reuses_engines_per_url_and_options(connection_string):
+    """
+    Kiểm tra cùng chuỗi kết nối và tùy chọn thì dùng lại đúng một engine, tùy chọn khác thì tạo engine mới
+    (khóa không thuộc mục `engine:` được bỏ qua), và dispose_engines làm rỗng registry.
+    """
+    db_engine = database.get_engine(connection_string, {"pool_pre_ping": True})
+    assert database.get_engine(connection_string, {"pool_pre_ping": True, "unknown": 1}) is db_engine
+    other = database.get_engine(connection_string)
+    assert other is not db_engine
+    assert database.get_engine(connection_string, {}) is other
+    assert len(database._engines) == 2
+
+    database.dispose_engines()
+    assert not database._engines
+    assert database.get_engine(connection_string) is not other
+
+
+def test_get_engine_reports_unreachable_databases(tmp_path):
+    """Kiểm tra lỗi kết nối được đổi thành ConnectionError và không có engine nào được lưu."""
+    with pytest.raises(ConnectionError):
+        database.get_engine(f"sqlite:///{tmp_path / 'missing' / 'test.db'}")
+    assert not database._engines
@@ -0,0 +1,101 @@
+# tests/test_dependency_resolver.py
+
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+
+import pytest
+
+from db_tools.core.dependency_resolver import (CyclicDependencyError,
+                                               get_seeding_levels,
+                                               get_seeding_order,
+                                               get_seeding_plan, merge_relations)
+
+SEED_CONFIG = {
+    "orders": {"relations": {"user_id": {"table": "users"}, "product_id": {"table": "products"}}},
+    "users": {},
+    "products": {},
+    "reviews": {"relations": {"order_id": {"table": "orders"}}},
+}
+
+
+def test_get_seeding_levels_groups_independent_tables():
+    """
+    Kiểm tra các bảng độc lập nằm cùng tầng và bảng con nằm sau bảng cha.
+    """
+    levels = get_seeding_levels(SEED_CONFIG)
+    assert [sorted(level) for level in levels] == [["products", "users"], ["orders"], ["reviews"]]
+
+
+def test_get_seeding_order_is_flattened_levels():
+    """
+    Kiểm tra thứ tự phẳng vẫn đặt bảng cha trước bảng con.
+    """
+    order = get_seeding_order(SEED_CONFIG)
+    assert order.index("users") < order.index("orders") < order.index("reviews")
+
+
+def test_cycle_is_rejected():
+    """
+    Kiểm tra chu trình phụ thuộc bị báo lỗi.
+    """
+    config = {"a": {"relations": {"b_id": {"table": "b"}}}, "b": {"relations": {"a_id": {"table": "a"}}}}
+    with pytest.raises(ValueError):
+        get_seeding_levels(config)
+
+
+def test_cycle_error_names_the_offending_edges():
+    """
+    Kiểm tra lỗi chu trình liệt kê đúng các cạnh tạo thành chu trình.
+    """
+    config = {
+        "a": {"relations": {"b_id": {"table": "b"}}},
+        "b": {"relations": {"a_id": {"table": "a"}}},
+        "c": {"relations": {"a_id": {"table": "a"}}},
+    }
+    with pytest.raises(CyclicDependencyError) as error:
+        get_seeding_levels(config)
+    assert sorted(error.value.edges) == [("a", "b_id", "b"), ("b", "a_id", "a")]
+    assert "a.b_id -> b" in str(error.value)
+
+
+def test_seeding_plan_defers_self_references_and_nullable_cycle_edges():
+    """
+    Kiểm tra quan hệ tự tham chiếu luôn được hoãn, chu trình được phá ở cạnh nullable,
+    và chu trình toàn cột NOT NULL vẫn bị báo lỗi.
+    """
+    config = {
+        "employees": {"relations": {"manager_id": {"table": "employees"}}},
+        "a": {"relations": {"b_id": {"table": "b"}}},
+        "b": {"relations": {"a_id": {"table": "a"}}},
+    }
+    nullable = {("employees", "manager_id"), ("b", "a_id")}
+    levels, deferred = get_seeding_plan(config, lambda table, column: (table, column) in nullable)
+    assert sorted(deferred) == [("b", "a_id"), ("employees", "manager_id")]
+    order = [table for level in levels for table in level]
+    assert order.index("b") < order.index("a")
+
+    with pytest.raises(CyclicDependencyError):
+        get_seeding_plan(config, lambda table, column: table == "employees")
+    with pytest.raises(ValueError):
+        get_seeding_plan(config, lambda table, column: False)
+
+
+def test_merge_relations_prefers_configuration():
+    """
+    Kiểm tra quan hệ khai báo trong cấu hình được ưu tiên, giá trị rỗng tắt quan hệ đã phát hiện,
+    và cột đã có provider không bị ghi đè.
+    """
+    config = {
+        "orders": {
+            "columns": {"coupon_id": "random_int"},
+            "relations": {"user_id": {"table": "customers"}, "product_id": None},
+        },
+    }
+    discovered = {"orders": {"relations": {
+        "user_id": {"table": "users"}, "product_id": {"table": "products"},
+        "coupon_id": {"table": "coupons"}, "shop_id": {"table": "shops"},
+    }}}
+    merged = merge_relations(config, discovered)
+    assert merged["orders"]["relations"] == {"user_id": {"table": "customers"}, "shop_id": {"table": "shops"}}
+    assert config["orders"]["relations"]["product_id"] is None
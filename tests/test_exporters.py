@@ -0,0 +1,110 @@
+# tests/test_exporters.py
+
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+
+import pytest
+from sqlalchemy import (JSON, Column, Integer, MetaData, Table, create_engine,
+                        func, insert, select)
+
+from db_tools.core import exporters, loader, processor
+from db_tools.core.models import Base, Order, User
+
+# Bảng có cột JSON: giá trị dict/list phải được ghi và đọc lại dưới dạng JSON, không phải repr của Python
+json_metadata = MetaData()
+events = Table("events", json_metadata, Column("id", Integer, primary_key=True), Column("payload", JSON))
+PAYLOADS = [{"a": 1, "tags": ["x", "it's"]}, [1, 2.5, None], {"nested": {"ok": True}}]
+
+SEED_CONFIG = {
+    "users": {
+        "count": 30,
+        "chunk_size": 8,
+        "columns": {
+            "name": {"provider": "random_element", "elements": ["50% off", "O'Brien", ""]},
+            "email": "uuid4",
+            "is_active": "pybool",
+            "created_at": "date_time",
+        },
+    },
+    "orders": {
+        "count": 70,
+        "chunk_size": 16,
+        "columns": {
+            "customer_name": "name",
+            "amount": "pyfloat",
+            "shipping_address": {"provider": "address", "null_fraction": 0.5},
+        },
+        "relations": {"user_id": {"table": "users"}},
+    },
+    "events": {"count": 12, "columns": {"payload": {"provider": "random_element", "elements": PAYLOADS}}},
+}
+
+
+@pytest.fixture
+def db_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(engine)
+    json_metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(User.__table__), [{"id": 1, "name": "existing", "email": "e@example.com"}])
+    yield engine
+    engine.dispose()
+
+
+def _rows(db_engine, table):
+    with db_engine.connect() as connection:
+        return [tuple(row) for row in connection.execute(select(table).order_by(table.c.id))]
+
+
+@pytest.mark.parametrize("fmt", [
+    "csv",
+    "sql",
+    pytest.param("parquet", marks=pytest.mark.skipif(exporters.pq is None, reason="pyarrow is not installed")),
+])
+def test_seed_to_files_then_load(db_engine, tmp_path, fmt):
+    """
+    Kiểm tra `seed --output` ghi mỗi bảng một file theo thứ tự phụ thuộc mà không chạm vào database,
+    và `load` nạp lại đúng các dòng đó: khóa chính tiếp theo dữ liệu có sẵn, khóa ngoại hợp lệ,
+    NULL khác chuỗi rỗng, giá trị có ký tự đặc biệt được giữ nguyên.
+    """
+    output = tmp_path / "out"
+    processor.process_seed({"seed": SEED_CONFIG, "faker_seed": 7}, db_engine, output=str(output), output_format=fmt)
+
+    manifest = exporters.load_manifest(output)
+    rows_per_table = {entry["table"]: entry["rows"] for entry in manifest["tables"]}
+    assert rows_per_table == {"users": 30, "orders": 70, "events": 12}
+    tables = [entry["table"] for entry in manifest["tables"]]
+    assert tables.index("users") < tables.index("orders")
+    assert _rows(db_engine, User.__table__) == [(1, "existing", "e@example.com", None, None)]
+
+    loader.process_load({}, db_engine, str(output), chunk_size=25)
+
+    users = _rows(db_engine, User.__table__)
+    assert [row[0] for row in users] == list(range(1, 32))
+    assert {row[1] for row in users[1:]} <= {"50% off", "O'Brien", ""}
+    assert all(isinstance(row[3], bool) for row in users[1:])
+    orders = _rows(db_engine, Order.__table__)
+    assert len(orders) == 70
+    assert {row[5] for row in orders} <= set(range(2, 32))
+    assert any(row[2] is None for row in orders) and any(row[2] for row in orders)
+    payloads = [row[1] for row in _rows(db_engine, events)]
+    assert len(payloads) == 12 and all(payload in PAYLOADS for payload in payloads)
+
+
+def test_seed_to_files_matches_seed_to_database(db_engine, tmp_path):
+    """Kiểm tra dữ liệu nạp từ file giống hệt dữ liệu seed thẳng vào database với cùng faker_seed."""
+    config = {"seed": SEED_CONFIG, "faker_seed": 7}
+    processor.process_seed(config, db_engine, output=str(tmp_path / "out"), output_format="csv")
+    loader.process_load({}, db_engine, str(tmp_path / "out"))
+    loaded = _rows(db_engine, Order.__table__)
+
+    direct_engine = create_engine(f"sqlite:///{tmp_path / 'direct.db'}")
+    Base.metadata.create_all(direct_engine)
+    with direct_engine.begin() as connection:
+        connection.execute(insert(User.__table__), [{"id": 1, "name": "existing", "email": "e@example.com"}])
+    processor.process_seed(config, direct_engine)
+    assert loaded == _rows(direct_engine, Order.__table__)
+    with direct_engine.connect() as connection:
+        assert connection.execute(select(func.count()).select_from(User.__table__)).scalar() == 31
+    direct_engine.dispose()
@@ -5,6 +5,11 @@ import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
 
+from datetime import date, datetime, timedelta
+
+import pytest
+from faker import Faker
+
 from db_tools.core import faker_manager
 
 def test_generate_fake_row_returns_dict():
@@ -44,4 +49,68 @@ def test_generate_bulk_data():
     assert isinstance(result, list)
     assert len(result) == count
     assert isinstance(result[0], dict)
-    assert "address" in result[0]
\ No newline at end of file
+    assert "address" in result[0]
+
+
+def test_compile_plan_rejects_unknown_provider():
+    """
+    Kiểm tra plan báo lỗi ngay khi biên dịch nếu provider không tồn tại.
+    """
+    config = {"name": "name", "invalid_field": "non_existent_provider"}
+    with pytest.raises(ValueError):
+        faker_manager.compile_plan(config)
+
+def test_generate_columns_returns_columnar_data():
+    """
+    Kiểm tra API theo lô trả về dữ liệu dạng cột, kể cả với các provider có fast path.
+    """
+    config = {
+        "name": "name",
+        "age": {"provider": "random_int", "min": 18, "max": 20},
+        "score": {"provider": "pyfloat", "min_value": 0, "max_value": 1, "right_digits": 2},
+        "active": "boolean",
+        "status": {"provider": "random_element", "elements": ["new", "paid"]},
+        "joined": {"provider": "date_between", "start_date": "-1y"},
+    }
+    plan = faker_manager.compile_plan(config)
+    result = faker_manager.generate_columns(50, plan)
+    assert set(result) == set(config)
+    assert all(len(values) == 50 for values in result.values())
+    assert all(18 <= age <= 20 for age in result["age"])
+    assert all(0 <= score <= 1 for score in result["score"])
+    assert all(isinstance(active, bool) for active in result["active"])
+    assert set(result["status"]) <= {"new", "paid"}
+
+def test_pool_column_samples_from_cached_pool(tmp_path):
+    """
+    Kiểm tra cột dùng pool chỉ lấy giá trị trong pool và pool được lưu xuống đĩa.
+    """
+    config = {"name": {"provider": "name", "pool": 10, "pool_cache": str(tmp_path)}}
+    result = faker_manager.generate_columns(200, faker_manager.compile_plan(config))
+    pool = faker_manager.build_pool("name", {}, 10, str(tmp_path))
+    assert len(result["name"]) == 200
+    assert set(result["name"]) <= set(pool)
+    assert len(list(tmp_path.glob("name-*.pkl"))) == 1
+
+def test_date_providers_use_the_batch_fast_path():
+    """
+    Kiểm tra date_time_between/date_between được sinh theo lô (không gọi Faker cho từng giá trị)
+    với mốc dạng datetime/date hoặc khoảng tương đối, và mọi giá trị nằm trong khoảng.
+    """
+    faker = Faker()
+    faker.seed_instance(1)
+    start, end = datetime(2020, 1, 1), datetime(2020, 1, 31, 12)
+    generate = faker_manager._fast_path(faker, "date_time_between", {"start_date": start, "end_date": end})
+    assert generate is not None
+    values = generate(200)
+    assert all(isinstance(value, datetime) and start <= value <= end for value in values)
+    assert len(set(values)) > 100
+
+    generate = faker_manager._fast_path(faker, "date_between", {"start_date": "-30d", "end_date": "+1d"})
+    assert generate is not None
+    today = date.today()
+    days = generate(200)
+    assert all(type(day) is date and today - timedelta(days=30) <= day <= today + timedelta(days=1) for day in days)
+
+    # Dạng không quen thuộc: để Faker tự xử lý
+    assert faker_manager._fast_path(faker, "date_between", {"start_date": "last week"}) is None
@@ -0,0 +1,94 @@
+# tests/test_fk_sampler.py
+
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+
+import pytest
+from sqlalchemy import Column, Integer, MetaData, String, Table, create_engine, insert
+
+from db_tools.core import fk_sampler
+
+
+def test_key_pool_stores_contiguous_keys_as_ranges():
+    """
+    Kiểm tra khóa liên tiếp được gộp thành đoạn và khóa thưa vẫn lấy ra đúng theo vị trí.
+    """
+    pool = fk_sampler.KeyPool()
+    pool.extend(range(1, 100_001))
+    pool.extend([200_000, 200_005])
+    pool.add_range(200_006, 200_010)
+
+    assert len(pool) == 100_006
+    assert len(pool._starts) == 3
+    assert pool.take([0, 99_999, 100_000, 100_001, 100_002, 100_005]) == [
+        1, 100_000, 200_000, 200_005, 200_006, 200_009,
+    ]
+
+
+def test_key_pool_falls_back_to_objects_for_non_integer_keys():
+    """
+    Kiểm tra khóa không phải số nguyên (ví dụ UUID dạng chuỗi) vẫn được giữ đúng thứ tự.
+    """
+    pool = fk_sampler.KeyPool()
+    pool.extend([1, 2, "a-b", 7])
+    assert pool.take(range(len(pool))) == [1, 2, "a-b", 7]
+
+
+def test_key_pool_reads_existing_parents_from_database():
+    """
+    Kiểm tra đọc khóa của bảng cha có sẵn: bảng liền mạch và bảng có khoảng trống.
+    """
+    engine = create_engine("sqlite://")
+    parents = Table("parents", MetaData(), Column("id", Integer, primary_key=True), Column("name", String))
+    parents.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(parents), [{"id": i, "name": "p"} for i in range(10, 20)])
+        dense = fk_sampler.KeyPool.from_table(connection, parents)
+        connection.execute(insert(parents), [{"id": 50, "name": "p"}])
+        sparse = fk_sampler.KeyPool.from_table(connection, parents, batch_size=3)
+
+    assert dense.take(range(len(dense))) == list(range(10, 20))
+    assert sparse.take(range(len(sparse))) == list(range(10, 20)) + [50]
+
+
+@pytest.mark.parametrize("distribution", fk_sampler.DISTRIBUTIONS)
+def test_sampler_only_returns_parent_keys(distribution):
+    """
+    Kiểm tra mọi phân phối chỉ trả về khóa có trong pool, và `fixed` chia đều số dòng con.
+    """
+    pool = fk_sampler.KeyPool()
+    pool.add_range(100, 110)
+    sampler = fk_sampler.ForeignKeySampler(
+        pool, {"distribution": distribution, "per_parent": 3, "fanout": [[2, 1]]}, seed=1
+    )
+    keys = sampler.sample(20) + sampler.sample(10)
+
+    assert len(keys) == 30
+    assert set(keys) <= set(range(100, 110))
+    if distribution == "fixed":
+        assert keys == [100 + i // 3 for i in range(30)]
+
+
+def test_invalid_distribution_is_rejected():
+    with pytest.raises(ValueError):
+        fk_sampler.validate_relation({"table": "users", "distribution": "normal"})
+
+
+def test_fanout_sampler_matches_children_per_parent():
+    """
+    Kiểm tra phân phối fanout: với mọi bảng cha có đúng 3 con, mỗi vòng dùng mỗi khóa cha đúng 3 lần,
+    và null_fraction = 1 chỉ trả về NULL.
+    """
+    pool = fk_sampler.KeyPool()
+    pool.add_range(1, 101)
+    sampler = fk_sampler.ForeignKeySampler(pool, {"distribution": "fanout", "fanout": [[3, 100]]}, seed=1)
+    keys = sampler.sample(120) + sampler.sample(180)
+    assert sorted(keys) == sorted(list(range(1, 101)) * 3)
+
+    nulls = fk_sampler.ForeignKeySampler(
+        pool, {"distribution": "fanout", "fanout": [[1, 5]], "null_fraction": 1}, seed=1
+    )
+    assert nulls.sample(10) == [None] * 10
+    with pytest.raises(ValueError):
+        fk_sampler.validate_relation({"distribution": "fanout", "fanout": [[0, 10]]})
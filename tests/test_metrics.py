@@ -0,0 +1,58 @@
+# tests/test_metrics.py
+
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+
+import json
+
+import pytest
+from sqlalchemy import create_engine
+
+from db_tools.core import metrics, processor
+from db_tools.core.models import Base
+
+
+@pytest.fixture
+def db_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+def test_seed_records_per_table_phases_and_events(db_engine, tmp_path):
+    """
+    Kiểm tra seed ghi nhận số dòng và thời gian từng giai đoạn theo bảng,
+    và subscriber nhận được sự kiện khi mỗi bảng xử lý xong.
+    """
+    metrics.reset()
+    finished = []
+    unsubscribe = metrics.subscribe(lambda event: event.kind == "table" and finished.append(event.table))
+    config = {
+        "seed": {
+            "users": {"count": 12, "chunk_size": 5, "columns": {"name": "name"}},
+            "orders": {"count": 8, "columns": {"customer_name": "name"}, "relations": {"user_id": {"table": "users"}}},
+        }
+    }
+    try:
+        processor.process_seed(config, db_engine)
+    finally:
+        unsubscribe()
+
+    assert finished == ["users", "orders"]
+    document = metrics.report()
+    users = document["tables"]["users"]
+    assert users["rows"] == 12
+    assert users["counters"]["chunks"] == 3
+    assert users["phases"]["write"]["count"] == 3
+    assert users["rows_per_sec"] > 0
+    assert {"generate", "fk_sample", "write"} <= set(document["phases"])
+
+    json_path, prom_path = tmp_path / "metrics.json", tmp_path / "metrics.prom"
+    metrics.write_report(json_path)
+    metrics.write_report(prom_path)
+    assert json.loads(json_path.read_text())["tables"]["orders"]["rows"] == 8
+    prom = prom_path.read_text()
+    assert 'db_tools_rows_total{table="orders"} 8' in prom
+    assert prom.endswith("# EOF\n")
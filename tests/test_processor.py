@@ -0,0 +1,326 @@
+# tests/test_processor.py
+
+import hashlib
+import sys
+from datetime import datetime
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+
+import pytest
+from sqlalchemy import (Column, ForeignKey, Integer, MetaData, String, Table,
+                        create_engine, insert, select, update)
+
+from db_tools.core.models import Base, Order, User
+from db_tools.core import processor
+
+
+@pytest.fixture
+def db_engine(tmp_path):
+    """Tạo một database SQLite tạm với schema từ models."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+def _insert_users(db_engine, count):
+    with db_engine.begin() as connection:
+        connection.execute(
+            insert(User.__table__),
+            [{"name": f"user{i}", "email": f"user{i}@local"} for i in range(count)],
+        )
+
+
+def test_anonymize_updates_every_row_in_batches(db_engine):
+    """
+    Kiểm tra ẩn danh hóa theo batch cập nhật toàn bộ các dòng, kể cả batch cuối bị lẻ.
+    """
+    _insert_users(db_engine, 25)
+    config = {"anonymize": {"users": {"batch_size": 10, "columns": {"name": "name"}}}}
+    processor.process_anonymize(config, db_engine)
+
+    with db_engine.connect() as connection:
+        names = connection.execute(select(User.__table__.c.name)).scalars().all()
+    assert len(names) == 25
+    assert not any(name.startswith("user") and name[4:].isdigit() for name in names)
+
+
+def test_seed_inserts_in_chunks_and_links_relations(db_engine):
+    """
+    Kiểm tra seed theo chunk: đủ số dòng và khóa ngoại trỏ tới bảng cha đã seed.
+    """
+    config = {
+        "seed": {
+            "users": {"count": 23, "chunk_size": 5, "columns": {"name": "name"}},
+            "orders": {
+                "count": 17,
+                "chunk_size": 4,
+                "columns": {"customer_name": "name"},
+                "relations": {"user_id": {"table": "users"}},
+            },
+        }
+    }
+    processor.process_seed(config, db_engine)
+
+    with db_engine.connect() as connection:
+        user_ids = set(connection.execute(select(User.__table__.c.id)).scalars().all())
+        order_user_ids = connection.execute(select(Order.__table__.c.user_id)).scalars().all()
+    assert len(user_ids) == 23
+    assert len(order_user_ids) == 17
+    assert set(order_user_ids) <= user_ids
+
+
+def test_anonymize_resume_matches_uninterrupted_run(tmp_path, monkeypatch):
+    """
+    Kiểm tra một lần chạy bị gián đoạn rồi resume cho kết quả giống hệt một lần chạy liền mạch.
+    """
+    config = {
+        "faker_seed": 1,
+        "checkpoint_dir": str(tmp_path / "checkpoints"),
+        "anonymize": {"users": {"batch_size": 4, "columns": {"name": "name"}}},
+    }
+    engines = []
+    for name in ("full", "resumed"):
+        engine = create_engine(f"sqlite:///{tmp_path / name}.db")
+        Base.metadata.create_all(engine)
+        _insert_users(engine, 18)
+        engines.append(engine)
+    full_engine, resumed_engine = engines
+
+    processor.process_anonymize(config, full_engine)
+
+    original_apply = processor.apply_anonymize_batch
+    calls = []
+
+    def failing_apply(*args):
+        calls.append(1)
+        if len(calls) == 3:
+            raise ConnectionError("connection lost")
+        original_apply(*args)
+
+    monkeypatch.setattr(processor, "apply_anonymize_batch", failing_apply)
+    processor.process_anonymize(config, resumed_engine)
+    assert list((tmp_path / "checkpoints").iterdir())
+
+    monkeypatch.setattr(processor, "apply_anonymize_batch", original_apply)
+    processor.process_anonymize(config, resumed_engine, resume=True)
+    assert not list((tmp_path / "checkpoints").iterdir())
+
+    query = select(User.__table__.c.id, User.__table__.c.name).order_by(User.__table__.c.id)
+    with full_engine.connect() as full, resumed_engine.connect() as resumed:
+        assert full.execute(query).all() == resumed.execute(query).all()
+
+
+def test_deterministic_anonymize_preserves_joins(db_engine):
+    """
+    Kiểm tra chế độ tất định: cùng một giá trị gốc ở hai bảng cho cùng một giá trị giả.
+    """
+    _insert_users(db_engine, 12)
+    with db_engine.begin() as connection:
+        connection.execute(
+            insert(Order.__table__),
+            [{"customer_name": f"user{i % 6}"} for i in range(12)],
+        )
+    config = {
+        "anonymize_key": "secret",
+        "anonymize": {
+            "users": {"batch_size": 5, "deterministic": True, "columns": {"name": "name"}},
+            "orders": {"columns": {"customer_name": {"provider": "name", "deterministic": True}}},
+        },
+    }
+    processor.process_anonymize(config, db_engine, workers=2)
+
+    with db_engine.connect() as connection:
+        users = connection.execute(select(User.__table__.c.name).order_by(User.__table__.c.id)).scalars().all()
+        orders = connection.execute(
+            select(Order.__table__.c.customer_name).order_by(Order.__table__.c.id)
+        ).scalars().all()
+    assert orders == [users[i % 6] for i in range(12)]
+    assert not any(name.startswith("user") for name in users)
+
+
+def test_anonymize_pushes_sql_rules_down_to_the_database(db_engine):
+    """
+    Kiểm tra các quy tắc SQL (template, hash, mask, constant, random_int) được áp trong database,
+    cùng lúc với một cột Faker đi qua đường batch.
+    """
+    _insert_users(db_engine, 8)
+    with db_engine.begin() as connection:
+        connection.execute(
+            insert(Order.__table__),
+            [{"customer_name": "alice", "shipping_address": "12 Long Street", "amount": 1.0} for _ in range(5)],
+        )
+    config = {
+        "anonymize": {
+            "users": {
+                "columns": {
+                    "name": "name",
+                    "email": {"rule": "template", "template": "user_{id}@example.com"},
+                },
+            },
+            "orders": {
+                "columns": {
+                    "customer_name": {"rule": "hash", "salt": "s"},
+                    "shipping_address": {"rule": "mask", "keep_last": 6},
+                    "amount": {"rule": "random_int", "min": 5, "max": 9},
+                    "order_date": {"rule": "null"},
+                },
+            },
+        }
+    }
+    processor.process_anonymize(config, db_engine)
+
+    users = User.__table__
+    orders = Order.__table__
+    with db_engine.connect() as connection:
+        user_rows = connection.execute(select(users.c.id, users.c.name, users.c.email)).all()
+        order_rows = connection.execute(
+            select(orders.c.customer_name, orders.c.shipping_address, orders.c.amount, orders.c.order_date)
+        ).all()
+    assert all(email == f"user_{user_id}@example.com" for user_id, _, email in user_rows)
+    assert not any(name.startswith("user") for _, name, _ in user_rows)
+    expected_hash = hashlib.md5(b"salice").hexdigest()
+    for customer_name, address, amount, order_date in order_rows:
+        assert customer_name == expected_hash
+        assert address == "********Street"
+        assert 5 <= amount <= 9
+        assert order_date is None
+
+
+def test_seed_references_parents_already_in_database(db_engine):
+    """
+    Kiểm tra bảng con tham chiếu tới bảng cha có sẵn trong database (không được seed trong lần chạy).
+    """
+    _insert_users(db_engine, 7)
+    config = {
+        "seed": {
+            "orders": {
+                "count": 14,
+                "columns": {"customer_name": "name"},
+                "relations": {"user_id": {"table": "users", "distribution": "fixed", "per_parent": 2}},
+            },
+        }
+    }
+    processor.process_seed(config, db_engine)
+
+    orders = Order.__table__
+    with db_engine.connect() as connection:
+        user_ids = connection.execute(select(orders.c.user_id).order_by(orders.c.id)).scalars().all()
+    assert user_ids == [1 + i // 2 for i in range(14)]
+
+
+def test_seed_discovers_relations_and_defers_self_references(db_engine):
+    """
+    Kiểm tra quan hệ được lấy từ khóa ngoại khi không khai báo trong cấu hình, và quan hệ tự tham chiếu
+    được gán ở lượt thứ hai (mọi manager_id trỏ tới một nhân viên đã seed).
+    """
+    metadata = MetaData()
+    employees = Table(
+        "employees", metadata,
+        Column("id", Integer, primary_key=True),
+        Column("name", String(50)),
+        Column("manager_id", Integer, ForeignKey("employees.id"), nullable=True),
+    )
+    metadata.create_all(db_engine)
+    config = {
+        "seed": {
+            "users": {"count": 5, "columns": {"name": "name"}},
+            "orders": {"count": 12, "columns": {"customer_name": "name"}},
+            "employees": {"count": 9, "chunk_size": 4, "columns": {"name": "name"}},
+        }
+    }
+    processor.process_seed(config, db_engine)
+
+    with db_engine.connect() as connection:
+        user_ids = set(connection.execute(select(User.__table__.c.id)).scalars().all())
+        order_user_ids = connection.execute(select(Order.__table__.c.user_id)).scalars().all()
+        employee_ids = set(connection.execute(select(employees.c.id)).scalars().all())
+        manager_ids = connection.execute(select(employees.c.manager_id)).scalars().all()
+    assert len(order_user_ids) == 12 and set(order_user_ids) <= user_ids
+    assert len(manager_ids) == 9 and set(manager_ids) <= employee_ids
+
+
+def _names(db_engine):
+    users = User.__table__
+    with db_engine.connect() as connection:
+        return dict(connection.execute(select(users.c.id, users.c.name)).all())
+
+
+def test_incremental_watermark_anonymizes_only_newer_rows(db_engine):
+    """
+    Kiểm tra chế độ tăng dần theo watermark: lần chạy sau chỉ xử lý các dòng có updated_at (ở đây created_at)
+    mới hơn giá trị lớn nhất của lần chạy trước.
+    """
+    users = User.__table__
+    with db_engine.begin() as connection:
+        connection.execute(insert(users), [
+            {"name": f"user{i}", "email": f"user{i}@local", "created_at": datetime(2024, 1, 1 + i)} for i in range(6)
+        ])
+    config = {"anonymize": {"users": {
+        "batch_size": 4, "incremental": {"watermark": "created_at"}, "columns": {"name": "name"},
+    }}}
+    processor.process_anonymize(config, db_engine)
+    first = _names(db_engine)
+    assert not any(name.startswith("user") for name in first.values())
+
+    with db_engine.begin() as connection:
+        connection.execute(update(users).where(users.c.id == 1).values(name="stale"))
+        connection.execute(update(users).where(users.c.id == 2).values(name="real", created_at=datetime(2024, 2, 1)))
+        connection.execute(insert(users), [{"name": "new", "email": "new@local", "created_at": datetime(2024, 2, 2)}])
+    processor.process_anonymize(config, db_engine)
+    second = _names(db_engine)
+
+    assert second[1] == "stale"
+    assert second[2] != "real" and second[7] != "new"
+    assert all(second[i] == first[i] for i in range(3, 7))
+
+
+def test_incremental_watermark_includes_rows_without_watermark(db_engine):
+    """
+    Kiểm tra dòng có cột watermark NULL (thêm sau lần chạy đầu) vẫn được ẩn danh hóa ở lần chạy tăng dần.
+    """
+    users = User.__table__
+    with db_engine.begin() as connection:
+        connection.execute(insert(users), [
+            {"name": f"user{i}", "email": f"user{i}@local", "created_at": datetime(2024, 1, 1 + i)} for i in range(3)
+        ])
+    config = {"anonymize": {"users": {"incremental": {"watermark": "created_at"}, "columns": {"name": "name"}}}}
+    processor.process_anonymize(config, db_engine)
+
+    with db_engine.begin() as connection:
+        connection.execute(insert(users), [{"name": "real", "email": "real@local", "created_at": None}])
+    processor.process_anonymize(config, db_engine)
+    assert _names(db_engine)[4] != "real"
+
+
+def test_incremental_hash_anonymizes_only_changed_rows(db_engine):
+    """
+    Kiểm tra chế độ tăng dần theo hash: chỉ dòng có cột được ẩn danh bị thay đổi (hoặc dòng mới) được xử lý lại,
+    kể cả các cột quy tắc SQL; `full` xử lý lại toàn bộ.
+    """
+    _insert_users(db_engine, 6)
+    users = User.__table__
+    config = {"anonymize": {"users": {
+        "batch_size": 4,
+        "incremental": "hash",
+        "columns": {"name": "name", "email": {"rule": "template", "template": "user_{id}@example.com"}},
+    }}}
+    processor.process_anonymize(config, db_engine)
+    first = _names(db_engine)
+
+    with db_engine.begin() as connection:
+        connection.execute(update(users).where(users.c.id == 2).values(name="real"))
+        connection.execute(update(users).where(users.c.id == 3).values(email="real@local"))
+        # Cột không được ẩn danh thay đổi thì không cần xử lý lại
+        connection.execute(update(users).where(users.c.id == 4).values(is_active=False))
+    processor.process_anonymize(config, db_engine)
+    second = _names(db_engine)
+    with db_engine.connect() as connection:
+        emails = dict(connection.execute(select(users.c.id, users.c.email)).all())
+
+    assert second[2] != "real" and second[3] != first[3]
+    assert all(second[i] == first[i] for i in (1, 4, 5, 6))
+    assert emails[3] == "user_3@example.com"
+
+    processor.process_anonymize(config, db_engine, full=True)
+    assert all(name != second[i] for i, name in _names(db_engine).items())
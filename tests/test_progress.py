@@ -0,0 +1,53 @@
+# tests/test_progress.py
+
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+
+from db_tools.core import progress
+
+
+def test_channel_coalesces_progress_per_table():
+    """
+    Kiểm tra nhiều cập nhật tiến độ của cùng một bảng được gộp thành bản mới nhất,
+    và sự kiện kết thúc thay thế cập nhật còn chờ.
+    """
+    channel = progress.ProgressChannel()
+    channel.publish(progress.TaskStarted("users", "seed", 300))
+    for done in (100, 200, 300):
+        channel.publish(progress.TaskProgress("users", "seed", done, 300, 1.0))
+    channel.publish(progress.TaskProgress("orders", "seed", 5, 10, 1.0))
+
+    events = channel.drain()
+    assert events[0] == progress.TaskStarted("users", "seed", 300)
+    assert [(e.table, e.done) for e in events[1:]] == [("users", 300), ("orders", 5)]
+    assert channel.drain() == []
+
+    channel.publish(progress.TaskProgress("orders", "seed", 8, 10, 1.0))
+    channel.publish(progress.TaskFinished("orders", "seed", 10, 0.5))
+    assert channel.drain() == [progress.TaskFinished("orders", "seed", 10, 0.5)]
+
+
+def test_channel_is_bounded_and_reports_dropped_messages():
+    channel = progress.ProgressChannel(max_events=3)
+    for index in range(5):
+        channel.publish(progress.LogLine(f"line {index}"))
+    events = channel.drain()
+    assert "2 message(s) dropped" in events[0].message
+    assert [e.message for e in events[1:]] == ["line 2", "line 3", "line 4"]
+
+
+def test_track_and_echo_publish_to_attached_channel():
+    """
+    Kiểm tra track() báo tiến độ theo số dòng và echo() gửi thông báo vào kênh thay vì in ra.
+    """
+    channel = progress.ProgressChannel()
+    with progress.attach(channel):
+        progress.echo("hello")
+        chunks = list(progress.track([[1, 2], [3, 4], [5]], "users", "anonymize", 5, "Anonymizing"))
+    assert chunks == [[1, 2], [3, 4], [5]]
+
+    events = channel.drain()
+    assert events[0] == progress.LogLine("hello")
+    assert events[1] == progress.TaskStarted("users", "anonymize", 5)
+    assert isinstance(events[2], progress.TaskFinished) and events[2].done == 5
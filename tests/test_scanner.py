@@ -0,0 +1,71 @@
+# tests/test_scanner.py
+
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+
+import pytest
+from sqlalchemy import create_engine, insert
+
+from db_tools.core import database, scanner, schema_cache
+from db_tools.core.models import Base, User
+
+users = User.__table__
+
+
+@pytest.fixture
+def db_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        # Khóa chính thưa (bước 3) để trang không trùng với khoảng khóa liên tiếp
+        connection.execute(insert(users), [
+            {"id": i * 3, "name": f"user {i}", "email": f"u{i}@example.com", "is_active": i % 2 == 0}
+            for i in range(1, 26)
+        ])
+    schema_cache.clear_schema_cache()
+    yield engine
+    schema_cache.clear_schema_cache()
+    engine.dispose()
+
+
+def _ids(batches):
+    return [[row._mapping["id"] for row in batch] for batch in batches]
+
+
+def test_scan_keyset_pages_across_boundaries(db_engine):
+    """
+    Kiểm tra quét keyset lấy đủ mọi dòng đúng thứ tự, qua nhiều trang (kể cả trang cuối bị lẻ),
+    tiếp tục được sau một khóa cho trước và chỉ lấy các cột được yêu cầu (khóa chính đứng đầu).
+    """
+    with db_engine.connect() as connection:
+        batches = _ids(scanner.scan_keyset(connection, users, batch_size=10))
+        assert [len(batch) for batch in batches] == [10, 10, 5]
+        assert sum(batches, []) == [i * 3 for i in range(1, 26)]
+
+        resumed = _ids(scanner.scan_keyset(connection, users, batch_size=10, start_after=30))
+        assert sum(resumed, []) == [i * 3 for i in range(11, 26)]
+
+        batch = next(scanner.scan_keyset(connection, users, batch_size=5, columns=[users.c.name]))
+        assert list(batch[0]._mapping) == ["id", "name"]
+
+
+def test_scan_keyset_applies_where(db_engine):
+    """Kiểm tra điều kiện `where` được áp dụng trên mọi trang."""
+    with db_engine.connect() as connection:
+        batches = _ids(scanner.scan_keyset(connection, users, batch_size=4, where=users.c.is_active.is_(True)))
+    assert sum(batches, []) == [i * 3 for i in range(2, 26, 2)]
+    assert [len(batch) for batch in batches] == [4, 4, 4]
+
+
+def test_preview_pages_end_with_no_next_key(db_engine):
+    """Kiểm tra xem trước theo trang: khóa tiếp theo nối các trang, trang cuối trả về next_key = None."""
+    columns, rows, next_key = database.get_table_preview_page(db_engine, "users", limit=10)
+    assert columns[0] == "id" and [row[0] for row in rows] == [i * 3 for i in range(1, 11)]
+    assert next_key == 30
+
+    _, rows, next_key = database.get_table_preview_page(db_engine, "users", after=next_key, limit=10)
+    assert [row[0] for row in rows] == [i * 3 for i in range(11, 21)]
+    _, rows, next_key = database.get_table_preview_page(db_engine, "users", after=next_key, limit=10)
+    assert [row[0] for row in rows] == [i * 3 for i in range(21, 26)]
+    assert next_key is None
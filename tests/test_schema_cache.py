@@ -0,0 +1,75 @@
+# tests/test_schema_cache.py
+
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+
+import pytest
+from sqlalchemy import MetaData, create_engine, text
+
+from db_tools.core import schema_cache
+from db_tools.core.models import Base
+
+
+@pytest.fixture
+def db_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(engine)
+    schema_cache.clear_schema_cache()
+    yield engine
+    schema_cache.clear_schema_cache()
+    engine.dispose()
+
+
+@pytest.fixture
+def reflected(monkeypatch):
+    """Ghi lại danh sách bảng (`only`) của mỗi lần gọi MetaData.reflect."""
+    calls = []
+    reflect = MetaData.reflect
+
+    def recording_reflect(self, bind, only=None, **kwargs):
+        calls.append(list(only) if only is not None else None)
+        return reflect(self, bind, only=only, **kwargs)
+
+    monkeypatch.setattr(MetaData, "reflect", recording_reflect)
+    return calls
+
+
+def test_tables_are_reflected_once_per_engine(db_engine, reflected):
+    """
+    Kiểm tra các bảng đã có trong cache không được reflect lại, và bảng mới được yêu cầu
+    chỉ reflect riêng phần còn thiếu vào cùng một MetaData.
+    """
+    metadata = schema_cache.get_metadata(db_engine, ["users"])
+    assert schema_cache.get_metadata(db_engine, ["users"]) is metadata
+    assert reflected == [["users"]]
+
+    assert schema_cache.get_metadata(db_engine, ["users", "orders"]) is metadata
+    assert reflected == [["users"], ["orders"]]
+    assert {"users", "orders"} <= set(metadata.tables)
+    # Bảng không tồn tại không gây lỗi, chỉ không có mặt trong kết quả
+    assert schema_cache.get_table(db_engine, "missing") is None
+
+
+def test_disk_cache_is_reused_until_the_schema_changes(db_engine, reflected, tmp_path):
+    """
+    Kiểm tra metadata được lưu xuống đĩa và đọc lại ở lần chạy sau (không reflect),
+    còn khi schema thay đổi thì dấu vân tay khác đi và bảng được reflect lại.
+    """
+    cache_dir = str(tmp_path / "schema")
+    schema_cache.get_metadata(db_engine, ["users", "orders"], cache_dir)
+    assert len(list((tmp_path / "schema").glob("*.pkl"))) == 1
+
+    # Như một lần chạy mới: cache trong bộ nhớ trống, metadata được đọc từ file
+    schema_cache.clear_schema_cache()
+    metadata = schema_cache.get_metadata(db_engine, ["users", "orders"], cache_dir)
+    assert {"users", "orders"} <= set(metadata.tables)
+    assert reflected == [["orders", "users"]]
+
+    with db_engine.begin() as connection:
+        connection.execute(text("ALTER TABLE users ADD COLUMN nickname VARCHAR(20)"))
+    schema_cache.clear_schema_cache()
+    metadata = schema_cache.get_metadata(db_engine, ["users"], cache_dir)
+    assert "nickname" in metadata.tables["users"].c
+    assert reflected == [["orders", "users"], ["users"]]
+    assert len(list((tmp_path / "schema").glob("*.pkl"))) == 2
@@ -0,0 +1,33 @@
+# tests/test_startup.py
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parents[1] / 'src'
+
+# Các module nặng chỉ được import khi lệnh thật sự cần đến
+HEAVY_MODULES = ("faker", "textual", "sqlalchemy", "db_tools.tui", "db_tools.core.processor")
+
+
+def _run(*args):
+    env = {**os.environ, "PYTHONPATH": str(SRC)}
+    return subprocess.run([sys.executable, *args], capture_output=True, text=True, env=env, check=True)
+
+
+def test_cli_import_does_not_load_heavy_modules():
+    """
+    Kiểm tra `import db_tools.main` (được chạy với mọi lệnh, kể cả --help)
+    không kéo theo SQLAlchemy, Faker, Textual hay processor.
+    """
+    result = _run("-X", "importtime", "-c", "import db_tools.main")
+    imported = {line.rsplit("|", 1)[-1].strip() for line in result.stderr.splitlines() if "|" in line}
+    assert not imported & set(HEAVY_MODULES)
+
+
+def test_help_lists_commands():
+    """Kiểm tra --help vẫn liệt kê đầy đủ các lệnh."""
+    result = _run("-m", "db_tools.main", "--help")
+    for command in ("seed", "anonymize", "bench", "ui", "schema"):
+        assert command in result.stdout
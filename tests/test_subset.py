@@ -0,0 +1,109 @@
+# tests/test_subset.py
+
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+
+import pytest
+from sqlalchemy import (Column, ForeignKey, Integer, MetaData, String, Table,
+                        create_engine, insert, select)
+
+from db_tools.core import subset
+
+metadata = MetaData()
+users = Table("users", metadata, Column("id", Integer, primary_key=True), Column("name", String(50)))
+orders = Table(
+    "orders", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("user_id", Integer, ForeignKey("users.id")),
+)
+order_items = Table(
+    "order_items", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("order_id", Integer, ForeignKey("orders.id")),
+)
+employees = Table(
+    "employees", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("manager_id", Integer, ForeignKey("employees.id")),
+)
+
+
+@pytest.fixture
+def engines(tmp_path):
+    source = create_engine(f"sqlite:///{tmp_path / 'source.db'}")
+    target = create_engine(f"sqlite:///{tmp_path / 'target.db'}")
+    metadata.create_all(source)
+    metadata.create_all(target)
+    with source.begin() as connection:
+        connection.execute(insert(users), [{"id": i, "name": f"real {i}"} for i in range(1, 51)])
+        connection.execute(insert(orders), [{"id": i, "user_id": i % 50 + 1} for i in range(1, 201)])
+        connection.execute(insert(order_items), [{"id": i, "order_id": i % 200 + 1} for i in range(1, 601)])
+        # Cây quản lý: nhân viên i có quản lý là i // 2
+        connection.execute(insert(employees), [{"id": i, "manager_id": i // 2 or None} for i in range(1, 33)])
+    yield source, target
+    source.dispose()
+    target.dispose()
+
+
+def _keys(db_engine, table, column="id"):
+    with db_engine.connect() as connection:
+        return set(connection.execute(select(table.c[column])).scalars())
+
+
+def test_key_set_is_sorted_and_deduplicated():
+    """Kiểm tra KeySet bỏ khóa trùng, duyệt theo thứ tự tăng dần và hỗ trợ cả khóa không phải số nguyên."""
+    keys = subset.KeySet()
+    added = [keys.add(key) for key in (70000, 3, 70000, 65535, 3, 0)]
+    assert added == [True, True, False, True, False, True]
+    assert list(keys) == [0, 3, 65535, 70000]
+    assert 65535 in keys and 65536 not in keys
+    keys.add("b")
+    keys.add("a")
+    assert len(keys) == 6
+    assert list(keys.batches(4)) == [[0, 3, 65535, 70000], ["a", "b"]]
+
+
+def test_subset_is_referentially_intact(engines):
+    """
+    Kiểm tra subset: dòng gốc được lấy mẫu, các dòng con của chúng được kéo theo, mọi dòng cha được tham chiếu
+    (kể cả chuỗi quản lý trỏ về chính bảng) đều có mặt, và cột được ẩn danh hóa trước khi ghi.
+    """
+    source, target = engines
+    config = {
+        "faker_seed": 3,
+        "subset": {
+            "batch_size": 7,
+            "roots": {"orders": {"percent": 20}, "employees": {"where": "id = 21"}},
+        },
+        "anonymize": {"users": {"columns": {"name": "name"}}},
+    }
+    subset.process_subset(config, source, target, anonymize=True)
+
+    copied_orders = _keys(target, orders)
+    assert 0 < len(copied_orders) < 200
+    # Mọi order_item của các đơn hàng được chọn, và không có dòng nào khác
+    expected_items = {i for i in range(1, 601) if i % 200 + 1 in copied_orders}
+    assert _keys(target, order_items) == expected_items
+    assert _keys(target, orders, "user_id") <= _keys(target, users)
+    assert _keys(target, employees) == {21, 10, 5, 2, 1}
+    with target.connect() as connection:
+        names = connection.execute(select(users.c.name)).scalars().all()
+    assert names and not any(name.startswith("real") for name in names)
+
+
+def test_subset_resets_target_sequences(engines, monkeypatch):
+    """
+    Kiểm tra mỗi bảng được sao chép (kèm khóa chính) đều được đưa sequence về sau khóa lớn nhất,
+    để các lần INSERT thông thường vào database đích không bị trùng khóa (PostgreSQL).
+    """
+    source, target = engines
+    reset = []
+
+    def reset_sequence_sql(table, dialect):
+        reset.append(table.name)
+        return "SELECT 1"
+
+    monkeypatch.setattr(subset.exporters, "reset_sequence_sql", reset_sequence_sql)
+    subset.process_subset({"subset": {"roots": {"orders": {"where": "id <= 3"}}}}, source, target)
+    assert sorted(reset) == ["order_items", "orders", "users"]
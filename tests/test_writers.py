@@ -0,0 +1,71 @@
+# tests/test_writers.py
+
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+
+import pytest
+from sqlalchemy import (Column, Integer, MetaData, String, Table,
+                        create_engine, event, select)
+
+from db_tools.core import writers
+
+metadata = MetaData()
+people = Table(
+    "people", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("name", String(50)),
+    Column("city", String(50)),
+    Column("age", Integer),
+)
+
+
+@pytest.fixture
+def db_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+def test_sqlite_writer_splits_rows_under_the_parameter_limit(db_engine, monkeypatch):
+    """
+    Kiểm tra INSERT nhiều dòng được chia thành nhiều câu lệnh để không vượt giới hạn số tham số của SQLite,
+    và khóa chính trả về theo đúng thứ tự các dòng.
+    """
+    monkeypatch.setattr(writers, "SQLITE_MAX_PARAMS", 10)
+    statements = []
+    event.listen(db_engine, "before_cursor_execute", lambda *args: statements.append(args[3]))
+    rows = [{"name": f"p{i}", "city": "Hanoi", "age": i} for i in range(10)]
+
+    with db_engine.begin() as connection:
+        new_pks = writers.sqlite_writer(connection, people, rows, True)
+        # 3 cột, tối đa 10 tham số: 3 dòng mỗi câu lệnh
+        assert len(statements) == 4
+        assert max(len(parameters) for parameters in statements) == 9
+        names = dict(connection.execute(select(people.c.id, people.c.name)).all())
+    assert [names[pk] for pk in new_pks] == [row["name"] for row in rows]
+
+
+def test_bulk_load_session_restores_sqlite_pragmas(db_engine):
+    """Kiểm tra các PRAGMA được đổi trong phiên nạp dữ liệu và trả lại giá trị cũ khi kết thúc."""
+    with db_engine.connect() as connection:
+        before = {name: connection.exec_driver_sql(f"PRAGMA {name}").scalar() for name in writers._SQLITE_BULK_PRAGMAS}
+        with writers.bulk_load_session(connection):
+            assert connection.exec_driver_sql("PRAGMA synchronous").scalar() == 0
+            assert connection.exec_driver_sql("PRAGMA cache_size").scalar() == -65536
+        after = {name: connection.exec_driver_sql(f"PRAGMA {name}").scalar() for name in writers._SQLITE_BULK_PRAGMAS}
+    assert after == before
+
+
+def test_copy_csv_fields_encode_bytes_and_json():
+    """
+    Kiểm tra giá trị trong CSV cho COPY: NULL là trường rỗng, bytes ở dạng hex của bytea,
+    dict/list ở dạng JSON, dấu nháy được nhân đôi.
+    """
+    assert writers._csv_field(None) == ""
+    assert writers._csv_field("") == '""'
+    assert writers._csv_field(b"\x00\xff") == '"\\x00ff"'
+    assert writers._csv_field({"a": [1, "x"]}) == '"{""a"": [1, ""x""]}"'
+    assert writers._csv_field(["đ"]) == '"[""đ""]"'
+    assert writers._csv_field('say "hi"') == '"say ""hi"""'